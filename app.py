@@ -2,9 +2,16 @@
 import os
 import pandas as pd
 import streamlit as st
-import matplotlib.pyplot as plt
 from datetime import date
 
+from productividad.esquemas import REGISTRO_APP, anexar
+from productividad.exportar import boton_descarga
+from productividad.fechas import fill_mes_anio, month_str
+from productividad.graficos import get_charts, huella, lineas
+from productividad.storage import append_csv, data_version, load_csv, save_csv
+from productividad.tablas import mostrar_tabla
+from productividad.tarifas import VIGENCIA_COL, TariffHistory, nueva_version, vigentes
+
 st.set_page_config(page_title="Registro & Variables", page_icon="🧾", layout="wide")
 
 # ---------------- Config ----------------
@@ -14,30 +21,14 @@ TARIFAS_PATH = "tarifas.csv"
 
 TIPOS = ["Productividad", "Variable", "HorasExtra", "Bonificación"]
 
+# Gráficas dibujadas una vez a PNG y cacheadas por proceso (LRU)
+GRAFICAS = get_charts()
+
 # ---------------- Helpers ----------------
 def ensure_csv(path, columns):
     if not os.path.exists(path):
         pd.DataFrame(columns=columns).to_csv(path, index=False, encoding="utf-8-sig")
 
-def load_csv(path):
-    if os.path.exists(path):
-        try:
-            return pd.read_csv(path, encoding="utf-8-sig")
-        except Exception:
-            return pd.read_csv(path)
-    return pd.DataFrame()
-
-def save_csv(df, path):
-    df.to_csv(path, index=False, encoding="utf-8-sig")
-
-def month_str(d):
-    try:
-        if isinstance(d, str):
-            d = pd.to_datetime(d).date()
-        return f"{d.year:04d}-{d.month:02d}"
-    except Exception:
-        return ""
-
 # ---------------- Init storage ----------------
 ensure_csv(REGISTRO_PATH, [
     "Fecha (YYYY-MM-DD)","Empleado","Área","Tipo_Caso","Variable_Tipo","Cantidad",
@@ -53,31 +44,28 @@ ensure_csv(TARIFAS_PATH, [
 
 registro = load_csv(REGISTRO_PATH)
 empleados = load_csv(EMPLEADOS_PATH)
-tarifas = load_csv(TARIFAS_PATH)
+tarifas = load_csv(TARIFAS_PATH)  # historial: una fila por versión (Vigente_desde)
 
-# backfill Mes/Año
-if not registro.empty:
-    if "Mes" not in registro.columns:
-        registro["Mes"] = ""
-    if "Año" not in registro.columns:
-        registro["Año"] = ""
-    registro["Mes"] = registro.apply(lambda r: month_str(r.get("Fecha (YYYY-MM-DD)","")), axis=1)
-    registro["Año"] = pd.to_datetime(registro["Fecha (YYYY-MM-DD)"], errors="coerce").dt.year
+# backfill Mes/Año (solo filas a las que les falta)
+fill_mes_anio(registro, fecha_col="Fecha (YYYY-MM-DD)")
 
 # ---------------- Sidebar (admin) ----------------
 st.sidebar.header("⚙️ Administración")
 
 with st.sidebar.expander("✏️ Tarifas (pago por caso / hora extra)", expanded=True):
-    st.caption("Define cuánto se paga por cada tipo de caso de **Variable** y la tarifa de **Hora Extra**.")
+    st.caption("Define cuánto se paga por cada tipo de caso de **Variable** y la tarifa de **Hora Extra**. "
+               "Los cambios rigen desde hoy; los meses anteriores conservan sus tarifas.")
     if tarifas.empty:
         tarifas = pd.DataFrame([
             {"Tipo_Caso":"Variable","Concepto":"Caso A","Tarifa":10000.0},
             {"Tipo_Caso":"Variable","Concepto":"Caso B","Tarifa":15000.0},
             {"Tipo_Caso":"HorasExtra","Concepto":"Hora Extra","Tarifa":8000.0},
         ])
-    tarifas_edit = st.data_editor(tarifas, use_container_width=True, num_rows="dynamic", key="tarifas_editor")
+    tarifas_edit = st.data_editor(vigentes(tarifas, keys=["Tipo_Caso","Concepto"]), use_container_width=True,
+                                  num_rows="dynamic", disabled=[VIGENCIA_COL], key="tarifas_editor")
     if st.button("💾 Guardar tarifas", use_container_width=True):
-        save_csv(tarifas_edit, TARIFAS_PATH)
+        tarifas = nueva_version(tarifas, tarifas_edit, keys=["Tipo_Caso","Concepto"])
+        save_csv(tarifas, TARIFAS_PATH)
         st.success("Tarifas guardadas.")
 
 with st.sidebar.expander("👥 Metas (opcional)", expanded=False):
@@ -106,7 +94,8 @@ with tab_reg:
             area = st.text_input("Área")
         with c2:
             tipo = st.selectbox("Tipo de Caso", TIPOS, index=0)
-            variable_tipo_choices = tarifas[tarifas["Tipo_Caso"]=="Variable"]["Concepto"].dropna().unique().tolist()
+            actuales = vigentes(tarifas, keys=["Tipo_Caso","Concepto"])
+            variable_tipo_choices = actuales[actuales["Tipo_Caso"]=="Variable"]["Concepto"].dropna().unique().tolist()
             variable_tipo = st.selectbox("Tipo de Variable (si aplica)", [""] + variable_tipo_choices)
             cantidad = st.number_input("Cantidad (para Variable)", min_value=0, step=1, value=0)
         with c3:
@@ -129,8 +118,8 @@ with tab_reg:
                 "Año": fecha.year,
                 "Observaciones": "",
             }
-            registro = pd.concat([registro, pd.DataFrame([new])], ignore_index=True)
-            save_csv(registro, REGISTRO_PATH)
+            append_csv(pd.DataFrame([new]), REGISTRO_PATH)
+            registro = anexar(registro, [new], REGISTRO_APP)
             st.success("Registro guardado.")
 
 # ---------- Tab Ingresos mensuales ----------
@@ -155,27 +144,27 @@ with tab_dash:
         if f_emp: df = df[df["Empleado"].isin(f_emp)]
 
         # ----- Calcular ingresos por Variable -----
-        # Merge con tarifas por (Tipo_Caso='Variable', Concepto=Variable_Tipo)
+        # Tarifa por (Tipo_Caso='Variable', Concepto=Variable_Tipo) vigente en la fecha de cada fila
+        # (motor de tarifas: join as-of vectorizado, sin merge)
         vars_df = df[df["Tipo_Caso"]=="Variable"].copy()
         if not vars_df.empty:
-            tarifas_var = tarifas[tarifas["Tipo_Caso"]=="Variable"][["Concepto","Tarifa"]].rename(columns={"Tarifa":"Tarifa_Variable"})
-            vars_df = vars_df.merge(tarifas_var, left_on="Variable_Tipo", right_on="Concepto", how="left")
-            vars_df["Tarifa_Variable"] = pd.to_numeric(vars_df["Tarifa_Variable"], errors="coerce").fillna(0.0)
+            motor_var = TariffHistory.from_frame(tarifas[tarifas["Tipo_Caso"]=="Variable"])
+            vars_df["Tarifa_Variable"] = motor_var.rates(vars_df["Variable_Tipo"], vars_df["Fecha (YYYY-MM-DD)"])
             vars_df["Cantidad"] = pd.to_numeric(vars_df["Cantidad"], errors="coerce").fillna(0).astype(int)
             vars_df["Ingreso_Variable"] = vars_df["Cantidad"] * vars_df["Tarifa_Variable"]
         else:
             vars_df = pd.DataFrame(columns=df.columns.tolist() + ["Tarifa_Variable","Ingreso_Variable"])
 
         # ----- Calcular ingresos por Horas Extra -----
-        he_rate = tarifas.loc[tarifas["Tipo_Caso"]=="HorasExtra", "Tarifa"]
-        tarifa_hora = float(he_rate.iloc[0]) if not he_rate.empty else 0.0
+        motor_hora = TariffHistory.from_frame(tarifas, concept_col="Tipo_Caso")
+        tarifa_hora = motor_hora.rate("HorasExtra")
         extras_df = df.copy()
         extras_df["Horas_Extra"] = pd.to_numeric(extras_df["Horas_Extra"], errors="coerce").fillna(0).astype(int)
-        extras_df["Ingreso_Extras"] = extras_df["Horas_Extra"] * tarifa_hora
+        extras_df = motor_hora.price_columns(extras_df, {"Ingreso_Extras": ("HorasExtra", "Horas_Extra")}, "Fecha (YYYY-MM-DD)")
 
         # ----- Agregar por empleado/mes -----
-        var_mes = vars_df.groupby(["Empleado","Mes"], as_index=False)["Ingreso_Variable"].sum()
-        ext_mes = extras_df.groupby(["Empleado","Mes"], as_index=False)["Ingreso_Extras"].sum()
+        var_mes = vars_df.groupby(["Empleado","Mes"], as_index=False, observed=True)["Ingreso_Variable"].sum()
+        ext_mes = extras_df.groupby(["Empleado","Mes"], as_index=False, observed=True)["Ingreso_Extras"].sum()
 
         resumen = pd.merge(var_mes, ext_mes, on=["Empleado","Mes"], how="outer").fillna(0)
         if not resumen.empty:
@@ -184,15 +173,12 @@ with tab_dash:
             st.dataframe(resumen.sort_values(["Mes","Empleado"]), use_container_width=True)
 
             # gráfico simple por mes (Total)
-            tot_mes = resumen.groupby("Mes", as_index=False)["Total_Mensual"].sum().sort_values("Mes")
+            tot_mes = resumen.groupby("Mes", as_index=False, observed=True)["Total_Mensual"].sum().sort_values("Mes")
             if not tot_mes.empty:
-                fig = plt.figure()
-                plt.plot(tot_mes["Mes"], tot_mes["Total_Mensual"])
-                plt.title("Total mensual (Variables + Extras)")
-                plt.xlabel("Mes")
-                plt.ylabel("Valor")
-                plt.xticks(rotation=45, ha="right")
-                st.pyplot(fig)
+                # Un PNG por contenido de la serie (cambia con datos o tarifas)
+                serie = tot_mes.set_index(tot_mes["Mes"].astype(str))["Total_Mensual"]
+                st.image(GRAFICAS.png(("app.total_mensual", huella(serie)), lambda ax: lineas(
+                    ax, serie, "Total mensual (Variables + Extras)", "Mes", "Valor")))
         else:
             st.info("No hay datos para calcular ingresos.")
 
@@ -201,9 +187,9 @@ with tab_dash:
 # ---------- Tab Datos ----------
 with tab_data:
     st.subheader("Registros")
-    st.dataframe(registro.sort_values("Fecha (YYYY-MM-DD)", ascending=False), use_container_width=True)
-    st.download_button("⬇️ Descargar registros (CSV)", data=registro.to_csv(index=False).encode("utf-8-sig"), file_name="registro.csv", mime="text/csv")
+    mostrar_tabla(registro, "registros", data_version(REGISTRO_PATH), por=["Fecha (YYYY-MM-DD)"], ascendente=False)
+    boton_descarga("⬇️ Descargar registros", registro, "registro", key="dl_registros")
 
     st.subheader("Tarifas")
     st.dataframe(tarifas, use_container_width=True)
-    st.download_button("⬇️ Descargar tarifas (CSV)", data=tarifas.to_csv(index=False).encode("utf-8-sig"), file_name="tarifas.csv", mime="text/csv")
+    boton_descarga("⬇️ Descargar tarifas", tarifas, "tarifas", key="dl_tarifas")
@@ -3,9 +3,21 @@ import pandas as pd
 from datetime import datetime, date
 import os
 import base64
-import requests
 from io import BytesIO
 
+from productividad import gh_client
+from productividad.gh_cache import begin_rerun, forget, get_contents, known_sha, remember, shared_frame
+from productividad.casos import leer_casos, parse_casos, tipos_archivo
+from productividad.dup_index import get_index
+from productividad.esquemas import REGISTROS_ADMIN, anexar, aplicar_esquema
+from productividad.gh_sync import merge_appended, put_with_retry
+from productividad.ledger import file_version
+from productividad.metas import cumplimiento
+from productividad.shared_data import get_sequence, get_shared
+from productividad.shards import Manifest, month_key
+from productividad.tarifas import TariffHistory, vigentes
+from productividad.write_behind import get_queue
+
 # =========================
 # CONFIGURACIÓN GENERAL
 # =========================
@@ -20,8 +32,17 @@ BBVA_PRIMARY_DARK = "#002B76"  # Azul BBVA más oscuro
 BBVA_WHITE = "#FFFFFF"
 
 # Rutas (en GitHub)
-CSV_PATH = st.secrets.get("REGISTROS_PATH", "data/registro_empresarial2.csv")
+CSV_PATH = st.secrets.get("REGISTROS_PATH", "data/registro_empresarial2.csv")  # archivo único previo
+REGISTROS_DIR = st.secrets.get("REGISTROS_DIR", "data/registros")              # un CSV por mes
 SETTINGS_PATH = st.secrets.get("CONFIG_PATH", "data/config_productividad.csv")
+CONFIG_VIGENCIA = "vigente_desde"  # una fila de config por versión
+
+# Write-behind: los casos se suben agrupados (un commit cada N filas o T segundos)
+WB_MAX_ROWS = int(st.secrets.get("WB_MAX_ROWS", 50))
+WB_MAX_SECONDS = float(st.secrets.get("WB_MAX_SECONDS", 20))
+
+# Registros compartidos por todas las sesiones: GitHub se re-verifica a lo sumo cada N segundos
+SHARED_MAX_AGE = float(st.secrets.get("SHARED_MAX_AGE", 5))
 
 # =========================
 # GITHUB HELPERS (PERSISTENCIA)
@@ -32,43 +53,173 @@ def _gh_headers():
         "Accept": "application/vnd.github+json",
     }
 
+def _gh_url(repo_path: str) -> str:
+    api = st.secrets.get("GITHUB_API_URL", os.getenv("GITHUB_API_URL", "https://api.github.com"))
+    return f"{api.rstrip('/')}/repos/{st.secrets['GITHUB_REPO']}/contents/{repo_path}"
+
 def gh_get_file(repo_path: str):
-    repo = st.secrets["GITHUB_REPO"]
-    url = f"https://api.github.com/repos/{repo}/contents/{repo_path}"
-    r = requests.get(url, headers=_gh_headers())
-    if r.status_code == 200:
-        js = r.json()
-        return base64.b64decode(js["content"]), js["sha"]
-    if r.status_code == 404:
+    """GET condicional: si el archivo no cambió (304) se reutiliza la caché del proceso."""
+    url = _gh_url(repo_path)
+    status, content, sha, r = get_contents(url, _gh_headers())
+    if status == 200:
+        return content, sha
+    if status == 404:
         return b"", None
     raise Exception(f"GitHub GET error {r.status_code}: {r.text}")
 
-def gh_put_file(repo_path: str, content_bytes: bytes, message: str):
-    repo = st.secrets["GITHUB_REPO"]
-    url = f"https://api.github.com/repos/{repo}/contents/{repo_path}"
-    _, sha = gh_get_file(repo_path)
-
-    payload = {
-        "message": message,
-        "content": base64.b64encode(content_bytes).decode("utf-8"),
-    }
-    if sha:
-        payload["sha"] = sha
-
-    r = requests.put(url, headers=_gh_headers(), json=payload)
-    if r.status_code not in (200, 201):
-        raise Exception(f"GitHub PUT error {r.status_code}: {r.text}")
+def gh_put_file(repo_path: str, content_bytes: bytes, message: str, on_conflict=None):
+    """PUT con el sha de la última lectura del archivo (sin GET previo).
+
+    En conflicto (409/422) ``on_conflict(bytes_remotos)`` reconstruye el
+    contenido sobre la cabeza nueva y se reintenta con backoff acotado.
+    """
+    url = _gh_url(repo_path)
+    errores = []
+
+    def put(content, sha):
+        payload = {
+            "message": message,
+            "content": base64.b64encode(content).decode("utf-8"),
+        }
+        if sha:
+            payload["sha"] = sha
+        r = gh_client.put(url, headers=_gh_headers(), json=payload)
+        if r.status_code in (200, 201):
+            remember(url, None, r.json()["content"]["sha"], content)
+        else:
+            # La copia guardada quedó vieja: el reintento relee de la red aunque quede poco cupo
+            forget(url)
+            errores.append(r.text)
+        return r.status_code
+
+    status = put_with_retry(put, lambda: gh_get_file(repo_path), on_conflict, content_bytes, known_sha(url))
+    if status not in (200, 201):
+        raise Exception(f"GitHub PUT error {status}: {errores[-1] if errores else ''}")
+
+def _csv_bytes_a_df(content: bytes) -> pd.DataFrame:
+    if not content:
+        return pd.DataFrame()
+    return pd.read_csv(BytesIO(content), encoding="utf-8-sig")
 
 def cargar_df_desde_github(repo_path: str) -> pd.DataFrame:
-    content, _ = gh_get_file(repo_path)
+    content, sha = gh_get_file(repo_path)
     if not content:
         return pd.DataFrame()
-    return pd.read_csv(BytesIO(content), encoding="utf-8-sig")
+    return shared_frame(sha, lambda: _csv_bytes_a_df(content))
+
+def _df_a_csv_bytes(df: pd.DataFrame) -> bytes:
+    return df.to_csv(index=False, encoding="utf-8-sig").encode("utf-8-sig")
 
-def guardar_df_a_github(repo_path: str, df: pd.DataFrame, msg: str):
+def guardar_df_a_github(repo_path: str, df: pd.DataFrame, msg: str, on_conflict=None):
     # ✅ CORREGIDO: sin recursión
-    csv_bytes = df.to_csv(index=False, encoding="utf-8-sig").encode("utf-8-sig")
-    gh_put_file(repo_path, csv_bytes, msg)
+    csv_bytes = _df_a_csv_bytes(df)
+    if on_conflict is None:
+        # Sin regla de fusión: gana la última escritura (p. ej. la configuración)
+        on_conflict = lambda remoto: csv_bytes
+    gh_put_file(repo_path, csv_bytes, msg, on_conflict)
+
+# ---- Registros particionados por mes (REGISTROS_DIR/AAAA-MM.csv + manifest.json) ----
+def _leer_texto(repo_path: str):
+    content, _ = gh_get_file(repo_path)
+    return content.decode("utf-8") if content else None
+
+def _escribir_texto(repo_path: str, texto: str, message: str, on_conflict) -> bool:
+    gh_put_file(
+        repo_path, texto.encode("utf-8"), message,
+        lambda remoto: on_conflict(remoto.decode("utf-8") if remoto else None).encode("utf-8"),
+    )
+    return True
+
+MANIFIESTO = Manifest(f"{REGISTROS_DIR}/manifest.json", _leer_texto, _escribir_texto)
+
+def ruta_mes(mes: str) -> str:
+    return f"{REGISTROS_DIR}/{mes}.csv"
+
+def cargar_registros(meses=None) -> pd.DataFrame:
+    """Registros de los meses pedidos (todos si ``meses`` es None).
+
+    Mientras el CSV único previo no se haya repartido, también se lee.
+    """
+    man = MANIFIESTO.read()
+    partes = [cargar_df_desde_github(ruta_mes(m)) for m in sorted(man["shards"]) if not meses or m in meses]
+    if not man.get("legacy_migrated"):
+        partes.append(cargar_df_desde_github(CSV_PATH))
+    partes = [p for p in partes if not p.empty]
+    return pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+
+def _registrar_meses(meses) -> bool:
+    """Agrega al manifiesto los meses nuevos; si ya estaban todos, no hay commit."""
+    def fn(man):
+        for m in meses:
+            man["shards"].setdefault(m, {"path": ruta_mes(m)})
+        return man
+    return MANIFIESTO.update(fn, f"manifest: {', '.join(sorted(meses))}")
+
+def _subir_mes(mes: str, nuevos: pd.DataFrame):
+    """Fusiona ``nuevos`` en el archivo de su mes con un solo commit."""
+    def fusionar(remoto: pd.DataFrame) -> pd.DataFrame:
+        # Ya aplicada = mismo ID y mismo caso (un reenvío del lote no duplica; un
+        # ID repetido por otro proceso con otro caso se agrega igual, no se pierde)
+        total = merge_appended(remoto, nuevos, ["ID", "Empleado", "Numero_caso"])
+        # Duplicado se guarda por mes; al cargar se recalcula sobre todo el histórico
+        total["Duplicado"] = total.duplicated(subset=["Empleado", "Numero_caso"], keep=False)
+        return total
+
+    actual = cargar_df_desde_github(ruta_mes(mes))
+    guardar_df_a_github(
+        ruta_mes(mes), fusionar(actual), f"Update registros productividad {mes} ({len(nuevos)} caso(s))",
+        on_conflict=lambda remoto: _df_a_csv_bytes(fusionar(_csv_bytes_a_df(remoto))),
+    )
+
+def subir_registros_pendientes(filas, batch_id=None) -> bool:
+    """Integra las filas del diario en GitHub: un commit por mes tocado (normalmente uno).
+
+    Las filas llegan con el ID que se les dio al guardar (``IDS``) y se suben
+    tal cual: lo que se sube es lo que el usuario vio y lo que indexó
+    ``INDICE``. Si otra sesión hace commit entre medio, se fusionan por ID
+    sobre la cabeza nueva y se reintenta (un reenvío del lote no duplica).
+    """
+    nuevos = pd.DataFrame(filas)
+    meses = month_key(nuevos)
+    _registrar_meses(set(meses))
+    for mes, grupo in nuevos.groupby(meses, sort=True):
+        _subir_mes(mes, grupo)
+    return True
+
+def repartir_csv_unico() -> int:
+    """Reparte el CSV único previo en archivos mensuales (una sola vez)."""
+    man = MANIFIESTO.read()
+    if man.get("legacy_migrated"):
+        return 0
+    previo = cargar_df_desde_github(CSV_PATH)
+    if not previo.empty:
+        meses = month_key(previo)
+        _registrar_meses(set(meses))
+        for mes, grupo in previo.groupby(meses, sort=True):
+            _subir_mes(mes, grupo)
+    MANIFIESTO.update(lambda m: {**m, "legacy_migrated": True}, "manifest: CSV único repartido")
+    return len(previo)
+
+COLA_REGISTROS = get_queue("registros_admin", subir_registros_pendientes, WB_MAX_ROWS, WB_MAX_SECONDS)
+REGISTROS = get_shared("registros_admin", SHARED_MAX_AGE)
+# (Empleado, Numero_caso) -> IDs, al día con la versión de REGISTROS
+INDICE = get_index("registros_admin")
+# IDs de casos nuevos: se asignan UNA vez, al guardar, para todas las sesiones del proceso
+IDS = get_sequence("registros_admin")
+
+def version_registros():
+    """Firma barata de los registros: shas del directorio mensual (+ CSV previo) y diario local."""
+    listado, _ = gh_get_file(REGISTROS_DIR)
+    firma = tuple(sorted((f["name"], f["sha"]) for f in listado or []))
+    if not MANIFIESTO.read().get("legacy_migrated"):
+        firma += (gh_get_file(CSV_PATH)[1],)
+    return firma + (file_version(COLA_REGISTROS.journal_path, COLA_REGISTROS.flushing_path),)
+
+# Arranque: lo que esta sesión leyó en su rerun anterior (la primera vez,
+# configuración, manifiesto, directorio mensual y CSV previo) se pide en
+# paralelo; el resto del rerun reutiliza esas respuestas.
+LECTURAS_BASE = [(_gh_url(p), None) for p in (SETTINGS_PATH, MANIFIESTO.path, REGISTROS_DIR, CSV_PATH)]
+st.session_state["lecturas_gh"] = begin_rerun(_gh_headers(), st.session_state.get("lecturas_gh") or LECTURAS_BASE)
 
 # =========================
 # ESTILOS GLOBALES
@@ -186,13 +337,17 @@ with col_title:
 # =========================
 # CONFIGURACIÓN (PERSISTENCIA EN GITHUB)
 # =========================
-def cargar_config():
-    """Lee la configuración desde GitHub (CSV) o crea una por defecto."""
+def cargar_historial_config():
+    """Todas las versiones de la configuración (una fila por ``vigente_desde``)."""
     try:
-        cfg = cargar_df_desde_github(SETTINGS_PATH)
-        row = cfg.iloc[0].to_dict() if not cfg.empty else {}
+        return cargar_df_desde_github(SETTINGS_PATH)
     except Exception:
-        row = {}
+        return pd.DataFrame()
+
+def cargar_config(historial):
+    """Configuración vigente hoy (la última versión) o una por defecto."""
+    actual = vigentes(historial, keys=(), since_col=CONFIG_VIGENCIA)
+    row = actual.iloc[0].to_dict() if actual is not None and not actual.empty else {}
 
     return {
         "meta_dia": int(row.get("meta_dia", 20)),
@@ -203,13 +358,29 @@ def cargar_config():
         "salario_base_mensual": float(row.get("salario_base_mensual", 1_500_000.0)),
     }
 
-def guardar_config(config: dict):
-    """Guarda la configuración actual en GitHub."""
-    df_cfg = pd.DataFrame([config])
+def agregar_version_config(historial, config: dict):
+    """``historial`` + ``config`` vigente desde hoy (reemplaza la versión de hoy si ya había).
+
+    Las versiones anteriores no se tocan: los meses pasados se siguen pagando
+    con la tarifa que tenían. La primera versión vale desde siempre.
+    """
+    if historial is None or historial.empty:
+        return pd.DataFrame([{**config, CONFIG_VIGENCIA: ""}])
+    hoy = date.today().strftime("%Y-%m-%d")
+    hist = historial
+    if CONFIG_VIGENCIA in hist.columns:
+        hist = hist[hist[CONFIG_VIGENCIA].astype(str) != hoy]
+    return pd.concat([hist, pd.DataFrame([{**config, CONFIG_VIGENCIA: hoy}])], ignore_index=True)
+
+def guardar_config(historial, config: dict):
+    """Guarda en GitHub la configuración como versión nueva; devuelve el historial."""
+    df_cfg = agregar_version_config(historial, config)
     guardar_df_a_github(SETTINGS_PATH, df_cfg, "Update config_productividad")
+    return df_cfg
 
 # Cargamos config
-config = cargar_config()
+config_historial = cargar_historial_config()
+config = cargar_config(config_historial)
 meta_dia = config["meta_dia"]
 meta_mes = config["meta_mes"]
 valor_prod = config["valor_prod"]
@@ -220,43 +391,50 @@ salario_base_mensual = config["salario_base_mensual"]
 # =========================
 # CARGA DE DATOS PERSISTENTES (DESDE GITHUB)
 # =========================
-try:
-    df = cargar_df_desde_github(CSV_PATH)
-    if not df.empty and "Fecha" in df.columns:
-        df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce").dt.date
-except Exception:
-    df = pd.DataFrame()
-
 COLUMNAS = [
     "ID", "Empleado", "Lider", "Numero_caso", "Fecha",
     "Tipo_caso", "Categoria", "Duplicado",
 ]
 
-if df.empty:
-    df = pd.DataFrame(columns=COLUMNAS)
-else:
-    for col in COLUMNAS:
-        if col not in df.columns:
-            if col == "ID":
-                df[col] = range(1, len(df) + 1)
-            elif col == "Duplicado":
-                df[col] = False
-            else:
-                df[col] = None
-    df = df[COLUMNAS]
+def construir_registros() -> pd.DataFrame:
+    """Histórico + casos que aún esperan en el diario write-behind, normalizado."""
+    df = cargar_registros()
+    pendientes = pd.DataFrame(COLA_REGISTROS.pending())
+    if not pendientes.empty:
+        df = pd.concat([df, pendientes], ignore_index=True)
+    return normalizar_registros(df)
+
+def normalizar_registros(df: pd.DataFrame) -> pd.DataFrame:
+    if df.empty:
+        df = pd.DataFrame(columns=COLUMNAS)
+    else:
+        for col in COLUMNAS:
+            if col not in df.columns:
+                if col == "ID":
+                    df[col] = range(1, len(df) + 1)
+                elif col == "Duplicado":
+                    df[col] = False
+                else:
+                    df[col] = None
+        df = df[COLUMNAS]
 
-if df["ID"].isnull().any():
-    df["ID"] = range(1, len(df) + 1)
-df["ID"] = df["ID"].astype(int)
+    if df["ID"].isnull().any():
+        df["ID"] = range(1, len(df) + 1)
+    df["ID"] = df["ID"].astype(int)
 
-# Recalcular duplicados
-if "Numero_caso" in df.columns and "Empleado" in df.columns:
-    df["Duplicado"] = df.duplicated(subset=["Empleado", "Numero_caso"], keep=False)
-else:
-    df["Duplicado"] = False
+    # Recalcular duplicados
+    if "Numero_caso" in df.columns and "Empleado" in df.columns:
+        df["Duplicado"] = df.duplicated(subset=["Empleado", "Numero_caso"], keep=False)
+    else:
+        df["Duplicado"] = False
+    # Tipos compactos: categóricas, Fecha como datetime (día), Numero_caso como texto
+    return aplicar_esquema(df, REGISTROS_ADMIN)
 
-st.session_state["registros"] = df
-df = st.session_state["registros"]
+# Una sola copia por proceso; cada sesión recibe una vista copy-on-write
+try:
+    df = REGISTROS.get(version_registros, construir_registros)
+except Exception:
+    df = normalizar_registros(pd.DataFrame())
 
 # =========================
 # CONSTANTES
@@ -276,6 +454,9 @@ CATEGORIAS = ["Finalizado", "Tutela", "Defensoría"]
 # =========================
 st.sidebar.header("Configuración")
 perfil = st.sidebar.selectbox("Perfil", ["Empleado", "Administrador", "Líder"])
+# Subida a GitHub fallando: los casos siguen en el diario local y se reintenta con backoff
+if COLA_REGISTROS.aviso():
+    st.sidebar.warning(COLA_REGISTROS.aviso())
 
 salario_base_mensual = st.sidebar.number_input(
     "Salario base mensual ($)",
@@ -310,35 +491,53 @@ if perfil == "Líder":
                 "valor_sabado": float(valor_sabado),
                 "salario_base_mensual": float(salario_base_mensual),
             }
-            guardar_config(config_guardar)
-            st.sidebar.success("Configuración guardada.")
+            config_historial = guardar_config(config_historial, config_guardar)
+            config = config_guardar
+            st.sidebar.success("Configuración guardada (rige desde hoy).")
+
+        st.sidebar.markdown("---")
+        if st.sidebar.button("Repartir registros por mes"):
+            n = repartir_csv_unico()
+            REGISTROS.invalidate()
+            st.sidebar.success(f"{n} registro(s) repartidos en {REGISTROS_DIR}/.")
 
 st.markdown("---")
 
 # =========================
 # FUNCIONES AUXILIARES
 # =========================
+# Tarifa por tipo de caso (cualquier otro tipo se paga como "Meta sábado"),
+# vigente en la fecha de cada caso según el historial de configuración
+tarifas_editadas = {"valor_prod": float(valor_prod), "valor_adic": float(valor_adic), "valor_sabado": float(valor_sabado)}
+historial_tarifas = config_historial
+if any(float(config[k]) != v for k, v in tarifas_editadas.items()):
+    # Vista previa de lo editado sin guardar: regiría desde hoy
+    historial_tarifas = agregar_version_config(config_historial, {**config, **tarifas_editadas})
+TARIFAS_CASO = TariffHistory.from_config(
+    historial_tarifas if not historial_tarifas.empty else tarifas_editadas,
+    {"Productividad": "valor_prod", "Adicional": "valor_adic"},
+    default_campo="valor_sabado",
+    since_col=CONFIG_VIGENCIA,
+)
+
 def valor_fila(fila):
-    if fila["Tipo_caso"] == "Productividad":
-        return valor_prod
-    elif fila["Tipo_caso"] == "Adicional":
-        return valor_adic
-    else:
-        return valor_sabado
+    return TARIFAS_CASO.rate(fila["Tipo_caso"], fila.get("Fecha"))
+
+def lote_casos(texto: str, archivo=None) -> pd.DataFrame:
+    """Casos del texto pegado y del archivo subido (con Fecha/Tipo_caso/Categoria si el archivo las trae)."""
+    partes = [pd.DataFrame({"Numero_caso": parse_casos(texto)})]
+    if archivo is not None:
+        partes.append(leer_casos(archivo))
+    return pd.concat(partes, ignore_index=True)
+
+def indice_duplicados(df_actual):
+    """Índice de duplicados de la versión actual (se reconstruye solo si falta o cambió)."""
+    return INDICE.ensure(REGISTROS.version, lambda: df_actual)
 
 def calcular_racha_meta(df_emp_mes, meta_diaria):
-    if df_emp_mes.empty:
-        return False
-    fechas = pd.to_datetime(df_emp_mes["Fecha"]).dt.date
-    primer_dia = fechas.min()
-    ultimo_dia = fechas.max()
-    rango = pd.date_range(primer_dia, ultimo_dia, freq="D").date
-    df_por_dia = df_emp_mes.groupby(pd.to_datetime(df_emp_mes["Fecha"]).dt.date)["ID"].count()
-    for d in rango:
-        casos_dia = df_por_dia.get(d, 0)
-        if casos_dia < meta_diaria:
-            return False
-    return True
+    """True si se cumplió la meta diaria todos los días del rango (motor vectorizado)."""
+    res = cumplimiento(df_emp_mes, meta_diaria, meta_mes)
+    return bool(not res.empty and res["Racha_completa"].all())
 
 # =========================
 # PERFIL EMPLEADO
@@ -378,47 +577,118 @@ if perfil == "Empleado":
             "Ingrese los números de caso (uno por línea o separados por comas)",
             height=150,
         )
+        archivo_casos = st.file_uploader(
+            "Carga masiva: archivo " + "/".join(t.upper() for t in tipos_archivo())
+            + " con una columna Numero_caso (opcionales: Fecha, Tipo_caso, Categoria)",
+            type=tipos_archivo(),
+            key="archivo_casos",
+        )
+
+        # Lote leído una vez por rerun (texto + archivo), en pandas
+        try:
+            lote = lote_casos(lista_texto, archivo_casos)
+        except (ValueError, UnicodeDecodeError) as exc:
+            st.error(f"No se pudo leer el archivo: {exc}")
+            lote = lote_casos(lista_texto)
+        casos_previos = lote["Numero_caso"].tolist()
+
+        # Aviso ANTES de guardar: casos que este empleado ya registró (o repetidos en la lista)
+        if nombre_empleado.strip() and casos_previos:
+            ya_registrados = indice_duplicados(df).lookup(nombre_empleado, casos_previos)
+            repetidos_lista = sorted(lote["Numero_caso"][lote["Numero_caso"].duplicated()].unique())
+            if archivo_casos is not None:
+                st.info(
+                    f"Lote: {len(lote):,} caso(s). Se omitirán {len(ya_registrados):,} ya registrado(s) "
+                    f"y {int(lote['Numero_caso'].duplicated().sum()):,} repetido(s) en el lote."
+                )
+            else:
+                if ya_registrados:
+                    detalle = ", ".join(f"{c} (ID {', '.join(map(str, ids))})" for c, ids in ya_registrados.items())
+                    st.warning(f"Estos casos ya estaban registrados para {nombre_empleado}: {detalle}")
+                if repetidos_lista:
+                    st.warning(f"Casos repetidos en la lista: {', '.join(repetidos_lista)}")
 
         if st.button("Guardar casos rápidos", type="primary"):
             if nombre_empleado.strip() == "":
                 st.warning("Por favor ingrese el nombre del empleado.")
-            elif lista_texto.strip() == "":
-                st.warning("Por favor ingrese al menos un número de caso.")
+            elif lista_texto.strip() == "" and archivo_casos is None:
+                st.warning("Por favor ingrese al menos un número de caso o cargue un archivo.")
+            elif lote.empty:
+                st.warning("No se encontraron números de caso válidos.")
             else:
-                raw_items = []
-                for linea in lista_texto.splitlines():
-                    partes = [p.strip() for p in linea.replace(";", ",").split(",")]
-                    raw_items.extend(p for p in partes if p)
-
-                numeros_caso = [x for x in raw_items if x != ""]
-
-                if not numeros_caso:
-                    st.warning("No se encontraron números de caso válidos.")
+                # Columnas del archivo si vienen; si no (o no son válidas), las del formulario
+                fechas = lote["Fecha"] if "Fecha" in lote.columns else pd.Series(pd.NaT, index=lote.index)
+                tipos = lote["Tipo_caso"] if "Tipo_caso" in lote.columns else pd.Series(pd.NA, index=lote.index)
+                cats = lote["Categoria"] if "Categoria" in lote.columns else pd.Series(pd.NA, index=lote.index)
+                df_nuevo = pd.DataFrame(
+                    {
+                        "Numero_caso": lote["Numero_caso"],
+                        "Fecha": fechas.fillna(pd.Timestamp(fecha_casos)).dt.date,
+                        "Tipo_caso": tipos.where(tipos.isin(TIPOS_CASO), tipo_caso_rapido),
+                        "Categoria": cats.where(cats.isin(CATEGORIAS), categoria_rapida),
+                    }
+                )
+                df_nuevo["Empleado"] = nombre_empleado
+                df_nuevo["Lider"] = lider
+
+                # Duplicados del lote en O(k) con el índice (no sobre todo el histórico)
+                indice = indice_duplicados(df)
+                ya_registrados = indice.lookup(nombre_empleado, df_nuevo["Numero_caso"].tolist())
+                omitidos = 0
+                if archivo_casos is not None:
+                    # Carga masiva: se omiten los ya registrados y los repetidos del lote
+                    omitir = df_nuevo["Numero_caso"].isin(list(ya_registrados)) | df_nuevo["Numero_caso"].duplicated()
+                    omitidos = int(omitir.sum())
+                    df_nuevo = df_nuevo[~omitir].reset_index(drop=True)
+                    ya_registrados = {}
+
+                if df_nuevo.empty:
+                    st.warning(f"No hay casos nuevos: los {omitidos:,} del lote ya estaban registrados o repetidos.")
                 else:
-                    df_nuevo = pd.DataFrame(
-                        {
-                            "Numero_caso": numeros_caso,
-                            "Fecha": [fecha_casos] * len(numeros_caso),
-                            "Tipo_caso": [tipo_caso_rapido] * len(numeros_caso),
-                            "Categoria": [categoria_rapida] * len(numeros_caso),
-                        }
+                    # df incluye el histórico y el diario: ningún ID guardado se repite
+                    df_nuevo["ID"] = IDS.reserve(len(df_nuevo), 0 if df.empty else df["ID"].max())
+                    df_nuevo["Duplicado"] = (
+                        df_nuevo["Numero_caso"].isin(list(ya_registrados))
+                        | df_nuevo["Numero_caso"].duplicated(keep=False)
                     )
-                    df_nuevo["Empleado"] = nombre_empleado
-                    df_nuevo["Lider"] = lider
-
-                    next_id = 1 if df.empty else int(df["ID"].max()) + 1
-                    df_nuevo["ID"] = range(next_id, next_id + len(df_nuevo))
-                    df_nuevo["Duplicado"] = False
+                    ids_previos = [i for ids in ya_registrados.values() for i in ids]
 
                     df_nuevo = df_nuevo[
                         ["ID","Empleado","Lider","Numero_caso","Fecha","Tipo_caso","Categoria","Duplicado"]
                     ]
 
-                    st.session_state["registros"] = pd.concat([st.session_state["registros"], df_nuevo], ignore_index=True)
-                    df = st.session_state["registros"]
+                    def agregar_nuevos(d):
+                        d = anexar(d, df_nuevo, REGISTROS_ADMIN)
+                        if ids_previos:
+                            d.loc[d["ID"].isin(ids_previos), "Duplicado"] = True
+                        return d
+
+                    # Todo el lote en una sola escritura: durable en el diario local y
+                    # un solo commit agrupado a GitHub
+                    COLA_REGISTROS.append(df_nuevo.to_dict("records"))
+                    version_antes = REGISTROS.version
+                    REGISTROS.update(agregar_nuevos, version_registros)
+                    indice.add(df_nuevo, version_antes, REGISTROS.version)
+                    df = agregar_nuevos(df)
 
-                    df["Duplicado"] = df.duplicated(subset=["Empleado", "Numero_caso"], keep=False)
+                    detalle = f" ({omitidos:,} omitido(s) por ya registrados o repetidos)" if omitidos else ""
+                    st.success(f"Se guardaron {len(df_nuevo):,} caso(s) correctamente en modo rápido{detalle}.")
 
-                    guardar_df_a_github(CSV_PATH, df, "Update registros productividad")
+# =========================
+# PERFIL LÍDER
+# =========================
+if perfil == "Líder":
+    st.subheader("Cumplimiento de metas por analista")
+    st.caption(f"Meta diaria: {int(meta_dia)} casos · Meta mensual: {int(meta_mes)} casos")
+    # Todos los analistas y meses en una sola pasada
+    tabla_metas = cumplimiento(df, meta_dia, meta_mes)
+    if tabla_metas.empty:
+        st.info("Aún no hay registros.")
+    else:
+        st.dataframe(tabla_metas.sort_values(["Mes", "Empleado"]), use_container_width=True)
 
-                    st.success(f"Se guardaron {len(numeros_caso)} caso(s) correctamente en modo rápido.")
+        st.subheader("Valor de casos por analista")
+        pagos = TARIFAS_CASO.totals(df.assign(Mes=month_key(df)), "Tipo_caso", "Fecha", ["Empleado", "Mes"], name="Valor_casos")
+        st.dataframe(pagos.sort_values(["Mes", "Empleado"]), use_container_width=True)
+        if TARIFAS_CASO.cerrado_hasta():
+            st.caption(f"Cada caso se paga con la tarifa vigente en su fecha; los meses anteriores a {TARIFAS_CASO.cerrado_hasta()} ya no cambian.")
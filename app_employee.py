@@ -4,6 +4,9 @@ import pandas as pd
 import streamlit as st
 from datetime import date
 
+from productividad.fechas import month_str
+from productividad.storage import append_csv
+
 BBVA_PRIMARY = "#072146"
 BBVA_SECONDARY = "#00A1E0"
 LOGO_URL = os.getenv("BBVA_LOGO_URL", "")
@@ -25,25 +28,6 @@ def ensure_csv(path, columns):
     if not os.path.exists(path):
         pd.DataFrame(columns=columns).to_csv(path, index=False, encoding="utf-8-sig")
 
-def load_csv(path):
-    if os.path.exists(path):
-        try:
-            return pd.read_csv(path, encoding="utf-8-sig")
-        except Exception:
-            return pd.read_csv(path)
-    return pd.DataFrame()
-
-def save_csv(df, path):
-    df.to_csv(path, index=False, encoding="utf-8-sig")
-
-def month_str(d):
-    try:
-        if isinstance(d, str):
-            d = pd.to_datetime(d).date()
-        return f"{d.year:04d}-{d.month:02d}"
-    except Exception:
-        return ""
-
 ensure_csv(DATA_PATH, ["Fecha","Empleado","Área","Lider","Tipo","Numero_Caso","Estado","Horas_Extra","Mes","Año"])
 
 st.markdown('<div class="bbva-header">', unsafe_allow_html=True)
@@ -137,7 +121,5 @@ with st.form("form_registro", clear_on_submit=True):
             if not rows:
                 st.warning("No agregaste casos ni horas extra.")
             else:
-                cur = pd.read_csv(DATA_PATH, encoding="utf-8-sig")
-                cur = pd.concat([cur, pd.DataFrame(rows)], ignore_index=True)
-                cur.to_csv(DATA_PATH, index=False, encoding="utf-8-sig")
+                append_csv(pd.DataFrame(rows), DATA_PATH)
                 st.success(f"Se guardaron {len(rows)} registro(s). ¡Gracias!")
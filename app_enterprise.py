@@ -2,9 +2,17 @@
 import os
 import pandas as pd
 import streamlit as st
-import matplotlib.pyplot as plt
 from datetime import date
 
+from productividad.casos import SEPARADORES_ESPACIO, parse_casos
+from productividad.cierre import get_snapshots
+from productividad.exportar import boton_descarga
+from productividad.fechas import fill_mes_anio, month_str
+from productividad.graficos import get_charts, huella, lineas
+from productividad.resumenes import resumen_empresarial, total_mensual
+from productividad.storage import append_csv, data_version, load_csv, save_csv
+from productividad.tarifas import VIGENCIA_COL, TariffHistory, nueva_version, vigentes
+
 st.set_page_config(page_title="BBVA | Dashboard empresarial", page_icon="🏢", layout="wide")
 
 # ---------------- Paths & constants ----------------
@@ -24,25 +32,6 @@ def ensure_csv(path, columns, default_rows=None):
         else:
             pd.DataFrame(columns=columns).to_csv(path, index=False, encoding="utf-8-sig")
 
-def load_csv(path):
-    if os.path.exists(path):
-        try:
-            return pd.read_csv(path, encoding="utf-8-sig")
-        except Exception:
-            return pd.read_csv(path)
-    return pd.DataFrame()
-
-def save_csv(df, path):
-    df.to_csv(path, index=False, encoding="utf-8-sig")
-
-def month_str(d):
-    try:
-        if isinstance(d, str):
-            d = pd.to_datetime(d).date()
-        return f"{d.year:04d}-{d.month:02d}"
-    except Exception:
-        return ""
-
 def format_cop(v):
     try:
         n = float(v)
@@ -52,20 +41,8 @@ def format_cop(v):
     return "$ " + s.replace(",", ".") + " COP"
 
 def parse_case_numbers(text):
-    if not text:
-        return []
-    # Accept separators: comma, semicolon, newline, space
-    for sep in [",", ";", "\n", "\r", "\t"]:
-        text = text.replace(sep, " ")
-    parts = [p.strip() for p in text.split(" ") if p.strip()]
-    # Remove duplicates while preserving order
-    seen = set()
-    uniq = []
-    for p in parts:
-        if p not in seen:
-            uniq.append(p)
-            seen.add(p)
-    return uniq
+    # Separators: comma, semicolon, newline, space; duplicates dropped keeping order
+    return parse_casos(text, SEPARADORES_ESPACIO, unicos=True).tolist()
 
 # ---------------- Initialize storage ----------------
 ensure_csv(
@@ -83,15 +60,19 @@ ensure_csv(
     ]
 )
 
-df_all = load_csv(DATA_PATH)
-tarifas = load_csv(TARIFAS_PATH)
+tarifas = load_csv(TARIFAS_PATH)  # historial: una fila por versión (Vigente_desde)
 
-# backfill Mes/Año
-if not df_all.empty:
-    if "Mes" not in df_all.columns: df_all["Mes"] = ""
-    if "Año" not in df_all.columns: df_all["Año"] = ""
-    df_all["Mes"] = df_all.apply(lambda r: month_str(r.get("Fecha","")), axis=1)
-    df_all["Año"] = pd.to_datetime(df_all["Fecha"], errors="coerce").dt.year
+def load_registros():
+    # backfill Mes/Año (solo filas a las que les falta)
+    return fill_mes_anio(load_csv(DATA_PATH))
+
+# Resumen mensual materializado: cada envío suma solo sus filas (Líder queda para filtrar).
+# El dinero se valoriza por fila con la tarifa vigente en su Fecha.
+RESUMEN = resumen_empresarial(load_registros, lambda: data_version(DATA_PATH), TariffHistory.from_frame(tarifas))
+# Meses cerrados (python -m productividad.cierre): se leen de su foto
+CIERRES = get_snapshots("empresarial")
+# Gráficas dibujadas una vez a PNG y cacheadas por proceso (LRU)
+GRAFICAS = get_charts()
 
 # ---------------- Admin access ----------------
 st.sidebar.header("🔐 Admin")
@@ -111,12 +92,17 @@ else:
 
 if st.session_state.is_admin:
     with st.sidebar.expander("💵 Tarifas", expanded=True):
-        st.caption("Define los valores por caso adicional y hora extra.")
-        tarifas_edit = st.data_editor(tarifas, use_container_width=True, num_rows="dynamic", key="tarifas_editor")
+        st.caption("Define los valores por caso adicional y hora extra (rigen desde hoy; los meses anteriores conservan sus tarifas).")
+        tarifas_edit = st.data_editor(vigentes(tarifas), use_container_width=True, num_rows="dynamic",
+                                      disabled=[VIGENCIA_COL], key="tarifas_editor")
         if st.button("💾 Guardar tarifas", use_container_width=True):
-            save_csv(tarifas_edit, TARIFAS_PATH)
-            tarifas = tarifas_edit
+            tarifas = nueva_version(tarifas, tarifas_edit)
+            save_csv(tarifas, TARIFAS_PATH)
+            RESUMEN.pricing = TariffHistory.from_frame(tarifas)
             st.success("Tarifas guardadas")
+        if st.button("🔄 Recalcular resumen mensual", use_container_width=True):
+            RESUMEN.rebuild()
+            st.success("Resumen recalculado")
 
 # ---------------- Header ----------------
 st.title("🏢 Dashboard empresarial — Registro de casos y cálculo mensual")
@@ -180,8 +166,7 @@ with tab_reg:
                             "Año": fecha.year
                         })
 
-                    df_local = load_csv(DATA_PATH)
-                    df_local = pd.concat([df_local, pd.DataFrame(new_rows)], ignore_index=True)
+                    df_local = pd.DataFrame(new_rows)
                     # Guardar una fila adicional para reflejar los Casos_Adicionales (variables) del día
                     if casos_adicionales > 0:
                         df_local = pd.concat([df_local, pd.DataFrame([{
@@ -197,50 +182,29 @@ with tab_reg:
                             "Año": fecha.year
                         }])], ignore_index=True)
 
-                    save_csv(df_local, DATA_PATH)
+                    RESUMEN.append(df_local, lambda rows: append_csv(rows, DATA_PATH))
                     st.success(f"Guardado: {len(new_rows)} caso(s) + variables/horas correspondientes.")
 
 # ---------------- Tab Resumen mensual ----------------
 with tab_mes:
     st.subheader("Totales por Empleado x Mes")
-    data = load_csv(DATA_PATH)
-    if data.empty:
+    if RESUMEN.get().empty:
         st.info("Aún no hay registros.")
     else:
         # filters
         c1, c2, c3 = st.columns(3)
         with c1:
-            f_mes = st.multiselect("Mes", sorted(data["Mes"].dropna().unique().tolist()))
+            f_mes = st.multiselect("Mes", RESUMEN.distinct("Mes"))
         with c2:
-            f_emp = st.multiselect("Empleado", sorted(data["Empleado"].dropna().unique().tolist()))
+            f_emp = st.multiselect("Empleado", RESUMEN.distinct("Empleado"))
         with c3:
-            f_lid = st.multiselect("Líder", sorted(data["Lider"].dropna().unique().tolist()))
-        if f_mes: data = data[data["Mes"].isin(f_mes)]
-        if f_emp: data = data[data["Empleado"].isin(f_emp)]
-        if f_lid: data = data[data["Lider"].isin(f_lid)]
-
-        # aggregate
-        # Total de casos = conteo de filas con Numero_Caso no vacío
-        data["Tiene_Caso"] = data["Numero_Caso"].astype(str).str.strip().ne("")
-        agg = data.groupby(["Empleado","Mes"], as_index=False).agg({
-            "Tiene_Caso":"sum",
-            "Casos_Adicionales":"sum",
-            "Horas_Extra":"sum"
-        }).rename(columns={"Tiene_Caso":"Total_Casos"})
+            f_lid = st.multiselect("Líder", RESUMEN.distinct("Lider"))
 
-        # rates
-        try:
-            tarifa_caso = float(tarifas.loc[tarifas["Concepto"]=="Caso_Adicional","Tarifa"].iloc[0])
-        except Exception:
-            tarifa_caso = 0.0
-        try:
-            tarifa_hora = float(tarifas.loc[tarifas["Concepto"]=="Hora_Extra","Tarifa"].iloc[0])
-        except Exception:
-            tarifa_hora = 0.0
+        # aggregate (desde el resumen materializado, sin leer las filas)
+        agg = RESUMEN.view({"Mes": f_mes, "Empleado": f_emp, "Lider": f_lid}, frame=CIERRES.combinar(RESUMEN.get()))
 
-        agg["Ingreso_Variable"] = agg["Casos_Adicionales"] * tarifa_caso
-        agg["Ingreso_Extras"] = agg["Horas_Extra"] * tarifa_hora
-        agg["Total_Mensual"] = agg["Ingreso_Variable"] + agg["Ingreso_Extras"]
+        # el dinero ya viene valorizado con la tarifa vigente en cada fecha
+        agg = total_mensual(agg)
 
         # cumplimiento meta = 12 casos por mes
         agg["Meta"] = META_CASOS
@@ -253,24 +217,18 @@ with tab_mes:
 
         view = view[["Empleado","Mes","Total_Casos","Casos_Adicionales","Horas_Extra","Ingreso_Variable","Ingreso_Extras","Total_Mensual","Meta","Cumplimiento"]]
         st.dataframe(view.sort_values(["Mes","Empleado"]), use_container_width=True)
+        if CIERRES.meses():
+            st.caption("Meses cerrados: " + ", ".join(CIERRES.meses()))
 
         # chart
-        tot_mes = agg.groupby("Mes", as_index=False)["Total_Mensual"].sum().sort_values("Mes")
+        tot_mes = agg.groupby("Mes", as_index=False, observed=True)["Total_Mensual"].sum().sort_values("Mes")
         if not tot_mes.empty:
-            fig = plt.figure()
-            plt.plot(tot_mes["Mes"], tot_mes["Total_Mensual"])
-            plt.title("Total mensual (Variables + Extras)")
-            plt.xlabel("Mes")
-            plt.ylabel("Valor (COP)")
-            plt.xticks(rotation=45, ha="right")
-            st.pyplot(fig)
+            # Un PNG por contenido de la serie (cambia con datos, tarifas o cierres)
+            serie = tot_mes.set_index(tot_mes["Mes"].astype(str))["Total_Mensual"]
+            st.image(GRAFICAS.png(("empresarial.total_mensual", huella(serie)), lambda ax: lineas(
+                ax, serie, "Total mensual (Variables + Extras)", "Mes", "Valor (COP)")))
 
         # download
-        st.download_button(
-            "⬇️ Descargar resumen mensual (CSV)",
-            data=agg.to_csv(index=False).encode("utf-8-sig"),
-            file_name="resumen_mensual_empresarial.csv",
-            mime="text/csv"
-        )
+        boton_descarga("⬇️ Descargar resumen mensual", agg, "resumen_mensual_empresarial", key="dl_resumen")
 
 st.caption("Empleados: registran nombre, líder, múltiples números de caso, estado y horas extra. Admin: fija tarifas. Cumplimiento de meta=12 casos/mes.")
@@ -1,13 +1,28 @@
 import os
 import base64
 import json
-from io import StringIO
 from datetime import date
 
 import pandas as pd
-import requests
 import streamlit as st
-import matplotlib.pyplot as plt
+
+from productividad import gh_client
+from productividad.buzones import MailboxLedger, local_put_text, local_text
+from productividad.cierre import get_snapshots
+from productividad.esquemas import REGISTRO_PORTAL, aplicar_esquema
+from productividad.exportar import boton_descarga
+from productividad.gh_cache import begin_rerun, forget, get_contents, known_sha, remember
+from productividad.fechas import fill_mes_anio, month_str
+from productividad.gh_sync import put_with_retry
+from productividad.graficos import get_charts, huella, lineas
+from productividad.ledger import GitHubLedger, LocalLedger, distinct_values, filter_frame
+from productividad.resumenes import PORTAL_COLS, VALORIZADO_PORTAL, marcar_variables, resumen_portal, total_mensual
+from productividad.shards import Manifest, ShardedLedger
+from productividad.shared_data import get_shared
+from productividad.sqlite_store import SQLiteLedger, SQLiteStore
+from productividad.tablas import mostrar_tabla
+from productividad.tarifas import VIGENCIA_COL, TariffHistory
+from productividad.write_behind import get_queue
 
 # ===========================
 # Configuración / Branding
@@ -62,25 +77,31 @@ USE_GH = ("GITHUB_TOKEN" in st.secrets) and ("GH_REPO" in st.secrets)
 GH_TOKEN = st.secrets.get("GITHUB_TOKEN", "")
 GH_REPO = st.secrets.get("GH_REPO", "")
 GH_BRANCH = st.secrets.get("GH_BRANCH", "main")
-GH_PATH_REG = st.secrets.get("GH_PATH_REG", "registro_portal.csv")
-GH_PATH_MSG = st.secrets.get("GH_PATH_MSG", "mensajes_portal.csv")  # NUEVO
-API_BASE = f"https://api.github.com/repos/{GH_REPO}/contents"
+GH_PATH_REG = st.secrets.get("GH_PATH_REG", "registro_portal.csv")  # archivo único previo
+GH_DIR_REG = st.secrets.get("GH_DIR_REG", "registros")              # un CSV por Mes + manifest.json
+GH_PATH_MSG = st.secrets.get("GH_PATH_MSG", "mensajes_portal.csv")  # archivo único previo
+GH_DIR_MSG = st.secrets.get("GH_DIR_MSG", "mensajes")               # un buzón por Empleado + manifest.json
+GH_API_URL = st.secrets.get("GITHUB_API_URL", os.getenv("GITHUB_API_URL", "https://api.github.com"))  # Enterprise / pruebas locales
+API_BASE = f"{GH_API_URL.rstrip('/')}/repos/{GH_REPO}/contents"
 HEADERS = {"Authorization": f"Bearer {GH_TOKEN}", "Accept": "application/vnd.github+json"}
 
 LOCAL_CSV = "registro_portal_local.csv"         # respaldo local si no hay GitHub
-LOCAL_MSG = "mensajes_portal_local.csv"         # respaldo local
+LOCAL_MSG = "mensajes_portal_local.csv"         # respaldo local (archivo único previo)
+LOCAL_DIR_MSG = "mensajes_portal_local"         # un buzón por Empleado + manifest.json
+TARIFAS_PATH = "tarifas_portal.csv"
+
+# Sin GitHub: "csv" (archivos locales) o "sqlite" (tablas indexadas por Empleado/Mes)
+STORAGE_BACKEND = st.secrets.get("STORAGE_BACKEND", os.getenv("STORAGE_BACKEND", "csv")).lower()
+SQLITE_PATH = st.secrets.get("SQLITE_PATH", os.getenv("SQLITE_PATH", "productividad.db"))
+USE_SQLITE = (not USE_GH) and STORAGE_BACKEND == "sqlite"
+
+# Write-behind (solo GitHub): un commit cada N filas o T segundos
+WB_MAX_ROWS = int(st.secrets.get("WB_MAX_ROWS", 50))
+WB_MAX_SECONDS = float(st.secrets.get("WB_MAX_SECONDS", 20))
 
 # ===========================
 # Utilidades
 # ===========================
-def month_str(d):
-    try:
-        if isinstance(d, str):
-            d = pd.to_datetime(d).date()
-        return f"{d.year:04d}-{d.month:02d}"
-    except Exception:
-        return ""
-
 def format_cop(v):
     try:
         n = float(v)
@@ -89,89 +110,273 @@ def format_cop(v):
     return "$ " + f"{n:,.0f}".replace(",", ".") + " COP"
 
 def gh_get_file(path, ref):
+    """Lee un archivo del repo (GET condicional: un 304 reutiliza la caché)."""
     url = f"{API_BASE}/{path}"
-    r = requests.get(url, headers=HEADERS, params={"ref": ref})
-    if r.status_code == 200:
-        info = r.json()
-        content = base64.b64decode(info["content"]).decode("utf-8")
-        return content, info["sha"]
-    elif r.status_code == 404:
+    status, payload, sha, r = get_contents(url, HEADERS, {"ref": ref})
+    if status == 200:
+        return payload.decode("utf-8"), sha
+    elif status == 404:
         return None, None
     else:
         st.error(f"Error leyendo GitHub: {r.status_code} - {r.text}")
         return None, None
 
-def gh_put_file(path, content_str, message, branch, sha=None):
+def gh_put_file(path, content_str, message, branch, sha=None, on_conflict=None):
+    """PUT con el sha de la última lectura (sin GET previo).
+
+    Si otra sesión hizo commit antes (409/422), ``on_conflict(contenido_remoto)``
+    reconstruye el contenido sobre la cabeza nueva y se reintenta con backoff.
+    """
     url = f"{API_BASE}/{path}"
-    payload = {
-        "message": message,
-        "content": base64.b64encode(content_str.encode("utf-8")).decode("utf-8"),
-        "branch": branch
-    }
-    if sha:
-        payload["sha"] = sha
-    r = requests.put(url, headers=HEADERS, data=json.dumps(payload))
-    return r.status_code in (200, 201)
+    if sha is None:
+        sha = known_sha(url, {"ref": branch})
+
+    def put(content, sha):
+        payload = {
+            "message": message,
+            "content": base64.b64encode(content.encode("utf-8")).decode("utf-8"),
+            "branch": branch
+        }
+        if sha:
+            payload["sha"] = sha
+        r = gh_client.put(url, headers=HEADERS, data=json.dumps(payload))
+        if r.status_code in (200, 201):
+            remember(url, {"ref": branch}, r.json()["content"]["sha"], content.encode("utf-8"))
+        else:
+            # La copia guardada quedó vieja: el reintento relee de la red aunque quede poco cupo
+            forget(url, {"ref": branch})
+        return r.status_code
+
+    status = put_with_retry(put, lambda: gh_get_file(path, branch), on_conflict, content_str, sha)
+    return status in (200, 201)
+
+def gh_list_dir(path, ref):
+    """Lista un directorio del repo ([] si no existe)."""
+    url = f"{API_BASE}/{path}"
+    status, payload, _, r = get_contents(url, HEADERS, {"ref": ref})
+    if status == 200 and isinstance(payload, list):
+        return payload
+    if status != 404:
+        st.error(f"Error listando GitHub: {r.status_code} - {r.text}")
+    return []
+
+def gh_delete_file(path, sha, message, branch):
+    url = f"{API_BASE}/{path}"
+    payload = {"message": message, "sha": sha, "branch": branch}
+    r = gh_client.delete(url, headers=HEADERS, data=json.dumps(payload))
+    forget(url, {"ref": branch})
+    return r.status_code == 200
 
 # ---- Registros (casos/horas) ----
-def load_data():
-    """Carga el CSV de registros (GitHub si está configurado; si no, local)."""
-    if USE_GH:
-        content, _ = gh_get_file(GH_PATH_REG, GH_BRANCH)
-        if content is None:
-            return pd.DataFrame(columns=["Fecha","Empleado","Área","Lider","Tipo","Numero_Caso","Estado","Horas_Extra","Mes","Año"])
-        return pd.read_csv(StringIO(content))
+REG_COLS = PORTAL_COLS
+
+MSG_COLS = ["Fecha","Empleado","Mes","Admin","Mensaje"]
+
+def _gh_ledger(path):
+    return GitHubLedger(path, REG_COLS, gh_get_file, gh_put_file, gh_list_dir, gh_delete_file, GH_BRANCH)
+
+def _gh_text(path):
+    return gh_get_file(path, GH_BRANCH)[0]
+
+def _gh_put_text(path, text, message, on_conflict):
+    return gh_put_file(path, text, message, GH_BRANCH, on_conflict=on_conflict)
+
+# Libro append-only: cada envío escribe solo sus filas; la base se reescribe al compactar.
+# En GitHub, además, un archivo por mes: leer un mes no trae el histórico completo.
+if USE_GH:
+    REG_LEDGER = ShardedLedger(
+        GH_DIR_REG, REG_COLS, _gh_ledger,
+        Manifest(f"{GH_DIR_REG}/manifest.json", _gh_text, _gh_put_text),
+        legacy=_gh_ledger(GH_PATH_REG),
+    )
+    # Los envíos van a un diario local y se suben agrupados en un solo segmento/commit
+    REG_QUEUE = get_queue("registros_portal", REG_LEDGER.append, WB_MAX_ROWS, WB_MAX_SECONDS)
+elif USE_SQLITE:
+    DB = SQLiteStore(SQLITE_PATH)
+    REG_LEDGER = SQLiteLedger(DB, "registros", REG_COLS, seed_csv=LOCAL_CSV)
+    MSG_TABLE = SQLiteLedger(DB, "mensajes", MSG_COLS, seed_csv=LOCAL_MSG)
+    TAR_TABLE = SQLiteLedger(DB, "tarifas", ["Concepto","Tarifa",VIGENCIA_COL], seed_csv=TARIFAS_PATH)
+else:
+    REG_LEDGER = LocalLedger(LOCAL_CSV, REG_COLS)
+
+REG_DATA = get_shared("registros_portal")
+
+def _reg_filters(mes=None, empleado=None, lider=None):
+    return {"Mes": mes, "Empleado": empleado, "Lider": lider}
+
+# ---- Tarifas ----
+def load_tarifas():
+    """Tarifas locales (editables fuera de la app). Un cambio se agrega como
+    fila nueva con ``Vigente_desde``; las filas sin fecha valen desde siempre."""
+    if USE_SQLITE:
+        tar = TAR_TABLE.load()
+        if tar.empty:
+            tar = pd.DataFrame([
+                {"Concepto":"Caso_Adicional","Tarifa":10000.0},
+                {"Concepto":"Hora_Extra","Tarifa":8000.0},
+            ])
+            TAR_TABLE.replace(tar)
+        return tar
+    if not os.path.exists(TARIFAS_PATH):
+        pd.DataFrame([
+            {"Concepto":"Caso_Adicional","Tarifa":10000.0},
+            {"Concepto":"Hora_Extra","Tarifa":8000.0},
+        ]).to_csv(TARIFAS_PATH, index=False, encoding="utf-8-sig")
+    return pd.read_csv(TARIFAS_PATH, encoding="utf-8-sig")
+
+# Cada fila se valoriza con la tarifa vigente en su Fecha
+TARIFAS = TariffHistory.from_frame(load_tarifas())
+
+# Resumen mensual materializado por (Empleado, Mes): cada envío suma solo sus filas.
+# En GitHub no hay una versión barata de la fuente remota: se suma lo ya cargado.
+RESUMEN = resumen_portal(lambda: load_data(), lambda: REG_LEDGER.version(), TARIFAS)
+# Meses cerrados (python -m productividad.cierre): se leen de su foto
+CIERRES = get_snapshots("portal")
+# Gráficas dibujadas una vez a PNG y cacheadas por proceso (LRU)
+GRAFICAS = get_charts()
+
+def version_datos(data):
+    """Versión de los registros para las claves de las gráficas."""
+    # En GitHub no hay una versión barata de la fuente: la huella de lo cargado
+    return huella(data) if USE_GH else REG_LEDGER.version()
+
+def load_data(mes=None, empleado=None, lider=None):
+    """Carga los registros (base + envíos pendientes de compactar).
+
+    Los filtros (valor o lista) se resuelven en el backend: con SQLite es una
+    consulta indexada que solo trae las filas que coinciden. Las columnas salen
+    con el esquema compacto (categóricas, enteros chicos, fecha).
+    """
+    filters = _reg_filters(mes, empleado, lider)
+    if USE_GH or (USE_SQLITE and any(filters.values())):
+        df = REG_LEDGER.load(filters)
     else:
-        if os.path.exists(LOCAL_CSV):
-            return pd.read_csv(LOCAL_CSV, encoding="utf-8-sig")
-        return pd.DataFrame(columns=["Fecha","Empleado","Área","Lider","Tipo","Numero_Caso","Estado","Horas_Extra","Mes","Año"])
+        # Una copia por proceso para todas las sesiones, mientras no cambie la versión
+        cargar = lambda: aplicar_esquema(REG_LEDGER.load(), REGISTRO_PORTAL)
+        return filter_frame(REG_DATA.get(REG_LEDGER.version, cargar), filters)
+    if USE_GH:
+        # Lo que aún está en el diario write-behind también cuenta
+        pend = filter_frame(pd.DataFrame(REG_QUEUE.pending()), filters)
+        if not pend.empty:
+            df = pd.concat([df, pend], ignore_index=True)
+    return aplicar_esquema(df, REGISTRO_PORTAL)
+
+def distinct_data(column, mes=None, empleado=None, lider=None):
+    """Opciones para los filtros (valores distintos de una columna)."""
+    if USE_GH and column != "Mes":
+        return distinct_values(load_data(mes, empleado, lider), column)
+    vals = REG_LEDGER.distinct(column, _reg_filters(mes, empleado, lider))
+    if USE_GH:
+        # Meses salen del manifiesto; se suman los que aún están en el diario
+        vals = sorted(set(vals) | set(distinct_values(pd.DataFrame(REG_QUEUE.pending()), column)))
+    return vals
 
 def save_data(df):
-    if USE_GH:
-        content, sha = gh_get_file(GH_PATH_REG, GH_BRANCH)
-        gh_put_file(GH_PATH_REG, df.to_csv(index=False), f"update registros", GH_BRANCH, sha)
-    else:
-        df.to_csv(LOCAL_CSV, index=False, encoding="utf-8-sig")
+    """Reescritura completa (solo compactación/reparación; los envíos usan append_rows)."""
+    REG_LEDGER.replace(df)
+    REG_DATA.invalidate()
+    if not USE_GH:
+        RESUMEN.rebuild()
 
 def append_rows(rows):
-    """Agrega filas nuevas y guarda (GitHub o local)."""
-    df = load_data()
-    df = pd.concat([df, pd.DataFrame(rows)], ignore_index=True)
-    # backfill Mes/Año
-    if not df.empty:
-        df["Mes"] = df.apply(lambda r: month_str(r.get("Fecha","")), axis=1)
-        df["Año"] = pd.to_datetime(df["Fecha"], errors="coerce").dt.year
-    save_data(df)
+    """Agrega filas nuevas sin leer ni reescribir el histórico (GitHub o local)."""
+    new = pd.DataFrame(rows)
+    # backfill Mes/Año solo de las filas nuevas
+    fill_mes_anio(new)
+    records = new.to_dict("records")
+    if USE_GH:
+        return REG_QUEUE.append(records)
+    REG_DATA.invalidate()
+    return RESUMEN.append(records, REG_LEDGER.append)
+
+def compact_data():
+    """Integra los envíos pendientes en el archivo base (paso explícito).
+
+    También compacta los buzones de mensajes (y reparte el archivo único previo).
+    """
+    if USE_GH:
+        REG_QUEUE.flush()
+        MSG_QUEUE.flush()
+        return REG_LEDGER.compact() + MSG_BOX.compact()
+    n = 0 if USE_SQLITE else MSG_BOX.compact()
+    # Compactar no cambia las filas: el resumen solo pasa a la versión nueva
+    return n + RESUMEN.append([], lambda _: REG_LEDGER.compact())
+
+def resumen_mensual(data, mes=None, empleado=None, lider=None):
+    """Casos variables, horas extra y su valor por (Empleado, Mes) según los filtros.
+
+    Los meses cerrados salen de su foto, no de las filas.
+    """
+    frame = RESUMEN.fold(data) if USE_GH else RESUMEN.get()
+    return total_mensual(RESUMEN.view(_reg_filters(mes, empleado, lider), frame=CIERRES.combinar(frame)))
 
 # ---- Mensajes Admin -> Empleado ----
-def load_msgs():
+# Un buzón por empleado: enviar escribe solo en el del destinatario y leer
+# abre solo el del empleado (el manifiesto sabe qué meses tiene cada buzón).
+def _gh_msg_ledger(path):
+    return GitHubLedger(path, MSG_COLS, gh_get_file, gh_put_file, gh_list_dir, gh_delete_file, GH_BRANCH)
+
+if USE_GH:
+    MSG_BOX = MailboxLedger(
+        GH_DIR_MSG, MSG_COLS, _gh_msg_ledger,
+        Manifest(f"{GH_DIR_MSG}/manifest.json", _gh_text, _gh_put_text),
+        legacy=_gh_msg_ledger(GH_PATH_MSG),
+    )
+    # Los mensajes van al diario write-behind y se suben agrupados
+    MSG_QUEUE = get_queue("mensajes_portal", MSG_BOX.append, WB_MAX_ROWS, WB_MAX_SECONDS)
+elif not USE_SQLITE:
+    MSG_BOX = MailboxLedger(
+        LOCAL_DIR_MSG, MSG_COLS, lambda path: LocalLedger(path, MSG_COLS),
+        Manifest(f"{LOCAL_DIR_MSG}/manifest.json", local_text, local_put_text),
+        legacy=LocalLedger(LOCAL_MSG, MSG_COLS),
+    )
+
+def load_msgs(empleado=None, mes=None):
+    filters = {"Empleado": empleado, "Mes": mes}
+    if USE_SQLITE:
+        return MSG_TABLE.load(filters)
+    df = MSG_BOX.load(filters)
     if USE_GH:
-        content, _ = gh_get_file(GH_PATH_MSG, GH_BRANCH)
-        if content is None:
-            return pd.DataFrame(columns=["Fecha","Empleado","Mes","Admin","Mensaje"])
-        return pd.read_csv(StringIO(content))
-    else:
-        if os.path.exists(LOCAL_MSG):
-            return pd.read_csv(LOCAL_MSG, encoding="utf-8-sig")
-        return pd.DataFrame(columns=["Fecha","Empleado","Mes","Admin","Mensaje"])
+        pend = filter_frame(pd.DataFrame(MSG_QUEUE.pending(), columns=MSG_COLS), filters)
+        if not pend.empty:
+            df = pd.concat([df, pend], ignore_index=True)
+    return df
 
 def save_msgs(df):
-    if USE_GH:
-        content, sha = gh_get_file(GH_PATH_MSG, GH_BRANCH)
-        gh_put_file(GH_PATH_MSG, df.to_csv(index=False), f"update mensajes", GH_BRANCH, sha)
-    else:
-        df.to_csv(LOCAL_MSG, index=False, encoding="utf-8-sig")
+    """Reescritura por buzón (solo reparación; los envíos usan add_msg)."""
+    if USE_SQLITE:
+        return MSG_TABLE.replace(df)
+    return MSG_BOX.replace(df)
 
 def add_msg(fecha, empleado, mes, admin, mensaje):
-    df = load_msgs()
-    df = pd.concat([df, pd.DataFrame([{
+    row = {
         "Fecha": fecha,
         "Empleado": empleado,
         "Mes": mes,
         "Admin": admin,
         "Mensaje": mensaje
-    }])], ignore_index=True)
-    save_msgs(df)
+    }
+    if USE_SQLITE:
+        MSG_TABLE.append([row])
+        return
+    if USE_GH:
+        MSG_QUEUE.append([row])
+        return
+    MSG_BOX.append([row])
+
+# ---- Arranque (GitHub) ----
+# Las lecturas que esta sesión hizo en su rerun anterior se piden todas en
+# paralelo (una ida y vuelta) y el resto del rerun las reutiliza; la primera
+# vez se anticipan los manifiestos y los archivos únicos previos.
+def _lectura(path):
+    return (f"{API_BASE}/{path}", {"ref": GH_BRANCH})
+
+if USE_GH:
+    LECTURAS_BASE = [_lectura(p) for p in (
+        REG_LEDGER.manifest.path, GH_PATH_REG, REG_LEDGER.legacy.ledger_dir,
+        MSG_BOX.manifest.path, GH_PATH_MSG, MSG_BOX.legacy.ledger_dir,
+    )]
+    st.session_state["lecturas_gh"] = begin_rerun(HEADERS, st.session_state.get("lecturas_gh") or LECTURAS_BASE)
 
 # ===========================
 # Sidebar: Admin
@@ -190,6 +395,10 @@ if not st.session_state.is_admin:
             st.sidebar.error("PIN incorrecto.")
 else:
     st.sidebar.success("Modo administrador activo")
+# Subidas a GitHub que están fallando: lo guardado sigue en el diario local
+if USE_GH:
+    for aviso in filter(None, (REG_QUEUE.aviso(), MSG_QUEUE.aviso())):
+        st.sidebar.warning(aviso)
 
 # ===========================
 # Tabs
@@ -293,15 +502,17 @@ with tab_reg:
                 if not rows:
                     st.warning("No agregaste casos ni horas extra.")
                 else:
-                    append_rows(rows)
-                    st.success(f"Se guardaron {len(rows)} registro(s). ¡Gracias!")
+                    if append_rows(rows):
+                        st.success(f"Se guardaron {len(rows)} registro(s). ¡Gracias!")
+                    else:
+                        st.error("No se pudo guardar. Intenta de nuevo.")
 
     st.markdown('</div>', unsafe_allow_html=True)
 
     # ------ RESUMEN DEL EMPLEADO: dinero del mes ------
     st.markdown("### 💰 Mi resumen del mes")
-    reg = load_data()
-    if reg.empty:
+    meses = distinct_data("Mes")
+    if not meses:
         st.info("Aún no hay datos registrados.")
     else:
         c1, c2 = st.columns(2)
@@ -309,32 +520,23 @@ with tab_reg:
             mi_nombre = st.text_input("Mi nombre (exacto como registras):", value="")
         with c2:
             # Por defecto, el mes actual:
-            mes_sel = st.selectbox("Mes", sorted(reg["Mes"].dropna().unique().tolist()),
-                                   index=max(0, len(sorted(reg['Mes'].dropna().unique().tolist()))-1))
+            mes_sel = st.selectbox("Mes", meses, index=max(0, len(meses)-1))
 
         if mi_nombre.strip():
-            dfm = reg[(reg["Empleado"]==mi_nombre.strip()) & (reg["Mes"]==mes_sel)]
-            # Cargar tarifas (locales, simples)
-            tar_path = "tarifas_portal.csv"
-            if not os.path.exists(tar_path):
-                pd.DataFrame([
-                    {"Concepto":"Caso_Adicional","Tarifa":10000.0},
-                    {"Concepto":"Hora_Extra","Tarifa":8000.0},
-                ]).to_csv(tar_path, index=False, encoding="utf-8-sig")
-            tar = pd.read_csv(tar_path, encoding="utf-8-sig")
-            try:
-                tarifa_caso = float(tar.loc[tar["Concepto"]=="Caso_Adicional","Tarifa"].iloc[0])
-            except Exception:
-                tarifa_caso = 0.0
-            try:
-                tarifa_hora = float(tar.loc[tar["Concepto"]=="Hora_Extra","Tarifa"].iloc[0])
-            except Exception:
-                tarifa_hora = 0.0
-
-            casos_var = dfm[(dfm["Tipo"]=="Variable") & (dfm["Numero_Caso"].astype(str).str.strip()!="")].shape[0]
+            if CIERRES.cerrado(mes_sel):
+                # Mes cerrado: lo de la foto de nómina
+                foto = CIERRES.leer(mes_sel)
+                dfm = foto[foto["Empleado"] == mi_nombre.strip()]
+                casos_var = int(dfm["Casos_Variable"].sum())
+            else:
+                # Solo las filas del empleado y mes (consulta indexada con SQLite)
+                dfm = load_data(mes=mes_sel, empleado=mi_nombre.strip())
+                # Tarifa vigente en la fecha de cada registro
+                dfm = TARIFAS.price_columns(marcar_variables(dfm.copy()), VALORIZADO_PORTAL, "Fecha")
+                casos_var = int(dfm["Es_Variable"].sum())
             horas = int(dfm["Horas_Extra"].sum())
-            ingreso_var = casos_var * tarifa_caso
-            ingreso_hex = horas * tarifa_hora
+            ingreso_var = dfm["Ingreso_Variable"].sum()
+            ingreso_hex = dfm["Ingreso_Extras"].sum()
             total = ingreso_var + ingreso_hex
 
             st.metric("Casos de Variable", casos_var)
@@ -345,12 +547,11 @@ with tab_reg:
 
             # Mensajes del admin para este empleado y mes
             st.markdown("#### 📨 Mensajes del Admin")
-            msgs = load_msgs()
-            ver = msgs[(msgs["Empleado"]==mi_nombre.strip()) & (msgs["Mes"]==mes_sel)]
+            ver = load_msgs(empleado=mi_nombre.strip(), mes=mes_sel)
             if ver.empty:
                 st.info("No hay mensajes del Admin para este mes.")
             else:
-                st.dataframe(ver.sort_values("Fecha", ascending=False), use_container_width=True)
+                mostrar_tabla(ver, "mis_mensajes", por=["Fecha"], ascendente=False)
 
 # ===========================
 # TAB: Admin
@@ -358,92 +559,61 @@ with tab_reg:
 if st.session_state.is_admin:
     with tab_admin:
         st.subheader("Panel administrativo (en vivo)")
-        data = load_data()
-        if data.empty:
+        meses_all = distinct_data("Mes")
+        if not meses_all:
             st.info("Aún no hay registros.")
         else:
-            # Filtros
+            # Filtros (se aplican en el backend: solo llegan las filas seleccionadas)
             c1, c2, c3 = st.columns(3)
             with c1:
-                f_mes = st.multiselect("Mes", sorted(data["Mes"].dropna().unique().tolist()))
+                f_mes = st.multiselect("Mes", meses_all)
             with c2:
-                f_emp = st.multiselect("Empleado", sorted(data["Empleado"].dropna().unique().tolist()))
+                # Opciones de los meses elegidos: no hace falta leer los demás meses
+                f_emp = st.multiselect("Empleado", distinct_data("Empleado", mes=f_mes))
             with c3:
-                f_lid = st.multiselect("Líder", sorted(data["Lider"].dropna().unique().tolist()))
-            if f_mes: data = data[data["Mes"].isin(f_mes)]
-            if f_emp: data = data[data["Empleado"].isin(f_emp)]
-            if f_lid: data = data[data["Lider"].isin(f_lid)]
+                f_lid = st.multiselect("Líder", distinct_data("Lider", mes=f_mes))
+            data = load_data(mes=f_mes, empleado=f_emp, lider=f_lid)
+            # Gráficas y tablas se cachean por (versión de datos, filtros)
+            clave = (version_datos(data), tuple(f_mes), tuple(f_emp), tuple(f_lid))
 
             # 0) Gráfica de productividad por día (todas las personas)
             st.markdown("### 0) Gráfica de productividad por día (todas las personas)")
-            prod = data[(data["Tipo"]=="Productividad") & (data["Numero_Caso"].astype(str).str.strip()!="")].copy()
+            prod = data[(data["Tipo"]=="Productividad") & (data["Numero_Caso"].astype(str).str.strip()!="")]
             if prod.empty:
                 st.info("No hay datos de productividad aún.")
             else:
                 # Total por día (todas las personas)
-                tot_dia = prod.groupby("Fecha", as_index=False).agg(Casos=("Numero_Caso","count")).sort_values("Fecha")
-                fig = plt.figure()
-                plt.plot(tot_dia["Fecha"], tot_dia["Casos"])
-                plt.title("Productividad total por día")
-                plt.xlabel("Fecha"); plt.ylabel("Casos de Productividad")
-                plt.xticks(rotation=45, ha="right")
-                st.pyplot(fig)
+                def dibujar_dia(ax):
+                    tot_dia = prod.groupby("Fecha")["Numero_Caso"].count().sort_index()
+                    lineas(ax, tot_dia, "Productividad total por día", "Fecha", "Casos de Productividad")
+                st.image(GRAFICAS.png(("portal.dia",) + clave, dibujar_dia))
 
                 # Línea por empleado (top 5 por volumen)
                 st.caption("Top 5 empleados por volumen de casos (líneas por día)")
-                top5 = prod.groupby("Empleado")["Numero_Caso"].count().sort_values(ascending=False).head(5).index.tolist()
-                prod_top = prod[prod["Empleado"].isin(top5)]
-                if not prod_top.empty:
-                    pivot = prod_top.groupby(["Fecha","Empleado"])["Numero_Caso"].count().reset_index()
+                def dibujar_top5(ax):
+                    top5 = prod.groupby("Empleado", observed=True)["Numero_Caso"].count().sort_values(ascending=False).head(5).index.tolist()
+                    prod_top = prod[prod["Empleado"].isin(top5)]
+                    pivot = prod_top.groupby(["Fecha","Empleado"], observed=True)["Numero_Caso"].count().reset_index()
                     pivot = pivot.pivot(index="Fecha", columns="Empleado", values="Numero_Caso").fillna(0).sort_index()
-                    fig2 = plt.figure()
-                    for col in pivot.columns:
-                        plt.plot(pivot.index, pivot[col], label=col)
-                    plt.title("Productividad diaria (Top 5)")
-                    plt.xlabel("Fecha"); plt.ylabel("Casos")
-                    plt.xticks(rotation=45, ha="right")
-                    plt.legend()
-                    st.pyplot(fig2)
+                    lineas(ax, pivot, "Productividad diaria (Top 5)", "Fecha", "Casos")
+                st.image(GRAFICAS.png(("portal.top5",) + clave, dibujar_top5))
 
             # 1) Control por tipo y estado
             st.markdown("### 1) Control por tipo y estado")
-            pivot = data.pivot_table(index=["Tipo","Estado"], values="Numero_Caso", aggfunc="count", fill_value=0).reset_index().rename(columns={"Numero_Caso":"Cantidad"})
+            pivot = data.pivot_table(index=["Tipo","Estado"], values="Numero_Caso", aggfunc="count", fill_value=0, observed=True).reset_index().rename(columns={"Numero_Caso":"Cantidad"})
             st.dataframe(pivot, use_container_width=True)
 
             # 2) Cumplimiento diario (meta = 12 Productividad)
             st.markdown("### 2) Cumplimiento diario (meta = 12 de Productividad)")
             prod2 = data[(data["Tipo"]=="Productividad") & (data["Numero_Caso"].astype(str).str.strip()!="")].copy()
-            dia = prod2.groupby(["Empleado","Fecha"], as_index=False).agg(Total_Casos=("Numero_Caso","count"))
+            dia = prod2.groupby(["Empleado","Fecha"], as_index=False, observed=True).agg(Total_Casos=("Numero_Caso","count"))
             dia["Cumple"] = dia["Total_Casos"] >= META_DIARIA
             dia["Cumplimiento"] = dia["Cumple"].map(lambda x: "🟢 Cumplió" if x else "🔴 No cumplió")
-            st.dataframe(dia.sort_values(["Fecha","Empleado"]), use_container_width=True)
+            mostrar_tabla(dia, "dia", clave, por=["Fecha","Empleado"])
 
             # 3) Ingresos mensuales (Variables + Horas extra)
             st.markdown("### 3) Ingresos mensuales (Variables + Horas extra)")
-            # Tarifas locales (simples, editables fuera de la app)
-            tar_path = "tarifas_portal.csv"
-            if not os.path.exists(tar_path):
-                pd.DataFrame([
-                    {"Concepto":"Caso_Adicional","Tarifa":10000.0},
-                    {"Concepto":"Hora_Extra","Tarifa":8000.0},
-                ]).to_csv(tar_path, index=False, encoding="utf-8-sig")
-            tarifas = pd.read_csv(tar_path, encoding="utf-8-sig")
-            try:
-                tarifa_caso = float(tarifas.loc[tarifas["Concepto"]=="Caso_Adicional","Tarifa"].iloc[0])
-            except Exception:
-                tarifa_caso = 0.0
-            try:
-                tarifa_hora = float(tarifas.loc[tarifas["Concepto"]=="Hora_Extra","Tarifa"].iloc[0])
-            except Exception:
-                tarifa_hora = 0.0
-
-            var_cases = data[(data["Tipo"]=="Variable") & (data["Numero_Caso"].astype(str).str.strip()!="")]
-            var_mes = var_cases.groupby(["Empleado","Mes"], as_index=False).agg(Casos_Variable=("Numero_Caso","count"))
-            horas_mes = data.groupby(["Empleado","Mes"], as_index=False).agg(Horas_Extra=("Horas_Extra","sum"))
-            resumen = pd.merge(var_mes, horas_mes, on=["Empleado","Mes"], how="outer").fillna(0)
-            resumen["Ingreso_Variable"] = resumen["Casos_Variable"] * tarifa_caso
-            resumen["Ingreso_Extras"]   = resumen["Horas_Extra"] * tarifa_hora
-            resumen["Total_Mensual"]    = resumen["Ingreso_Variable"] + resumen["Ingreso_Extras"]
+            resumen = resumen_mensual(data, mes=f_mes, empleado=f_emp, lider=f_lid)
 
             view = resumen.copy()
             for c in ["Ingreso_Variable","Ingreso_Extras","Total_Mensual"]:
@@ -452,11 +622,10 @@ if st.session_state.is_admin:
 
             # 4) Mensajes del Admin
             st.markdown("### 4) Mensajes a empleados")
-            msgs = load_msgs()
             c1, c2 = st.columns([2,1])
             with c1:
-                emp_sel = st.selectbox("Empleado", sorted(data["Empleado"].dropna().unique().tolist()))
-                mes_sel = st.selectbox("Mes", sorted(data["Mes"].dropna().unique().tolist()))
+                emp_sel = st.selectbox("Empleado", sorted(data["Empleado"].dropna().unique().tolist()), key="msg_emp")
+                mes_sel = st.selectbox("Mes", sorted(data["Mes"].dropna().unique().tolist()), key="msg_mes")
                 mensaje = st.text_area("Mensaje para el empleado", placeholder="Ej.: Buen trabajo, alcanzaste la meta 3 días seguidos. ¡Sigue así!")
             with c2:
                 admin_nombre = st.text_input("Tu nombre (Admin)", value="Admin")
@@ -464,27 +633,34 @@ if st.session_state.is_admin:
             if enviar and emp_sel and mes_sel and mensaje.strip():
                 add_msg(date.today().strftime("%Y-%m-%d"), emp_sel, mes_sel, admin_nombre.strip(), mensaje.strip())
                 st.success("Mensaje enviado.")
-                msgs = load_msgs()
 
             st.markdown("#### Historial de mensajes")
+            # Por defecto solo el buzón del empleado elegido (una lectura por rerun)
+            todos = st.checkbox("Ver los mensajes de todos los empleados", key="msg_todos")
+            msgs = load_msgs(empleado=None if todos else emp_sel)
             if msgs.empty:
                 st.info("No hay mensajes aún.")
             else:
-                st.dataframe(msgs.sort_values("Fecha", ascending=False), use_container_width=True)
+                mostrar_tabla(msgs, "mensajes", por=["Fecha"], ascendente=False)
 
             # Gráfico total mensual
-            tot_mes = resumen.groupby("Mes", as_index=False)["Total_Mensual"].sum().sort_values("Mes")
+            tot_mes = resumen.groupby("Mes", as_index=False, observed=True)["Total_Mensual"].sum().sort_values("Mes")
             if not tot_mes.empty:
-                fig = plt.figure()
-                plt.plot(tot_mes["Mes"], tot_mes["Total_Mensual"])
-                plt.title("Total mensual (Variables + Extras)")
-                plt.xlabel("Mes"); plt.ylabel("Valor (COP)")
-                plt.xticks(rotation=45, ha="right")
-                st.pyplot(fig)
+                # Un PNG por contenido de la serie (cambia con datos, tarifas o cierres)
+                serie = tot_mes.set_index(tot_mes["Mes"].astype(str))["Total_Mensual"]
+                st.image(GRAFICAS.png(("portal.total_mensual", huella(serie)), lambda ax: lineas(
+                    ax, serie, "Total mensual (Variables + Extras)", "Mes", "Valor (COP)")))
 
             # Descarga registros
-            st.download_button(
-                "⬇️ Descargar registros (CSV)",
-                data=load_data().to_csv(index=False).encode("utf-8-sig"),
-                file_name="registro_portal.csv", mime="text/csv"
-            )
+            # Se carga y se escribe solo al hacer clic (no en cada rerun)
+            boton_descarga("⬇️ Descargar registros", load_data, "registro_portal", key="dl_registros")
+
+            # Compactación del libro de registros
+            st.markdown("#### 🧹 Mantenimiento")
+            st.caption("Los envíos se guardan como segmentos nuevos; compactar los integra en el archivo base.")
+            if st.button("Compactar registros"):
+                n = compact_data()
+                st.success(f"Compactación lista: {n} segmento(s) integrados.")
+            if not USE_GH and st.button("Recalcular resumen mensual"):
+                RESUMEN.rebuild()
+                st.success("Resumen mensual recalculado.")
@@ -2,9 +2,16 @@
 import os
 import pandas as pd
 import streamlit as st
-import matplotlib.pyplot as plt
 from datetime import date
 
+from productividad.cierre import get_snapshots
+from productividad.exportar import boton_descarga
+from productividad.fechas import fill_mes_anio, month_str
+from productividad.graficos import get_charts, huella, lineas
+from productividad.resumenes import resumen_simple, total_mensual
+from productividad.storage import append_csv, data_version, load_csv, save_csv
+from productividad.tarifas import VIGENCIA_COL, TariffHistory, nueva_version, vigentes
+
 st.set_page_config(page_title="BBVA | Registro simple mensual", page_icon="📑", layout="wide")
 
 # ---------------- Paths ----------------
@@ -20,25 +27,6 @@ def ensure_csv(path, columns, default_rows=None):
         else:
             pd.DataFrame(columns=columns).to_csv(path, index=False, encoding="utf-8-sig")
 
-def load_csv(path):
-    if os.path.exists(path):
-        try:
-            return pd.read_csv(path, encoding="utf-8-sig")
-        except Exception:
-            return pd.read_csv(path)
-    return pd.DataFrame()
-
-def save_csv(df, path):
-    df.to_csv(path, index=False, encoding="utf-8-sig")
-
-def month_str(d):
-    try:
-        if isinstance(d, str):
-            d = pd.to_datetime(d).date()
-        return f"{d.year:04d}-{d.month:02d}"
-    except Exception:
-        return ""
-
 def format_cop(v):
     try:
         n = float(v)
@@ -56,15 +44,19 @@ ensure_csv(TARIFAS_PATH, ["Concepto","Tarifa"], default_rows=[
     {"Concepto":"Hora_Extra","Tarifa":8000.0},
 ])
 
-df = load_csv(DATA_PATH)
-tarifas = load_csv(TARIFAS_PATH)
+tarifas = load_csv(TARIFAS_PATH)  # historial: una fila por versión (Vigente_desde)
+
+def load_registros():
+    # Backfill month/year (only rows missing them)
+    return fill_mes_anio(load_csv(DATA_PATH))
 
-# Backfill month/year
-if not df.empty:
-    if "Mes" not in df.columns: df["Mes"] = ""
-    if "Año" not in df.columns: df["Año"] = ""
-    df["Mes"] = df.apply(lambda r: month_str(r.get("Fecha","")), axis=1)
-    df["Año"] = pd.to_datetime(df["Fecha"], errors="coerce").dt.year
+# Materialized monthly summary: each save adds only its own rows.
+# Money is priced per row with the tariff in force on its Fecha.
+RESUMEN = resumen_simple(load_registros, lambda: data_version(DATA_PATH), TariffHistory.from_frame(tarifas))
+# Closed months (python -m productividad.cierre) are read from their frozen snapshot
+CIERRES = get_snapshots("simple")
+# Charts rendered once to PNG and cached per process (LRU)
+GRAFICAS = get_charts()
 
 # ---------------- Admin access (sidebar) ----------------
 st.sidebar.header("🔐 Admin")
@@ -84,12 +76,17 @@ else:
 
 if st.session_state.is_admin:
     with st.sidebar.expander("💵 Tarifas", expanded=True):
-        st.caption("Define los valores que TÚ actualizas:")
-        tarifas_edit = st.data_editor(tarifas, use_container_width=True, num_rows="dynamic", key="tarifas_editor")
+        st.caption("Define los valores que TÚ actualizas (rigen desde hoy; los meses anteriores conservan sus tarifas):")
+        tarifas_edit = st.data_editor(vigentes(tarifas), use_container_width=True, num_rows="dynamic",
+                                      disabled=[VIGENCIA_COL], key="tarifas_editor")
         if st.button("💾 Guardar tarifas", use_container_width=True):
-            save_csv(tarifas_edit, TARIFAS_PATH)
-            tarifas = tarifas_edit
+            tarifas = nueva_version(tarifas, tarifas_edit)
+            save_csv(tarifas, TARIFAS_PATH)
+            RESUMEN.pricing = TariffHistory.from_frame(tarifas)
             st.success("Tarifas guardadas")
+        if st.button("🔄 Recalcular resumen mensual", use_container_width=True):
+            RESUMEN.rebuild()
+            st.success("Resumen recalculado")
 
 # ---------------- Header ----------------
 st.title("📑 Registro diario (empleados) + 💸 Cálculo mensual (automático)")
@@ -125,46 +122,29 @@ with tab_reg:
                     "Mes": month_str(fecha),
                     "Año": fecha.year,
                 }
-                df = pd.concat([df, pd.DataFrame([new])], ignore_index=True)
-                save_csv(df, DATA_PATH)
+                RESUMEN.append(pd.DataFrame([new]), lambda rows: append_csv(rows, DATA_PATH))
                 st.success("Registro guardado.")
 
 # ---------------- Tab Resumen mensual ----------------
 with tab_mes:
     st.subheader("Totales por Empleado x Mes")
-    data = load_csv(DATA_PATH)
-    if data.empty:
+    if RESUMEN.get().empty:
         st.info("Aún no hay registros.")
     else:
         # filters
         c1, c2 = st.columns(2)
         with c1:
-            f_mes = st.multiselect("Mes", sorted(data["Mes"].dropna().unique().tolist()))
+            f_mes = st.multiselect("Mes", RESUMEN.distinct("Mes"))
         with c2:
-            f_emp = st.multiselect("Empleado", sorted(data["Empleado"].dropna().unique().tolist()))
-        if f_mes: data = data[data["Mes"].isin(f_mes)]
-        if f_emp: data = data[data["Empleado"].isin(f_emp)]
-
-        # aggregates
-        agg = data.groupby(["Empleado","Mes"], as_index=False).agg({
-            "Casos":"sum",
-            "Casos_Adicionales":"sum",
-            "Horas_Extra":"sum"
-        })
-
-        # rates
-        try:
-            tarifa_caso = float(tarifas.loc[tarifas["Concepto"]=="Caso_Adicional","Tarifa"].iloc[0])
-        except Exception:
-            tarifa_caso = 0.0
-        try:
-            tarifa_hora = float(tarifas.loc[tarifas["Concepto"]=="Hora_Extra","Tarifa"].iloc[0])
-        except Exception:
-            tarifa_hora = 0.0
-
-        agg["Ingreso_Variable"] = agg["Casos_Adicionales"] * tarifa_caso
-        agg["Ingreso_Extras"] = agg["Horas_Extra"] * tarifa_hora
-        agg["Total_Mensual"] = agg["Ingreso_Variable"] + agg["Ingreso_Extras"]
+            f_emp = st.multiselect("Empleado", RESUMEN.distinct("Empleado"))
+
+        # aggregates (read from the materialized summary, no raw rows; closed months from their snapshot)
+        agg = RESUMEN.view({"Mes": f_mes, "Empleado": f_emp}, frame=CIERRES.combinar(RESUMEN.get()))
+
+        # current rates (money in the summary already used each row's rate)
+        vigente = RESUMEN.pricing.as_of()
+        tarifa_caso, tarifa_hora = vigente.rate("Caso_Adicional"), vigente.rate("Hora_Extra")
+        agg = total_mensual(agg)
 
         view = agg.copy()
         view["Ingreso_Variable"] = view["Ingreso_Variable"].apply(format_cop)
@@ -173,24 +153,18 @@ with tab_mes:
 
         st.dataframe(view.sort_values(["Mes","Empleado"]), use_container_width=True)
         st.caption(f"Tarifa por caso adicional: {format_cop(tarifa_caso)} · Tarifa por hora extra: {format_cop(tarifa_hora)}")
+        if CIERRES.meses():
+            st.caption("Meses cerrados: " + ", ".join(CIERRES.meses()))
 
         # chart
-        tot_mes = agg.groupby("Mes", as_index=False)["Total_Mensual"].sum().sort_values("Mes")
+        tot_mes = agg.groupby("Mes", as_index=False, observed=True)["Total_Mensual"].sum().sort_values("Mes")
         if not tot_mes.empty:
-            fig = plt.figure()
-            plt.plot(tot_mes["Mes"], tot_mes["Total_Mensual"])
-            plt.title("Total mensual (Variables + Extras)")
-            plt.xlabel("Mes")
-            plt.ylabel("Valor (COP)")
-            plt.xticks(rotation=45, ha="right")
-            st.pyplot(fig)
+            # One PNG per series content (changes with data, tariffs or closed months)
+            serie = tot_mes.set_index(tot_mes["Mes"].astype(str))["Total_Mensual"]
+            st.image(GRAFICAS.png(("simple.total_mensual", huella(serie)), lambda ax: lineas(
+                ax, serie, "Total mensual (Variables + Extras)", "Mes", "Valor (COP)")))
 
         # download
-        st.download_button(
-            "⬇️ Descargar resumen mensual (CSV)",
-            data=agg.to_csv(index=False).encode("utf-8-sig"),
-            file_name="resumen_mensual_simple.csv",
-            mime="text/csv"
-        )
+        boton_descarga("⬇️ Descargar resumen mensual", agg, "resumen_mensual_simple", key="dl_resumen")
 
 st.caption("Modo empleado: solo registra cantidades. Modo admin: define tarifas y se calcula el total mensual.")
@@ -0,0 +1,300 @@
+"""Prueba de carga del portal: sesiones de AppTest concurrentes contra GitHub local.
+
+Uso: ``python benchmarks/bench_carga.py --sesiones 150 --admins 5 --latencia 0.1``
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gh_local import LocalGitHub  # noqa: E402
+from productividad import sintetico  # noqa: E402
+from productividad.write_behind import flush_all, pending_all  # noqa: E402
+
+APP = os.path.join(RAIZ, "app_portal_unico.py")
+PIN = "bbva2025"
+PREFIJO = "Carga "
+
+
+def sembrar(filas, meses, seed=0):
+    """Repo inicial: registros sintéticos en ``registros/<mes>.csv`` + manifiesto."""
+    if not filas:
+        return {}
+    df = sintetico.registros("portal", filas, meses=meses, seed=seed)
+    files, shards = {}, {}
+    for mes, grupo in df.groupby("Mes", sort=True):
+        path = f"registros/{mes}.csv"
+        files[path] = grupo.to_csv(index=False).encode("utf-8")
+        shards[mes] = {"path": path}
+    manifiesto = {"version": 1, "shards": shards, "legacy_migrated": True}
+    files["registros/manifest.json"] = json.dumps(manifiesto, indent=1, sort_keys=True).encode("utf-8")
+    return files
+
+
+def filas_en_repo(repo):
+    """Todas las filas de registros que quedaron en el repo (bases + segmentos)."""
+    partes = []
+    with repo.lock:
+        files = dict(repo.files)
+    for path, data in files.items():
+        if path.endswith(".csv") and (path.startswith("registros/") or path.startswith("registro_portal")):
+            partes.append(pd.read_csv(io.BytesIO(data), usecols=["Empleado"], dtype=str))
+    return pd.concat(partes, ignore_index=True) if partes else pd.DataFrame({"Empleado": []})
+
+
+def _por_etiqueta(elementos, etiqueta):
+    return next(e for e in elementos if e.label == etiqueta)
+
+
+def _un_solo_servidor(secrets):
+    """Estado de proceso de ``AppTest`` fijo, como en un servidor con muchas sesiones.
+
+    ``AppTest.run`` está pensado para una sesión a la vez: en cada rerun
+    pone y quita ``global.appTest``, ``Runtime._instance`` y ``st.secrets``,
+    y compila el script de nuevo. Con sesiones en paralelo, un rerun que
+    termina deja sin runtime (o sin secrets) a otro que va por la mitad.
+    Aquí se fijan para toda la prueba: la opción queda activa, los secrets
+    son globales, todas las sesiones comparten un runtime (archivos de
+    medios, fuentes de tablas) y el ``ast.parse`` va de a uno (desde varios
+    hilos falla en CPython 3.11).
+    """
+    from unittest.mock import MagicMock
+
+    import streamlit as st
+    from streamlit import config, runtime
+    from streamlit.components.v2.component_manager import BidiComponentManager
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.dataframe_source_manager import DataframeSourceManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner import magic
+    from streamlit.runtime.secrets import Secrets
+
+    config.set_option("global.appTest", True)
+    st.secrets = Secrets()
+    st.secrets._secrets = dict(secrets)
+    compartido = MagicMock(spec=Runtime)
+    compartido.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    compartido.dataframe_source_mgr = DataframeSourceManager()
+    compartido.cache_storage_manager = MemoryCacheStorageManager()
+    compartido.bidi_component_registry = BidiComponentManager()
+    runtime.get_instance = lambda: compartido
+    runtime.exists = lambda: True
+
+    original, lock = magic.add_magic, threading.Lock()
+
+    def add_magic(code, script_path):
+        with lock:
+            return original(code, script_path)
+    magic.add_magic = add_magic
+
+
+def _nueva_sesion(timeout):
+    from streamlit.testing.v1 import AppTest
+
+    # Sin ``at.secrets``: AppTest usa los globales de ``_un_solo_servidor``
+    return AppTest.from_file(APP, default_timeout=timeout)
+
+
+class Resultados:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.primer_render = []
+        self.envio = []
+        self.filtros = []
+        self.confirmados = []
+        self.fallidos = 0
+        self.errores = Counter()
+
+    def anotar(self, campo, valor):
+        with self.lock:
+            getattr(self, campo).append(valor)
+
+    def error(self, exc):
+        with self.lock:
+            self.errores[f"{type(exc).__name__}: {str(exc)[:120]}"] += 1
+
+
+def empleado(sid, args, barrera, res):
+    try:
+        at = _nueva_sesion(args.timeout)
+        t0 = time.perf_counter()
+        at.run()
+        res.anotar("primer_render", time.perf_counter() - t0)
+    except Exception as exc:
+        res.error(exc)
+        at = None
+    barrera.wait()  # una sesión que no abrió igual libera a las demás
+    if at is None:
+        return
+    for k in range(args.envios):
+        nombre = f"{PREFIJO}{sid:04d}-{k:02d}"
+        try:
+            _por_etiqueta(at.text_input, "Nombre del empleado").set_value(nombre)
+            _por_etiqueta(at.number_input, "Horas extra (del día)").set_value(1)
+            _por_etiqueta(at.button, "✅ Guardar").click()
+            t0 = time.perf_counter()
+            at.run()
+            res.anotar("envio", time.perf_counter() - t0)
+        except Exception as exc:
+            res.error(exc)
+            continue
+        if at.exception:
+            res.error(RuntimeError(at.exception[0].value))
+        if any("Se guardaron" in s.value for s in at.success):
+            res.anotar("confirmados", nombre)
+        else:
+            with res.lock:
+                res.fallidos += 1
+
+
+def admin(aid, args, barrera, fin, res):
+    rnd = random.Random(aid)
+    try:
+        at = _nueva_sesion(args.timeout)
+        at.run()
+        _por_etiqueta(at.text_input, "PIN de administración").set_value(PIN)
+        _por_etiqueta(at.button, "Entrar").click()
+        at.run()
+    except Exception as exc:
+        res.error(exc)
+        at = None
+    barrera.wait()  # una sesión que no abrió igual libera a las demás
+    if at is None:
+        return
+    cambios = 0
+    while cambios < args.cambios or not fin.is_set():
+        try:
+            meses = _por_etiqueta(at.multiselect, "Mes")
+            meses.set_value(rnd.sample(meses.options, k=min(len(meses.options), rnd.randint(0, 2))))
+            lideres = _por_etiqueta(at.multiselect, "Líder")
+            lideres.set_value(rnd.sample(lideres.options, k=min(len(lideres.options), rnd.randint(0, 1))))
+            t0 = time.perf_counter()
+            at.run()
+            res.anotar("filtros", time.perf_counter() - t0)
+        except Exception as exc:
+            res.error(exc)
+            return
+        cambios += 1
+
+
+def percentiles(valores):
+    if not valores:
+        return {"n": 0}
+    p50, p95, p99 = np.percentile(valores, [50, 95, 99])
+    return {"n": len(valores), "p50": p50, "p95": p95, "p99": p99, "max": max(valores)}
+
+
+def _linea(nombre, p):
+    if not p["n"]:
+        return f"{nombre:<22} sin datos"
+    return (f"{nombre:<22} n={p['n']:<5} p50 {p['p50'] * 1000:8.0f} ms   p95 {p['p95'] * 1000:8.0f} ms   "
+            f"p99 {p['p99'] * 1000:8.0f} ms   máx {p['max'] * 1000:8.0f} ms")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sesiones", type=int, default=150, help="empleados que envían a la vez")
+    ap.add_argument("--envios", type=int, default=1, help="envíos por empleado")
+    ap.add_argument("--admins", type=int, default=5, help="sesiones de administración cambiando filtros")
+    ap.add_argument("--cambios", type=int, default=3, help="cambios de filtro mínimos por admin")
+    ap.add_argument("--filas-iniciales", type=int, default=20_000, help="registros sembrados en el repo")
+    ap.add_argument("--meses", type=int, default=6)
+    ap.add_argument("--latencia", type=float, default=0.1, help="segundos por llamada a la API local")
+    ap.add_argument("--wb-filas", type=int, default=50, help="WB_MAX_ROWS de la cola write-behind")
+    ap.add_argument("--wb-segundos", type=float, default=2.0, help="WB_MAX_SECONDS de la cola write-behind")
+    ap.add_argument("--timeout", type=float, default=300.0, help="timeout de cada rerun")
+    ap.add_argument("--vaciado", type=float, default=120.0, help="segundos para vaciar las colas al final")
+    ap.add_argument("--json", help="guardar los resultados en este archivo")
+    args = ap.parse_args()
+
+    logging.disable(logging.WARNING)
+    gh = LocalGitHub(latencia=args.latencia, files=sembrar(args.filas_iniciales, args.meses)).start()
+    secrets = {
+        "GITHUB_TOKEN": "local", "GH_REPO": "bbva/productividad", "GITHUB_API_URL": gh.url,
+        "WB_MAX_ROWS": args.wb_filas, "WB_MAX_SECONDS": args.wb_segundos, "ADMIN_PIN": PIN,
+    }
+    _un_solo_servidor(secrets)
+    # Diarios write-behind y archivos locales de las apps fuera del repo
+    carpeta = tempfile.mkdtemp(prefix="bench_carga_")
+    previa = os.getcwd()
+    os.chdir(carpeta)
+    res = Resultados()
+    barrera = threading.Barrier(args.sesiones + args.admins + 1)
+    fin = threading.Event()
+    hilos = [threading.Thread(target=empleado, args=(i, args, barrera, res)) for i in range(args.sesiones)]
+    hilos += [threading.Thread(target=admin, args=(i, args, barrera, fin, res)) for i in range(args.admins)]
+    try:
+        for h in hilos:
+            h.start()
+        barrera.wait()
+        t0 = time.perf_counter()
+        for h in hilos[:args.sesiones]:
+            h.join()
+        duracion = time.perf_counter() - t0
+        fin.set()
+        for h in hilos[args.sesiones:]:
+            h.join()
+
+        # Lo confirmado tiene que llegar al repo: se vacían las colas (con sus reintentos)
+        t_vaciado = time.perf_counter()
+        while pending_all() and time.perf_counter() - t_vaciado < args.vaciado:
+            flush_all() or time.sleep(0.5)
+        t_vaciado = time.perf_counter() - t_vaciado
+        pendientes = pending_all()
+        filas = filas_en_repo(gh.repo)
+    finally:
+        os.chdir(previa)
+        gh.stop()
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    en_repo = filas["Empleado"][filas["Empleado"].str.startswith(PREFIJO, na=False)].value_counts()
+    confirmados = set(res.confirmados)
+    perdidos = sorted(confirmados - set(en_repo.index))
+    resumen = {
+        "sesiones": args.sesiones, "admins": args.admins, "latencia_api_s": args.latencia,
+        "envio": percentiles(res.envio), "primer_render": percentiles(res.primer_render),
+        "filtros_admin": percentiles(res.filtros),
+        "envios_confirmados": len(confirmados), "envios_fallidos": res.fallidos,
+        "throughput_envios_s": len(confirmados) / duracion if duracion else 0.0, "duracion_s": duracion,
+        "vaciado_s": t_vaciado, "filas_pendientes": pendientes,
+        "escrituras_perdidas": len(perdidos), "escrituras_duplicadas": int((en_repo > 1).sum()),
+        "llamadas_api": dict(gh.repo.llamadas), "errores": dict(res.errores),
+    }
+
+    print(f"sesiones: {args.sesiones} empleados + {args.admins} admins · latencia API {args.latencia * 1000:.0f} ms")
+    print(_linea("envío (✅ Guardar)", resumen["envio"]))
+    print(_linea("primer render", resumen["primer_render"]))
+    print(_linea("filtros admin", resumen["filtros_admin"]))
+    print(f"throughput            {resumen['throughput_envios_s']:.1f} envíos/s "
+          f"({len(confirmados)} confirmados, {res.fallidos} fallidos, {duracion:.1f} s)")
+    print(f"vaciado de colas      {t_vaciado:.1f} s · {pendientes} fila(s) aún en el diario")
+    print(f"API                   {dict(gh.repo.llamadas)}")
+    print(f"escrituras perdidas   {len(perdidos)}" + (f" (p. ej. {perdidos[:3]})" if perdidos else ""))
+    print(f"escrituras duplicadas {resumen['escrituras_duplicadas']}")
+    for error, n in res.errores.most_common(5):
+        print(f"error x{n}: {error}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(resumen, fh, indent=1, default=float)
+    return 1 if perdidos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Memoria y ``groupby`` de los registros con y sin el esquema compacto.
+
+Uso: ``python benchmarks/bench_esquemas.py --rows 1000000``
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from productividad.esquemas import (  # noqa: E402
+    REGISTRO_APP, REGISTRO_EMPRESARIAL, REGISTRO_PORTAL, REGISTRO_SIMPLE, REGISTROS_ADMIN,
+    aplicar_esquema, dtypes_csv, reporte_memoria,
+)
+
+ESQUEMAS = {
+    "portal": REGISTRO_PORTAL,
+    "empresarial": REGISTRO_EMPRESARIAL,
+    "simple": REGISTRO_SIMPLE,
+    "app": REGISTRO_APP,
+    "admin": REGISTROS_ADMIN,
+}
+
+
+def sintetico(n, seed=0):
+    rng = np.random.default_rng(seed)
+    fechas = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 730, n), unit="D")
+    return pd.DataFrame({
+        "Fecha": fechas.strftime("%Y-%m-%d"),
+        "Empleado": rng.choice([f"Empleado {i:03d}" for i in range(300)], n),
+        "Área": rng.choice(["PQRS", "Reclamos", "Back office"], n),
+        "Lider": rng.choice(["Alejandra Puentes", "Carlos Sierra", "Edisson Ramirez", "Gabrielle Monroy"], n),
+        "Tipo": rng.choice(["Productividad", "Variable"], n),
+        "Numero_Caso": rng.integers(1_000_000, 9_999_999, n).astype(str),
+        "Estado": rng.choice(["Finalizado", "Defensoria", "Tutela"], n),
+        "Horas_Extra": rng.integers(0, 4, n),
+        "Mes": fechas.strftime("%Y-%m"),
+        "Año": fechas.year,
+    })
+
+
+def medir(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - t0, out
+
+
+def agrupar(df):
+    return df.groupby(["Empleado", "Mes"], observed=True)["Horas_Extra"].sum()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--csv", help="CSV de registros a medir (por defecto uno sintético)")
+    ap.add_argument("--esquema", choices=sorted(ESQUEMAS), default="portal")
+    args = ap.parse_args()
+
+    esquema = ESQUEMAS[args.esquema]
+    path = args.csv
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "registros.csv")
+        sintetico(args.rows).to_csv(path, index=False)
+
+    t_antes, antes = medir(pd.read_csv, path)
+    t_despues, despues = medir(lambda: aplicar_esquema(pd.read_csv(path, dtype=dtypes_csv(esquema)), esquema))
+
+    pd.set_option("display.width", 160)
+    print(f"filas: {len(antes):,}")
+    print(reporte_memoria(antes, despues).to_string())
+    print(f"\nlectura      : {t_antes:7.3f} s -> {t_despues:7.3f} s (con esquema)")
+    if {"Empleado", "Mes", "Horas_Extra"} <= set(antes.columns):
+        g_antes, _ = medir(agrupar, antes)
+        g_despues, _ = medir(agrupar, despues)
+        print(f"groupby E x M: {g_antes:7.3f} s -> {g_despues:7.3f} s ({g_antes / g_despues:,.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
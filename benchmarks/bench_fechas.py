@@ -0,0 +1,62 @@
+"""Micro-benchmark: backfill de Mes/Año fila a fila vs ``fill_mes_anio``.
+
+Uso: ``python benchmarks/bench_fechas.py --rows 200000``
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from productividad.fechas import fill_mes_anio, month_str  # noqa: E402
+
+
+def datos(n, seed=0):
+    rng = np.random.default_rng(seed)
+    dias = pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 1000, n), unit="D")
+    return pd.DataFrame({"Fecha": dias.strftime("%Y-%m-%d"), "Empleado": "x"})
+
+
+def por_fila(df):
+    """El camino anterior de las apps (un ``pd.to_datetime`` por fila)."""
+    df["Mes"] = df.apply(lambda r: month_str(r.get("Fecha", "")), axis=1)
+    df["Año"] = pd.to_datetime(df["Fecha"], errors="coerce").dt.year
+    return df
+
+
+def medir(fn, df, repeat):
+    mejores = []
+    for _ in range(repeat):
+        copia = df.copy()
+        t0 = time.perf_counter()
+        out = fn(copia)
+        mejores.append(time.perf_counter() - t0)
+    return min(mejores), out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, default=200_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    df = datos(args.rows)
+    t_fila, ref = medir(por_fila, df, args.repeat)
+    t_vec, out = medir(fill_mes_anio, df, args.repeat)
+    # Con Mes/Año ya presentes no se parsea nada
+    t_noop, _ = medir(fill_mes_anio, out, args.repeat)
+
+    assert ref["Mes"].tolist() == out["Mes"].tolist()
+    assert ref["Año"].astype(int).tolist() == out["Año"].astype(int).tolist()
+    print(f"filas: {args.rows:,}")
+    print(f"month_str por fila : {t_fila:8.3f} s")
+    print(f"fill_mes_anio      : {t_vec:8.3f} s  ({t_fila / t_vec:,.0f}x)")
+    print(f"ya completos       : {t_noop:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Suite de benchmarks de almacenamiento y agregación a 10k/100k/1M filas.
+
+Uso: ``python benchmarks/bench_suite.py --filas 10000 100000 --repeat 5``
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from productividad import sintetico  # noqa: E402
+from productividad.dup_index import DuplicateIndex  # noqa: E402
+from productividad.esquemas import (  # noqa: E402
+    REGISTRO_EMPRESARIAL, REGISTRO_PORTAL, REGISTRO_SIMPLE, REGISTROS_ADMIN, aplicar_esquema,
+)
+from productividad.fechas import fill_mes_anio  # noqa: E402
+from productividad.graficos import lineas, render_png  # noqa: E402
+from productividad.ledger import LocalLedger  # noqa: E402
+from productividad.resumenes import (  # noqa: E402
+    PORTAL_COLS, VALORIZADO_PORTAL, marcar_variables, resumen_empresarial, resumen_portal, resumen_simple,
+)
+from productividad.shared_data import invalidate  # noqa: E402
+from productividad.sqlite_store import SQLiteStore  # noqa: E402
+from productividad.storage import append_csv, load_csv  # noqa: E402
+from productividad.tablas import pagina  # noqa: E402
+from productividad.tarifas import TariffHistory  # noqa: E402
+
+NUEVAS = 50  # filas de un envío
+
+
+def medir(fn, repeat, preparar=None):
+    """Mejor tiempo de ``fn(preparar())`` (la preparación no se mide)."""
+    mejores = []
+    for _ in range(repeat):
+        arg = preparar() if preparar else None
+        t0 = time.perf_counter()
+        fn(arg) if preparar else fn()
+        mejores.append(time.perf_counter() - t0)
+    return min(mejores)
+
+
+def casos(n, carpeta, repeat):
+    """{operación: segundos} con ``n`` filas; los archivos van a ``carpeta``."""
+    t = {}
+    crudo = sintetico.registros("portal", n)
+    nuevas = sintetico.registros("portal", NUEVAS, seed=1).to_dict("records")
+    tarifas = TariffHistory.from_frame(sintetico.tarifas("portal"))
+
+    # ---- Carga ----
+    path = os.path.join(carpeta, sintetico.ARCHIVOS["portal"])
+    crudo.to_csv(path, index=False, encoding="utf-8-sig")
+
+    def cargar():
+        invalidate(path)
+        return load_csv(path)
+    t["carga CSV (esquema)"] = medir(cargar, repeat)
+    df = cargar()
+
+    db_path = os.path.join(carpeta, "bench.db")
+
+    def importar(_):
+        SQLiteStore(db_path).import_csv("registros", path)
+    t["importar CSV a SQLite"] = medir(importar, 1, lambda: os.path.exists(db_path) and os.remove(db_path))
+    db = SQLiteStore(db_path)
+    t["carga SQLite (todo)"] = medir(lambda: db.read_table("registros"), repeat)
+    emp, mes = crudo["Empleado"].iloc[0], crudo["Mes"].iloc[0]
+    t["carga SQLite (empleado-mes)"] = medir(lambda: db.read_table("registros", {"Empleado": emp, "Mes": mes}), repeat)
+
+    # ---- Append ----
+    t["append CSV"] = medir(lambda: append_csv(pd.DataFrame(nuevas), path), repeat)
+    ledger = LocalLedger(os.path.join(carpeta, "ledger.csv"), PORTAL_COLS)
+    t["append LocalLedger"] = medir(lambda: ledger.append(nuevas), repeat)
+    t["append SQLite"] = medir(lambda: db.append_table("registros", pd.DataFrame(nuevas)), repeat)
+
+    # ---- Backfill ----
+    t["backfill Mes/Año"] = medir(fill_mes_anio, repeat, lambda: crudo.drop(columns=["Mes", "Año"]))
+
+    # ---- Duplicados ----
+    reg_admin = aplicar_esquema(sintetico.registros("admin", n), REGISTROS_ADMIN)
+    dup_dir = os.path.join(carpeta, "dup")
+    version = iter(range(10 ** 6))
+    t["índice duplicados (reconstruir)"] = medir(
+        lambda: DuplicateIndex(f"bench{next(version)}", index_dir=dup_dir).ensure(0, lambda: reg_admin), repeat)
+    indice = DuplicateIndex("bench", index_dir=dup_dir).ensure(0, lambda: reg_admin)
+    # Otra versión con las mismas filas (p. ej. el diario ya subido): se reutiliza lo indexado
+    t["índice duplicados (versión nueva)"] = medir(lambda: indice.ensure(next(version), lambda: reg_admin), repeat)
+    emp_admin = reg_admin["Empleado"].iloc[0]
+    lote = reg_admin["Numero_caso"].head(100).tolist()
+    t["duplicados (consulta 100 casos)"] = medir(lambda: indice.lookup(emp_admin, lote), repeat)
+    t["duplicated() vectorizado"] = medir(
+        lambda: reg_admin.duplicated(subset=["Empleado", "Numero_caso"], keep=False), repeat)
+
+    # ---- Resúmenes y tarifas ----
+    def resumen(factory, app, esquema, pricing):
+        datos = aplicar_esquema(sintetico.registros(app, n), esquema)
+        agg = factory(lambda: datos, lambda: "bench", pricing)
+        return lambda: agg.fold(datos)
+    t["resumen mensual portal"] = medir(resumen(resumen_portal, "portal", REGISTRO_PORTAL, tarifas), repeat)
+    for app, factory, esquema in (("empresarial", resumen_empresarial, REGISTRO_EMPRESARIAL),
+                                  ("simple", resumen_simple, REGISTRO_SIMPLE)):
+        pricing = TariffHistory.from_frame(sintetico.tarifas(app))
+        t[f"resumen mensual {app}"] = medir(resumen(factory, app, esquema, pricing), repeat)
+    t["tarifas por fecha (portal)"] = medir(
+        lambda: tarifas.price_columns(marcar_variables(df.copy()), VALORIZADO_PORTAL, "Fecha"), repeat)
+
+    # ---- Gráfica y tabla ----
+    def grafica():
+        dia = df.groupby(["Fecha", "Lider"], observed=True).size().unstack(fill_value=0)
+        return render_png(lambda ax: lineas(ax, dia, "Casos por día", "Fecha", "Casos"))
+    t["gráfica (pivote + PNG)"] = medir(grafica, repeat)
+    version_tabla = iter(range(10 ** 6))
+    t["tabla (ordenar + página)"] = medir(
+        lambda: pagina(df, "bench", next(version_tabla), por=("Empleado", "Fecha")), repeat)
+    return t
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--filas", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--json", help="guardar los resultados en este archivo")
+    args = ap.parse_args()
+
+    resultados = {}
+    for n in args.filas:
+        carpeta = tempfile.mkdtemp(prefix="bench_suite_")
+        try:
+            resultados[n] = casos(n, carpeta, args.repeat)
+        finally:
+            shutil.rmtree(carpeta, ignore_errors=True)
+        print(f"{n:,} filas listas", file=sys.stderr)
+
+    tabla = pd.DataFrame(resultados)
+    tabla.columns = [f"{n:,}" for n in tabla.columns]
+    pd.set_option("display.width", 160)
+    print(tabla.map(lambda s: f"{s:8.4f}").to_string())
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(resultados, fh, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Benchmark del motor de tarifas contra los caminos anteriores.
+
+Uso: ``python benchmarks/bench_tarifas.py --rows 1000000``
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from productividad.tarifas import TariffHistory, TariffTable  # noqa: E402
+
+CONFIG = {"valor_prod": 3500.0, "valor_adic": 4000.0, "valor_sabado": 5000.0}
+TIPOS = ["Productividad", "Adicional", "Meta sábado"]
+CONCEPTOS = pd.DataFrame({"Concepto": [f"Caso {c}" for c in "ABCDEFGH"], "Tarifa": np.arange(1, 9) * 1000.0})
+
+
+def datos(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Empleado": rng.choice([f"E{i:03d}" for i in range(200)], n),
+        "Mes": rng.choice([f"2025-{m:02d}" for m in range(1, 13)], n),
+        "Tipo_caso": rng.choice(TIPOS, n),
+        "Variable_Tipo": rng.choice(CONCEPTOS["Concepto"].tolist() + ["Otro"], n),
+        "Cantidad": rng.integers(0, 5, n),
+        "Fecha": (pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 365, n), unit="D")).strftime("%Y-%m-%d"),
+    })
+
+
+def historial():
+    """Cada concepto cambia de tarifa una vez por trimestre."""
+    trimestres = ["", "2025-04-01", "2025-07-01", "2025-10-01"]
+    return pd.concat(
+        [CONCEPTOS.assign(Tarifa=CONCEPTOS["Tarifa"] * (1 + i / 10), Vigente_desde=d) for i, d in enumerate(trimestres)],
+        ignore_index=True,
+    )
+
+
+def por_merge_asof(df, hist):
+    der = hist.assign(Desde=pd.to_datetime(hist["Vigente_desde"]).fillna(pd.Timestamp("1900-01-01")))
+    izq = df.assign(_pos=np.arange(len(df)), _f=pd.to_datetime(df["Fecha"])).sort_values("_f")
+    m = pd.merge_asof(izq, der.sort_values("Desde"), left_on="_f", right_on="Desde",
+                      left_by="Variable_Tipo", right_by="Concepto")
+    m = m.sort_values("_pos")
+    return m["Tarifa"].fillna(0.0).to_numpy() * m["Cantidad"].to_numpy()
+
+
+def valor_fila(fila):
+    if fila["Tipo_caso"] == "Productividad":
+        return CONFIG["valor_prod"]
+    elif fila["Tipo_caso"] == "Adicional":
+        return CONFIG["valor_adic"]
+    else:
+        return CONFIG["valor_sabado"]
+
+
+def por_fila(df):
+    return df.apply(valor_fila, axis=1)
+
+
+def por_merge(df):
+    tar = CONCEPTOS.rename(columns={"Tarifa": "Tarifa_Variable"})
+    m = df.merge(tar, left_on="Variable_Tipo", right_on="Concepto", how="left")
+    return pd.to_numeric(m["Tarifa_Variable"], errors="coerce").fillna(0.0) * m["Cantidad"]
+
+
+def medir(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - t0, out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--apply-rows", type=int, default=200_000,
+                    help="filas para el camino con apply (se extrapola a --rows)")
+    args = ap.parse_args()
+
+    df = datos(args.rows)
+    caso = TariffTable.from_config(CONFIG, {"Productividad": "valor_prod", "Adicional": "valor_adic"}, "valor_sabado")
+    concepto = TariffTable.from_frame(CONCEPTOS)
+
+    muestra = df.head(args.apply_rows)
+    t_apply, ref = medir(por_fila, muestra)
+    t_apply *= len(df) / len(muestra)
+    t_caso, val = medir(caso.price, df, "Tipo_caso")
+    assert np.allclose(ref.to_numpy(), val.head(len(muestra)).to_numpy())
+
+    t_merge, ref2 = medir(por_merge, df)
+    t_conc, val2 = medir(concepto.price, df, "Variable_Tipo", "Cantidad")
+    assert np.allclose(ref2.to_numpy(), val2.to_numpy())
+
+    t_tot, tot = medir(concepto.totals, df, "Variable_Tipo", ["Empleado", "Mes"], "Cantidad")
+
+    hist = historial()
+    vigencias = TariffHistory.from_frame(hist)
+    t_asof, ref3 = medir(por_merge_asof, df, hist)
+    t_hist, val3 = medir(vigencias.price, df, "Variable_Tipo", "Fecha", "Cantidad")
+    assert np.allclose(ref3, val3.to_numpy())
+
+    print(f"filas: {len(df):,}")
+    print(f"valor_fila + apply : {t_apply:8.3f} s  (extrapolado de {len(muestra):,} filas)")
+    print(f"TariffTable.price  : {t_caso:8.3f} s  ({t_apply / t_caso:,.0f}x)")
+    print(f"merge por concepto : {t_merge:8.3f} s")
+    print(f"TariffTable.price  : {t_conc:8.3f} s  ({t_merge / t_conc:,.1f}x)")
+    print(f"totals por Empleado x Mes: {t_tot:8.3f} s  ({len(tot):,} grupos)")
+    print(f"merge_asof por fecha   : {t_asof:8.3f} s")
+    print(f"TariffHistory.price    : {t_hist:8.3f} s  ({t_asof / t_hist:,.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Servidor local que imita la Contents API de GitHub (para pruebas de carga).
+
+Uso: ``python benchmarks/gh_local.py --port 8765 --latencia 0.15``
+"""
+import argparse
+import base64
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+
+_RUTA = re.compile(r"^/repos/[^/]+/[^/]+/contents/?(.*)$")
+
+
+def blob_sha(data):
+    """sha de blob de git (el que devuelve la API)."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class Repo:
+    """Archivos en memoria: ruta -> bytes, con contadores de llamadas."""
+
+    def __init__(self, files=None):
+        self.files = dict(files or {})
+        self.lock = threading.Lock()
+        self.llamadas = Counter()
+
+    def listar(self, ruta):
+        prefijo = ruta.rstrip("/") + "/"
+        hijos = {}
+        for path, data in self.files.items():
+            if not path.startswith(prefijo):
+                continue
+            resto = path[len(prefijo):]
+            nombre = resto.split("/", 1)[0]
+            if "/" in resto:
+                # El sha de un directorio cambia con cualquier archivo de adentro (como el de un tree)
+                d = hijos.setdefault(nombre, {"name": nombre, "path": prefijo + nombre, "type": "dir",
+                                              "_h": hashlib.sha1()})
+                d["_h"].update(f"{path}\0{blob_sha(data)}\0".encode())
+            else:
+                hijos[nombre] = {"name": nombre, "path": path, "sha": blob_sha(data), "size": len(data), "type": "file"}
+        for d in hijos.values():
+            if "_h" in d:
+                d["sha"] = d.pop("_h").hexdigest()
+        return sorted(hijos.values(), key=lambda e: e["name"])
+
+    def get(self, ruta):
+        """``(status, cuerpo, etag)``."""
+        with self.lock:
+            self.llamadas["GET"] += 1
+            if ruta in self.files:
+                data = self.files[ruta]
+                sha = blob_sha(data)
+                cuerpo = {"name": ruta.rsplit("/", 1)[-1], "path": ruta, "sha": sha, "size": len(data),
+                          "type": "file", "encoding": "base64", "content": base64.b64encode(data).decode()}
+                return 200, cuerpo, f'"{sha}"'
+            items = self.listar(ruta)
+        if items:
+            return 200, items, '"' + hashlib.sha1(json.dumps(items).encode()).hexdigest() + '"'
+        return 404, {"message": "Not Found"}, None
+
+    def put(self, ruta, body):
+        with self.lock:
+            self.llamadas["PUT"] += 1
+            actual = self.files.get(ruta)
+            if actual is not None and body.get("sha") != blob_sha(actual):
+                self.llamadas["409"] += 1
+                return 409, {"message": f"{ruta} does not match {body.get('sha')}"}
+            if actual is None and body.get("sha"):
+                self.llamadas["422"] += 1
+                return 422, {"message": "sha wasn't supplied"}
+            data = base64.b64decode(body["content"])
+            self.files[ruta] = data
+            return (200 if actual is not None else 201), {"content": {"path": ruta, "sha": blob_sha(data)},
+                                                         "commit": {"message": body.get("message", "")}}
+
+    def delete(self, ruta, body):
+        with self.lock:
+            self.llamadas["DELETE"] += 1
+            actual = self.files.get(ruta)
+            if actual is None:
+                return 404, {"message": "Not Found"}
+            if body.get("sha") != blob_sha(actual):
+                self.llamadas["409"] += 1
+                return 409, {"message": "sha mismatch"}
+            del self.files[ruta]
+            return 200, {"commit": {"message": body.get("message", "")}}
+
+
+def _handler(repo, latencia):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _ruta(self):
+            m = _RUTA.match(urlparse(self.path).path)
+            return unquote(m.group(1)).strip("/") if m else None
+
+        def _body(self):
+            n = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(n) or b"{}")
+
+        def _responder(self, status, cuerpo=None, etag=None):
+            data = b"" if cuerpo is None else json.dumps(cuerpo).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            if etag:
+                self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _atender(self, metodo):
+            if latencia:
+                time.sleep(latencia)
+            ruta = self._ruta()
+            if ruta is None:
+                return self._responder(404, {"message": "Not Found"})
+            if metodo == "GET":
+                status, cuerpo, etag = repo.get(ruta)
+                if status == 200 and etag and self.headers.get("If-None-Match") == etag:
+                    return self._responder(304, None, etag)
+                return self._responder(status, cuerpo, etag)
+            body = self._body()
+            status, cuerpo = repo.put(ruta, body) if metodo == "PUT" else repo.delete(ruta, body)
+            self._responder(status, cuerpo)
+
+        def do_GET(self):
+            self._atender("GET")
+
+        def do_PUT(self):
+            self._atender("PUT")
+
+        def do_DELETE(self):
+            self._atender("DELETE")
+
+    return Handler
+
+
+class LocalGitHub:
+    """``ThreadingHTTPServer`` en un hilo: ``url`` va al secret ``GITHUB_API_URL``."""
+
+    def __init__(self, port=0, latencia=0.0, files=None):
+        self.repo = Repo(files)
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), _handler(self.repo, latencia))
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._hilo = None
+
+    def start(self):
+        self._hilo = threading.Thread(target=self.server.serve_forever, name="gh-local", daemon=True)
+        self._hilo.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latencia", type=float, default=0.0, help="segundos de espera por llamada")
+    args = ap.parse_args()
+    gh = LocalGitHub(args.port, args.latencia)
+    print(f"Contents API local en {gh.url} (secret GITHUB_API_URL)")
+    try:
+        gh.server.serve_forever()
+    except KeyboardInterrupt:
+        gh.stop()
+
+
+if __name__ == "__main__":
+    main()
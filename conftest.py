@@ -0,0 +1 @@
+"""Raíz del repo en ``sys.path`` para que los tests importen ``productividad``."""
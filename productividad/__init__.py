@@ -0,0 +1 @@
+"""Utilidades compartidas por las apps de productividad BBVA."""
@@ -0,0 +1,229 @@
+"""Resumen mensual materializado por (Empleado, Mes), actualizado con cada envío."""
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from productividad.fechas import month_str
+from productividad.por_proceso import unica
+
+
+class MonthlyAggregate:
+    """Sumas por ``keys`` (+ ``dims`` para filtrar) de las columnas de ``measures``.
+
+    - ``measures``: {columna_resumen: columna_fuente} (se suman).
+    - ``prepare(df) -> df``: agrega columnas derivadas antes de sumar.
+    - ``load_source() -> df``: todas las filas (solo para reconstruir).
+    - ``version() -> str``: firma barata de la fuente (ver ``file_version``).
+    - ``priced``: {columna_resumen: (concepto, columna_cantidad)} valorizadas
+      con ``pricing`` según ``date_col``.
+    """
+
+    def __init__(self, path, keys, measures, load_source, version, dims=(), prepare=None,
+                 pricing=None, priced=None, date_col="Fecha", month_col="Mes"):
+        self.path = path
+        self.keys = list(keys)
+        self.dims = list(dims)
+        self.measures = dict(measures)
+        self.load_source = load_source
+        self.version = version
+        self.prepare = prepare
+        self.pricing = pricing
+        self.priced = dict(priced or {})
+        self.date_col = date_col
+        self.month_col = month_col
+        self._lock = threading.RLock()
+        self._df = None
+        self._meta = None
+
+    @property
+    def sums(self):
+        return list(self.measures) + list(self.priced)
+
+    @property
+    def columns(self):
+        return self.keys + self.dims + self.sums
+
+    def schema(self):
+        schema = {"keys": self.keys, "dims": self.dims, "measures": self.measures}
+        if self.priced:
+            schema["priced"] = {dst: list(v) for dst, v in self.priced.items()}
+        return schema
+
+    def _tarifas(self):
+        return self.pricing.firma() if self.pricing is not None and self.priced else None
+
+    def _nuevo_meta(self, version):
+        return {"schema": self.schema(), "version": version, "tarifas": self._tarifas()}
+
+    # ---- Cálculo ----
+    def fold(self, df):
+        """Agregado de un lote de filas (no toca lo guardado)."""
+        if df is None or len(df) == 0:
+            return pd.DataFrame(columns=self.columns)
+        return self._sumar(self._preparar(df))
+
+    def _preparar(self, df):
+        df = pd.DataFrame(df)
+        if self.prepare is not None:
+            df = self.prepare(df.copy())
+        return df
+
+    def _sumar(self, df):
+        if len(df) == 0:
+            return pd.DataFrame(columns=self.columns)
+        out = pd.DataFrame(index=df.index)
+        for c in self.keys:
+            out[c] = df[c].astype("string") if c in df.columns else pd.NA
+        for c in self.dims:
+            out[c] = df[c].astype("string").fillna("") if c in df.columns else ""
+        for dst, src in self.measures.items():
+            out[dst] = pd.to_numeric(df[src], errors="coerce").fillna(0) if src in df.columns else 0
+        fechas = df[self.date_col] if self.date_col in df.columns else pd.Series(pd.NaT, index=df.index)
+        for dst, (concepto, qty) in self.priced.items():
+            cantidad = pd.to_numeric(df[qty], errors="coerce").fillna(0) if qty in df.columns else 0
+            tarifa = self.pricing.rates(np.full(len(df), concepto, dtype=object), fechas) if self.pricing is not None else 0.0
+            out[dst] = cantidad * tarifa
+        # Igual que el groupby de antes: las filas sin Empleado/Mes no cuentan
+        out = out.dropna(subset=self.keys)
+        return out.groupby(self.keys + self.dims, as_index=False, observed=True)[self.sums].sum()
+
+    def _merge(self, base, part):
+        if base is None or base.empty:
+            return part
+        if part.empty:
+            return base
+        both = pd.concat([base, part], ignore_index=True)
+        return both.groupby(self.keys + self.dims, as_index=False, observed=True)[self.sums].sum()
+
+    # ---- Persistencia ----
+    @property
+    def _csv(self):
+        return f"{self.path}.csv"
+
+    @property
+    def _json(self):
+        return f"{self.path}.json"
+
+    def _read_disk(self):
+        try:
+            with open(self._json, encoding="utf-8") as fh:
+                meta = json.load(fh)
+            df = pd.read_csv(self._csv, dtype={c: "string" for c in self.keys + self.dims}, keep_default_na=False)
+        except (OSError, ValueError):
+            return None, None
+        return df, meta
+
+    def _write_disk(self, df, meta):
+        # CSV primero: si el proceso muere entre los dos, el .json viejo no coincide y se reconstruye
+        tmp = f"{self._csv}.tmp"
+        df.to_csv(tmp, index=False)
+        os.replace(tmp, self._csv)
+        tmp = f"{self._json}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(meta, fh)
+        os.replace(tmp, self._json)
+        self._df, self._meta = df, meta
+
+    def _al_dia(self, meta, version):
+        return (
+            bool(meta) and meta.get("schema") == self.schema() and meta.get("version") == version
+            and meta.get("tarifas") == self._tarifas()
+        )
+
+    def _cambio_tarifas(self, meta, version):
+        """Fecha desde la que hay que revalorizar si lo único que cambió son las tarifas."""
+        if not meta or meta.get("schema") != self.schema() or meta.get("version") != version:
+            return None
+        if self._tarifas() is None or self._df is None:
+            return None
+        return self.pricing.cambio_desde(meta.get("tarifas"))
+
+    # ---- API ----
+    def get(self):
+        """Agregado completo (copia), reconstruido solo si quedó desactualizado."""
+        with self._lock:
+            version = self.version()
+            if not self._al_dia(self._meta, version):
+                self._df, self._meta = self._read_disk()
+                if not self._al_dia(self._meta, version):
+                    self.rebuild(desde=self._cambio_tarifas(self._meta, version))
+            return self._df.copy()
+
+    def view(self, filters=None, frame=None):
+        """Filtra por ``{columna: valor o lista}`` y re-suma por ``keys``.
+
+        ``frame`` permite usar un agregado ya calculado con ``fold`` en vez del guardado.
+        """
+        df = self.get() if frame is None else frame
+        for col, val in (filters or {}).items():
+            if val is None or col not in df.columns:
+                continue
+            vals = list(val) if isinstance(val, (list, tuple, set)) else [val]
+            if vals:
+                df = df[df[col].isin([str(v) for v in vals])]
+        return df.groupby(self.keys, as_index=False, observed=True)[self.sums].sum()
+
+    def distinct(self, column, filters=None):
+        df = self.get()
+        if column not in df.columns:
+            return []
+        return sorted(v for v in df[column].dropna().unique().tolist() if str(v).strip() != "")
+
+    def append(self, rows, write):
+        """Escribe ``rows`` con ``write(rows)`` y suma solo esas filas al agregado.
+
+        Si el agregado no estaba al día con la fuente justo antes de escribir,
+        no se toca: la próxima lectura lo reconstruye.
+        """
+        with self._lock:
+            antes = self.version()
+            if not self._al_dia(self._meta, antes):
+                self._df, self._meta = self._read_disk()
+            result = write(rows)
+            if result is not False and self._al_dia(self._meta, antes):
+                df = self._merge(self._df, self.fold(rows))
+                self._write_disk(df, self._nuevo_meta(self.version()))
+            return result
+
+    def rebuild(self, desde=None):
+        """Recalcula desde todas las filas (cambio de esquema o reparación).
+
+        Con ``desde`` (fecha de un cambio de tarifas) los meses anteriores se
+        conservan tal cual y solo se vuelven a sumar las filas desde ese mes.
+        """
+        with self._lock:
+            version = self.version()
+            if desde is None or self._df is None:
+                df = self.fold(self.load_source())
+            else:
+                mes = month_str(desde)
+                meses = self._df[self.month_col].astype("string").fillna("")
+                # Sin mes = sin fecha: se valorizan con la tarifa actual, nunca quedan cerradas
+                cerrado = meses.ne("") & meses.lt(mes)
+                src = self._preparar(self.load_source())
+                src_mes = src[self.month_col].astype("string").fillna("") if self.month_col in src.columns else None
+                if src_mes is not None:
+                    src = src[~(src_mes.ne("") & src_mes.lt(mes))]
+                df = self._merge(self._df[cerrado], self._sumar(src))
+            self._write_disk(df, self._nuevo_meta(version))
+            return len(df)
+
+
+def get_aggregate(path, keys, measures, load_source, version, dims=(), prepare=None,
+                  pricing=None, priced=None, date_col="Fecha", month_col="Mes"):
+    """Se reemplaza si cambió el esquema; si no, toma los helpers del último rerun."""
+    nuevo = MonthlyAggregate(path, keys, measures, load_source, version, dims, prepare,
+                             pricing, priced, date_col, month_col)
+
+    def actualizar(agg):
+        if agg.schema() != nuevo.schema():
+            return nuevo
+        agg.load_source, agg.version, agg.prepare = load_source, version, prepare
+        # Sin tarifas nuevas se conservan las que ya tiene: el agregado lo comparten todas las sesiones
+        if pricing is not None:
+            agg.pricing = pricing
+
+    return unica("aggregates", path, lambda: nuevo, actualizar)
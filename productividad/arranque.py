@@ -0,0 +1,146 @@
+"""Perfil de arranque en frío de las apps: importaciones y primer render.
+
+Uso: ``python -m productividad.arranque [--presupuesto app=segundos]``
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APPS = ("app_employee.py", "app.py", "app_simple.py", "app_enterprise.py", "app_portal_unico.py", "app_admin.py")
+PRESUPUESTOS = {
+    "app_employee.py": float(os.getenv("PRESUPUESTO_EMPLEADO_S", "1.5")),
+    "app_portal_unico.py": float(os.getenv("PRESUPUESTO_PORTAL_S", "1.5")),
+}
+MARCA = "##arranque##"
+
+# Corre en el proceso hijo: streamlit se importa antes de la marca
+_HIJO = f"""
+import json, sys, time
+import streamlit
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=float(sys.argv[2]))
+at.secrets.update(json.loads(sys.argv[3]))
+antes = set(sys.modules)
+print({MARCA!r}, file=sys.stderr, flush=True)
+t0 = time.perf_counter()
+at.run()
+render = time.perf_counter() - t0
+errores = [str(e.value) for e in at.exception]
+print(json.dumps({{"render": render, "errores": errores[:1], "modulos": len(set(sys.modules) - antes)}}))
+"""
+
+
+def _importaciones(log):
+    """Segundos de importación (propios) por paquete raíz, después de la marca."""
+    _, _, despues = log.partition(MARCA)
+    paquetes = {}
+    for linea in despues.splitlines():
+        if not linea.startswith("import time:"):
+            continue
+        partes = linea[len("import time:"):].split("|")
+        try:
+            propio = int(partes[0]) / 1e6
+        except ValueError:
+            continue  # encabezado
+        raiz = partes[2].strip().split(".")[0]
+        paquetes[raiz] = paquetes.get(raiz, 0.0) + propio
+    return paquetes
+
+
+def leer_secrets(path):
+    """Secrets de la app (TOML); sin archivo, los del modo local (CSV)."""
+    if not path or not os.path.exists(path):
+        # AppTest sin ninguna clave no crea secrets y ``"X" in st.secrets`` falla
+        return {"STORAGE_BACKEND": "csv"}
+    import tomllib
+
+    with open(path, "rb") as fh:
+        return tomllib.load(fh)
+
+
+def medir(app, directorio=".", timeout=60.0, secrets=None):
+    """Un arranque en frío de ``app``: ``{"importaciones", "render", "paquetes", "errores"}``."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _HIJO, app, str(timeout), json.dumps(secrets or {})],
+        cwd=directorio, capture_output=True, text=True, timeout=timeout + 60,
+    )
+    salida = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not salida:
+        error = (proc.stderr.strip().splitlines() or ["sin salida"])[-1]
+        return {"importaciones": None, "render": None, "paquetes": {}, "errores": [error]}
+    res = json.loads(salida[-1])
+    paquetes = _importaciones(proc.stderr)
+    res["paquetes"] = paquetes
+    res["importaciones"] = sum(paquetes.values())
+    return res
+
+
+def perfil(app, directorio=".", veces=3, timeout=60.0, secrets=None):
+    """Mediana de ``veces`` arranques en frío (cada uno en un proceso nuevo)."""
+    corridas = [medir(app, directorio, timeout, secrets) for _ in range(veces)]
+    buenas = [c for c in corridas if not c["errores"]]
+    if not buenas:
+        return corridas[0]
+    paquetes = {}
+    for c in buenas:
+        for raiz, s in c["paquetes"].items():
+            paquetes.setdefault(raiz, []).append(s)
+    return {
+        "importaciones": statistics.median(c["importaciones"] for c in buenas),
+        "render": statistics.median(c["render"] for c in buenas),
+        "paquetes": {raiz: statistics.median(v) for raiz, v in paquetes.items()},
+        "errores": [],
+    }
+
+
+def _presupuestos(valores):
+    out = dict(PRESUPUESTOS)
+    for v in valores or []:
+        app, _, seg = v.partition("=")
+        out[app] = float(seg)
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Perfil de arranque en frío: importaciones y primer render por app.")
+    ap.add_argument("--app", action="append", choices=APPS, help="app a medir (repetible; por defecto todas)")
+    ap.add_argument("--dir", default=".", help="carpeta de las apps (y de sus datos)")
+    ap.add_argument("--secrets", help="secrets.toml de las apps (por defecto <dir>/.streamlit/secrets.toml)")
+    ap.add_argument("--veces", type=int, default=3, help="arranques por app (se informa la mediana)")
+    ap.add_argument("--top", type=int, default=4, help="paquetes más pesados a mostrar")
+    ap.add_argument("--presupuesto", action="append", metavar="APP=SEG", help="presupuesto de primer render")
+    ap.add_argument("--json", action="store_true", help="resultado como JSON")
+    args = ap.parse_args(argv)
+
+    presupuestos = _presupuestos(args.presupuesto)
+    secrets = leer_secrets(args.secrets or os.path.join(args.dir, ".streamlit", "secrets.toml"))
+    resultados = {app: perfil(app, args.dir, args.veces, secrets=secrets) for app in args.app or APPS}
+    fallas = 0
+    for app, res in resultados.items():
+        limite = presupuestos.get(app)
+        res["presupuesto"] = limite
+        res["ok"] = not res["errores"] and (limite is None or res["render"] <= limite)
+        # Falla si excede su presupuesto o si la app falla (tenga presupuesto o no)
+        fallas += not res["ok"]
+    if args.json:
+        print(json.dumps(resultados, indent=1))
+        return 1 if fallas else 0
+
+    print(f"{'app':<22} {'importaciones':>13} {'primer render':>14} {'presupuesto':>12}  paquetes más pesados")
+    for app, res in resultados.items():
+        if res["errores"]:
+            print(f"{app:<22} {'error':>13} {'':>14} {'':>12}  {res['errores'][0][:80]}")
+            continue
+        limite = res["presupuesto"]
+        estado = "" if limite is None else f"{limite:.2f} s {'ok' if res['ok'] else 'EXCEDE'}"
+        pesados = sorted(res["paquetes"].items(), key=lambda kv: -kv[1])[:args.top]
+        detalle = " · ".join(f"{raiz} {s:.2f}" for raiz, s in pesados)
+        print(f"{app:<22} {res['importaciones']:>11.2f} s {res['render']:>12.2f} s {estado:>12}  {detalle}")
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""Mensajes repartidos en un buzón por empleado, con manifiesto."""
+import hashlib
+import os
+import re
+import threading
+import unicodedata
+
+import pandas as pd
+
+from productividad.ledger import _concat, distinct_values
+
+# Local: el manifiesto se lee y escribe sin control de versión (ver ``Manifest``)
+_MANIFEST_LOCK = threading.Lock()
+
+
+def buzon(nombre):
+    """Nombre de archivo estable del buzón de ``nombre`` (ASCII + hash corto)."""
+    texto = unicodedata.normalize("NFKD", str(nombre)).encode("ascii", "ignore").decode().lower()
+    slug = re.sub(r"[^a-z0-9]+", "-", texto).strip("-")[:40] or "sin-nombre"
+    return f"{slug}-{hashlib.sha1(str(nombre).encode('utf-8')).hexdigest()[:8]}"
+
+
+def _lista(val):
+    if val is None:
+        return []
+    return list(val) if isinstance(val, (list, tuple, set)) else [val]
+
+
+def local_text(path):
+    """``get_text`` de ``Manifest`` para un archivo local (``None`` si no existe)."""
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return fh.read()
+    except FileNotFoundError:
+        return None
+
+
+def local_put_text(path, text, message=None, on_conflict=None):
+    """``put_text`` de ``Manifest`` para un archivo local (escritura atómica)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as fh:
+        fh.write(text)
+    os.replace(f"{path}.tmp", path)
+    return True
+
+
+class MailboxLedger:
+    """Misma interfaz que los ledgers, repartida en un ledger (buzón) por empleado.
+
+    ``make_ledger(path)`` crea el ledger de cada buzón; ``legacy`` es el
+    ledger del archivo único previo (o None).
+    """
+
+    def __init__(self, root, columns, make_ledger, manifest, legacy=None, key_col="Empleado", month_col="Mes"):
+        self.root = root.rstrip("/")
+        self.columns = list(columns)
+        self.make_ledger = make_ledger
+        self.manifest = manifest
+        self.legacy = legacy
+        self.key_col = key_col
+        self.month_col = month_col
+        self._ledgers = {}
+
+    def mailbox_path(self, empleado):
+        return f"{self.root}/{buzon(empleado)}.csv"
+
+    def _ledger(self, empleado):
+        if empleado not in self._ledgers:
+            self._ledgers[empleado] = self.make_ledger(self.mailbox_path(empleado))
+        return self._ledgers[empleado]
+
+    def _legacy_active(self, man):
+        return self.legacy is not None and not man.get("legacy_migrated")
+
+    def employees(self):
+        """Empleados con buzón según el manifiesto (sin leer ningún buzón)."""
+        return sorted(self.manifest.read()["shards"])
+
+    def load(self, filters=None):
+        """Solo los buzones de ``filters[Empleado]`` que tienen alguno de los meses pedidos."""
+        filters = dict(filters or {})
+        man = self.manifest.read()
+        buzones = man["shards"]
+        meses = set(map(str, _lista(filters.get(self.month_col))))
+        empleados = _lista(filters.get(self.key_col)) or sorted(buzones)
+        parts = []
+        for emp in empleados:
+            info = buzones.get(emp)
+            if info is None or (meses and not meses & set(info.get("meses", []))):
+                continue
+            parts.append(self._ledger(emp).load(filters))
+        if self._legacy_active(man):
+            parts.append(self.legacy.load(filters))
+        return _concat(parts, self.columns)
+
+    def distinct(self, column, filters=None):
+        man = self.manifest.read()
+        if column == self.key_col and not any(v for v in (filters or {}).values()) and not self._legacy_active(man):
+            return sorted(e for e in man["shards"] if str(e).strip() != "")
+        return distinct_values(self.load(filters), column)
+
+    def _keys(self, df):
+        return df[self.key_col].fillna("").astype(str).str.strip()
+
+    def _register(self, df):
+        """Agrega al manifiesto los buzones y meses nuevos de ``df`` (si no hay nada nuevo, no escribe)."""
+        nuevos = {}
+        meses = df[self.month_col].fillna("").astype(str) if self.month_col in df.columns else pd.Series("", index=df.index)
+        for emp, grupo in meses.groupby(self._keys(df), sort=True):
+            nuevos[emp] = sorted(set(grupo) - {""})
+
+        def fn(man):
+            for emp, ms in nuevos.items():
+                info = man["shards"].setdefault(emp, {"path": self.mailbox_path(emp), "meses": []})
+                info["meses"] = sorted(set(info.get("meses", [])) | set(ms))
+            return man
+        with _MANIFEST_LOCK:
+            return self.manifest.update(fn, f"manifest: {len(nuevos)} buzón(es)")
+
+    def append(self, rows, batch_id=None):
+        """Cada mensaje va SOLO al diario del buzón de su destinatario."""
+        new = pd.DataFrame(rows)
+        if new.empty:
+            return True
+        if not self._register(new):
+            return False
+        ok = True
+        for emp, grupo in new.groupby(self._keys(new), sort=True):
+            ok = self._ledger(emp).append(grupo.to_dict("records"), batch_id) and ok
+        return ok
+
+    def replace(self, df):
+        """Reescribe cada buzón presente en ``df`` (reparación)."""
+        if df.empty:
+            return True
+        if not self._register(df):
+            return False
+        ok = True
+        for emp, grupo in df.groupby(self._keys(df), sort=True):
+            ok = self._ledger(emp).replace(grupo) and ok
+        return ok
+
+    def compact(self):
+        """Reparte el archivo único previo (una vez) y compacta cada buzón."""
+        n = 0
+        man = self.manifest.read()
+        if self._legacy_active(man):
+            previo = self.legacy.load()
+            if not previo.empty and not self.append(previo.to_dict("records")):
+                return 0
+            with _MANIFEST_LOCK:
+                self.manifest.update(lambda m: {**m, "legacy_migrated": True}, "manifest: legacy_migrated")
+            n += 1
+        for emp in self.employees():
+            n += self._ledger(emp).compact()
+        return n
@@ -0,0 +1,95 @@
+"""Números de caso: parseo y normalización vectorizados (texto pegado o archivo)."""
+import io
+import re
+import unicodedata
+
+import pandas as pd
+
+from productividad.fechas import parse_fechas
+
+# Separadores: admin acepta casos con espacios internos; empresarial corta también en espacios
+SEPARADORES = r"[,;\r\n\t]+"
+SEPARADORES_ESPACIO = r"[,;\s]+"
+
+# Encabezados reconocidos (sin tildes, minúsculas, solo letras)
+COLUMNAS_CASO = ("numerocaso", "numerodecaso", "nrocaso", "nocaso", "idcaso", "caso", "casos", "numero")
+COLUMNAS_EXTRA = {"Fecha": ("fecha",), "Tipo_caso": ("tipocaso", "tipo"), "Categoria": ("categoria",)}
+
+
+def normalizar_casos(s):
+    """Casos como texto limpio (sin espacios en los bordes), sin vacíos."""
+    s = pd.Series(s).astype("string").str.strip()
+    return s[s.notna() & s.ne("")]
+
+
+def parse_casos(texto, separadores=SEPARADORES, unicos=False):
+    """Serie de casos del texto pegado (en orden; ``unicos`` quita los repetidos)."""
+    if not texto:
+        return pd.Series([], dtype="string")
+    partes = pd.Series([texto], dtype="string").str.split(separadores, regex=True).explode()
+    casos = normalizar_casos(partes).reset_index(drop=True)
+    return casos.drop_duplicates().reset_index(drop=True) if unicos else casos
+
+
+def xlsx_disponible():
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def tipos_archivo():
+    return ["csv"] + (["xlsx"] if xlsx_disponible() else [])
+
+
+def _norm(nombre):
+    texto = unicodedata.normalize("NFKD", str(nombre)).encode("ascii", "ignore").decode().lower()
+    return re.sub(r"[^a-z]", "", texto)
+
+
+def _leer_tabla(archivo, nombre):
+    """Celdas como texto y sin encabezado (se decide después)."""
+    if nombre.endswith(".xlsx"):
+        return pd.read_excel(archivo, dtype=str, header=None)
+    datos = archivo.read() if hasattr(archivo, "read") else open(archivo, "rb").read()
+    try:
+        texto = datos.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        # CSV exportado por Excel en Windows
+        texto = datos.decode("cp1252")
+    if not texto.strip():
+        return pd.DataFrame()
+    primera = texto.split("\n", 1)[0]
+    # Excel en español exporta con ";"
+    sep = ";" if primera.count(";") > primera.count(",") else ","
+    return pd.read_csv(io.StringIO(texto), sep=sep, dtype=str, header=None, skip_blank_lines=True)
+
+
+def leer_casos(archivo, nombre=None):
+    """``Numero_caso`` (+ ``Fecha``/``Tipo_caso``/``Categoria`` si vienen) de un CSV/XLSX.
+
+    Las columnas se reconocen por su encabezado; sin encabezado conocido, la
+    primera columna son los casos (y la primera fila también es un caso).
+    """
+    nombre = (nombre or getattr(archivo, "name", "") or str(archivo)).lower()
+    df = _leer_tabla(archivo, nombre)
+    if df.empty:
+        return pd.DataFrame({"Numero_caso": pd.Series([], dtype="string")})
+    encabezado = {_norm(v): i for i, v in df.iloc[0].items() if pd.notna(v)}
+    conocidos = set(COLUMNAS_CASO).union(*COLUMNAS_EXTRA.values())
+    if conocidos & set(encabezado):
+        df = df.iloc[1:]
+    else:
+        encabezado = {}
+    col_caso = next((encabezado[n] for n in COLUMNAS_CASO if n in encabezado), df.columns[0])
+    # Excel guarda los números como float: "123.0" es el caso 123
+    casos = normalizar_casos(df[col_caso].str.replace(r"^(\d+)\.0+$", r"\1", regex=True))
+    out = pd.DataFrame({"Numero_caso": casos})
+    for destino, nombres in COLUMNAS_EXTRA.items():
+        col = next((encabezado[n] for n in nombres if n in encabezado), None)
+        if col is None or col == col_caso:
+            continue
+        valores = df.loc[casos.index, col]
+        out[destino] = parse_fechas(valores, dayfirst=True) if destino == "Fecha" else valores.astype("string").str.strip()
+    return out.reset_index(drop=True)
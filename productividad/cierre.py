@@ -0,0 +1,210 @@
+"""Cierre de mes: foto inmutable y con checksum de lo que se paga a cada empleado.
+
+Uso: ``python -m productividad.cierre --mes 2025-09``
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+from datetime import date, datetime, timezone
+
+import pandas as pd
+
+from productividad.exportar import parquet_disponible
+from productividad.fechas import fill_mes_anio, month_str
+from productividad.ledger import LocalLedger
+from productividad.por_proceso import unica
+from productividad.resumenes import (
+    PORTAL_COLS, resumen_empresarial, resumen_portal, resumen_simple, total_mensual,
+)
+from productividad.sqlite_store import SQLiteLedger, SQLiteStore
+from productividad.storage import SQLITE_PATH, STORAGE_BACKEND, data_version, load_csv
+from productividad.tarifas import VIGENCIA_COL, TariffHistory
+
+CIERRES_DIR = os.getenv("CIERRES_DIR", "cierres")
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for bloque in iter(lambda: fh.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+class SnapshotStore:
+    """Fotos de los meses cerrados de una app: ``<root>/<app>/<mes>.{csv,parquet,json}``."""
+
+    def __init__(self, app, root=CIERRES_DIR):
+        self.app = app
+        self.dir = os.path.join(root, app)
+        self._lock = threading.Lock()
+        self._fotos = {}  # mes -> DataFrame; una foto no cambia, nunca vence
+
+    def _ruta(self, mes, ext):
+        return os.path.join(self.dir, f"{mes}.{ext}")
+
+    def meses(self):
+        """Meses cerrados (los que tienen su ``.json``)."""
+        try:
+            nombres = os.listdir(self.dir)
+        except FileNotFoundError:
+            return []
+        return sorted(n[:-len(".json")] for n in nombres if n.endswith(".json"))
+
+    def cerrado(self, mes):
+        return os.path.exists(self._ruta(mes, "json"))
+
+    def escribir(self, mes, df, extra=None):
+        """Escribe la foto de ``mes``. Un mes ya cerrado no se sobrescribe."""
+        if self.cerrado(mes):
+            raise FileExistsError(f"{self.app} {mes} ya está cerrado")
+        os.makedirs(self.dir, exist_ok=True)
+        formatos = {"csv": lambda p: df.to_csv(p, index=False, encoding="utf-8-sig")}
+        if parquet_disponible():
+            formatos["parquet"] = lambda p: df.to_parquet(p, index=False)
+        archivos = {}
+        for ext, write in formatos.items():
+            ruta = self._ruta(mes, ext)
+            tmp = f"{ruta}.tmp"
+            write(tmp)
+            os.replace(tmp, ruta)
+            archivos[ext] = {"archivo": os.path.basename(ruta), "sha256": _sha256(ruta)}
+        meta = {
+            "app": self.app,
+            "mes": mes,
+            "filas": len(df),
+            "cerrado_en": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "archivos": archivos,
+            **(extra or {}),
+        }
+        ruta = self._ruta(mes, "json")
+        with open(f"{ruta}.tmp", "w", encoding="utf-8") as fh:
+            json.dump(meta, fh, ensure_ascii=False, indent=1)
+        os.replace(f"{ruta}.tmp", ruta)
+        return meta
+
+    def leer(self, mes):
+        """Foto de ``mes`` verificada contra su sha256 (``None`` si no está cerrado)."""
+        with self._lock:
+            if mes in self._fotos:
+                return self._fotos[mes].copy(deep=False)
+        try:
+            with open(self._ruta(mes, "json"), encoding="utf-8") as fh:
+                meta = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        archivos = meta.get("archivos", {})
+        ext = "parquet" if "parquet" in archivos and parquet_disponible() else "csv"
+        ruta = os.path.join(self.dir, archivos[ext]["archivo"])
+        if _sha256(ruta) != archivos[ext]["sha256"]:
+            raise ValueError(f"La foto {ruta} no coincide con su checksum")
+        if ext == "parquet":
+            df = pd.read_parquet(ruta)
+        else:
+            df = pd.read_csv(ruta, encoding="utf-8-sig", keep_default_na=False,
+                             dtype={"Empleado": "string", "Mes": "string", "Lider": "string"})
+        with self._lock:
+            self._fotos[mes] = df
+        return df.copy(deep=False)
+
+    def combinar(self, frame, mes_col="Mes"):
+        """``frame`` (resumen vivo) con los meses cerrados reemplazados por su foto."""
+        meses = self.meses()
+        if not meses:
+            return frame
+        fotos = [self.leer(m).reindex(columns=frame.columns) for m in meses]
+        abiertos = frame[~frame[mes_col].isin(meses)]
+        return pd.concat([abiertos] + fotos, ignore_index=True)
+
+
+def get_snapshots(app, root=CIERRES_DIR):
+    return unica("cierres", (app, root), lambda: SnapshotStore(app, root))
+
+
+def cerrar_mes(agg, store, mes, pricing=None):
+    """Cierra ``mes``: las filas del mes de todos los empleados en un solo ``groupby``.
+
+    Se suma desde las filas (no desde el resumen guardado) con el mismo
+    ``fold`` del tablero. Un mes sin registros no se cierra (``None``).
+    """
+    filas = agg.load_source()
+    if "Mes" in filas.columns:
+        filas = filas[filas["Mes"].astype("string") == mes]
+    if filas.empty:
+        return None
+    foto = total_mensual(agg.fold(filas)).sort_values(agg.keys + agg.dims, ignore_index=True)
+    extra = {"total_mensual": float(foto["Total_Mensual"].sum())}
+    if pricing is not None:
+        extra["tarifas"] = pricing.firma()
+    return store.escribir(mes, foto, extra)
+
+
+# ==========================
+# Apps (mismas rutas que cada app con almacenamiento local)
+# ==========================
+def _app_simple():
+    pricing = TariffHistory.from_frame(load_csv("tarifas_simple.csv"))
+    agg = resumen_simple(lambda: fill_mes_anio(load_csv("registro_simple.csv")),
+                         lambda: data_version("registro_simple.csv"), pricing)
+    return agg, pricing
+
+
+def _app_empresarial():
+    pricing = TariffHistory.from_frame(load_csv("tarifas_empresarial.csv"))
+    agg = resumen_empresarial(lambda: fill_mes_anio(load_csv("registro_empresarial.csv")),
+                              lambda: data_version("registro_empresarial.csv"), pricing)
+    return agg, pricing
+
+
+def _app_portal():
+    if STORAGE_BACKEND == "sqlite":
+        db = SQLiteStore(SQLITE_PATH)
+        ledger = SQLiteLedger(db, "registros", PORTAL_COLS, seed_csv="registro_portal_local.csv")
+        tarifas = SQLiteLedger(db, "tarifas", ["Concepto", "Tarifa", VIGENCIA_COL], seed_csv="tarifas_portal.csv").load()
+    else:
+        ledger = LocalLedger("registro_portal_local.csv", PORTAL_COLS)
+        tarifas = load_csv("tarifas_portal.csv")
+    pricing = TariffHistory.from_frame(tarifas)
+    return resumen_portal(ledger.load, ledger.version, pricing), pricing
+
+
+APPS = {"simple": _app_simple, "empresarial": _app_empresarial, "portal": _app_portal}
+
+
+def mes_anterior(hoy=None):
+    hoy = hoy or date.today()
+    return month_str(date(hoy.year - (hoy.month == 1), (hoy.month - 2) % 12 + 1, 1))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Cierre de mes: foto inmutable del resumen mensual de cada app.")
+    ap.add_argument("--mes", default=mes_anterior(), help="mes a cerrar, AAAA-MM (por defecto el anterior)")
+    ap.add_argument("--app", action="append", choices=sorted(APPS), help="app a cerrar (repetible; por defecto todas)")
+    ap.add_argument("--dir", default=CIERRES_DIR, help="carpeta de las fotos")
+    args = ap.parse_args(argv)
+
+    errores = 0
+    for app in args.app or sorted(APPS):
+        store = SnapshotStore(app, args.dir)
+        if store.cerrado(args.mes):
+            print(f"{app} {args.mes}: ya estaba cerrado")
+            continue
+        agg, pricing = APPS[app]()
+        try:
+            meta = cerrar_mes(agg, store, args.mes, pricing)
+        except Exception as exc:
+            errores += 1
+            print(f"{app} {args.mes}: error {exc}", file=sys.stderr)
+            continue
+        if meta is None:
+            print(f"{app} {args.mes}: sin registros, no se cierra")
+            continue
+        print(f"{app} {args.mes}: {meta['filas']} fila(s), Total_Mensual {meta['total_mensual']:,.0f} -> {store.dir}")
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
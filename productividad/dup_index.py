@@ -0,0 +1,180 @@
+"""Índice hash (Empleado, Numero_caso) -> IDs para detectar casos repetidos."""
+import json
+import os
+import threading
+
+import pandas as pd
+
+from productividad.gh_sync import _texto
+from productividad.por_proceso import unica
+
+INDEX_DIR = ".dup_index"
+# Entradas del diario antes de reescribir la foto completa
+COMPACTAR_CADA = 200
+_MOD = 1 << 64
+
+
+def _clave(v):
+    """Texto comparable: "123", 123 y 123.0 (columna leída con NaN) son el mismo caso."""
+    if isinstance(v, float) and v.is_integer():
+        v = int(v)
+    return "" if pd.isna(v) else str(v).strip()
+
+
+def contenido(df, cols):
+    """Firma ``[filas, suma de hashes]`` de ``cols``: no depende del orden ni de la versión.
+
+    Es estable entre reinicios (a diferencia de shas o mtimes) y se actualiza
+    sumando solo las filas nuevas.
+    """
+    if df is None or len(df) == 0:
+        return [0, 0]
+    norm = pd.DataFrame({c: _texto(df[c]) if c in df.columns else "" for c in cols})
+    return [len(df), int(pd.util.hash_pandas_object(norm, index=False).sum())]
+
+
+def _sumar(a, b):
+    return [a[0] + b[0], (a[1] + b[1]) % _MOD]
+
+
+class DuplicateIndex:
+    """``(Empleado, Numero_caso) -> [ID, ...]`` de una versión concreta de los datos.
+
+    En disco: una foto (``<name>.json``) + un diario con lo agregado desde
+    entonces (``<name>.delta.jsonl``). Cada ``add`` escribe solo sus filas; la
+    foto se reescribe cada ``COMPACTAR_CADA`` entradas del diario.
+    """
+
+    def __init__(self, name, keys=("Empleado", "Numero_caso"), id_col="ID", index_dir=INDEX_DIR):
+        self.keys = list(keys)
+        self.id_col = id_col
+        self.path = os.path.join(index_dir, f"{name}.json")
+        self.delta_path = os.path.join(index_dir, f"{name}.delta.jsonl")
+        self._lock = threading.Lock()
+        self._ids = None
+        self._contenido = None
+        self._deltas = 0
+        self.version = None
+
+    @staticmethod
+    def _firma(version):
+        return json.dumps(version, default=str)
+
+    @property
+    def _cols(self):
+        return self.keys + [self.id_col]
+
+    def _pares(self, df):
+        cols = [df[c].map(_clave) for c in self.keys]
+        return zip(zip(*cols), df[self.id_col].tolist())
+
+    def ensure(self, version, load):
+        """Índice al día con ``version``: de memoria, del disco o reconstruido con ``load()``.
+
+        Si solo cambió la versión (p. ej. el diario se subió a GitHub) pero las
+        filas son las mismas, se reutiliza lo indexado.
+        """
+        firma = self._firma(version)
+        with self._lock:
+            if self._ids is not None and self.version == firma:
+                return self
+            df = load()
+            actual = contenido(df, self._cols)
+            if self._ids is None:
+                self._read_disk()
+            if self._ids is None or self._contenido != actual:
+                ids = {}
+                for clave, id_ in self._pares(df):
+                    ids.setdefault(clave, []).append(int(id_))
+                self._ids, self._contenido = ids, actual
+                self._write_snapshot()
+            self.version = firma
+            return self
+
+    def lookup(self, empleado, casos):
+        """{caso: [IDs ya registrados]} para los ``casos`` de ``empleado`` que ya existen. O(k)."""
+        if self._ids is None:
+            return {}
+        emp = _clave(empleado)
+        out = {}
+        for caso in casos:
+            ids = self._ids.get((emp, _clave(caso)))
+            if ids:
+                out[caso] = list(ids)
+        return out
+
+    def contains(self, empleado, caso):
+        return bool(self.lookup(empleado, [caso]))
+
+    def add(self, df, old_version, new_version):
+        """Suma las filas nuevas si el índice estaba en ``old_version``; si no, se reconstruirá. O(k)."""
+        with self._lock:
+            if self._ids is None or self.version != self._firma(old_version):
+                return False
+            pares = [(k, int(id_)) for k, id_ in self._pares(df)]
+            for clave, id_ in pares:
+                self._ids.setdefault(clave, []).append(id_)
+            desde, self._contenido = self._contenido, _sumar(self._contenido, contenido(df, self._cols))
+            self.version = self._firma(new_version)
+            if self._deltas + 1 >= COMPACTAR_CADA:
+                self._write_snapshot()
+            else:
+                self._append_delta(desde, pares)
+            return True
+
+    # ---- Disco ----
+    def _read_disk(self):
+        try:
+            with open(self.path, encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return
+        if "contenido" not in data:
+            return  # foto de la versión anterior (firmada por versión): se reconstruye
+        ids = {tuple(k.split("\x00", 1)): v for k, v in data["ids"].items()}
+        cont, deltas = data["contenido"], 0
+        for linea in self._leer_delta():
+            # Solo las entradas que siguen a la foto (las ya integradas tienen otro "desde")
+            if linea.get("desde") != cont:
+                continue
+            for emp, caso, id_ in linea["pares"]:
+                ids.setdefault((emp, caso), []).append(id_)
+            cont, deltas = linea["hasta"], deltas + 1
+        self._ids, self._contenido, self._deltas = ids, cont, deltas
+
+    def _leer_delta(self):
+        try:
+            with open(self.delta_path, encoding="utf-8") as fh:
+                lineas = fh.read().split("\n")
+        except OSError:
+            return []
+        out = []
+        for linea in lineas:
+            try:
+                out.append(json.loads(linea))
+            except ValueError:
+                break  # línea a medias (el proceso murió escribiéndola): lo que sigue no cuenta
+        return out
+
+    def _append_delta(self, desde, pares):
+        linea = {"desde": desde, "hasta": self._contenido, "pares": [[k[0], k[1], id_] for k, id_ in pares]}
+        os.makedirs(os.path.dirname(self.delta_path), exist_ok=True)
+        with open(self.delta_path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(linea) + "\n")
+        self._deltas += 1
+
+    def _write_snapshot(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"contenido": self._contenido,
+                       "ids": {"\x00".join(k): v for k, v in self._ids.items()}}, fh)
+        os.replace(tmp, self.path)
+        # Si el proceso muere antes de vaciarlo, sus entradas no siguen a la foto nueva y se ignoran
+        with open(self.delta_path, "w", encoding="utf-8"):
+            pass
+        self._deltas = 0
+
+
+def get_index(name, keys=("Empleado", "Numero_caso"), id_col="ID", index_dir=INDEX_DIR):
+    return unica("dup_index", name, lambda: DuplicateIndex(name, keys, id_col, index_dir))
@@ -0,0 +1,116 @@
+"""Esquema de tipos compacto por conjunto de datos, aplicado una vez al leer."""
+import os
+
+import numpy as np
+import pandas as pd
+
+from productividad.fechas import parse_fechas
+
+CATEGORIA = "category"
+TEXTO = "string"
+FECHA = "fecha"  # datetime64[s] normalizado al día (pandas no tiene resolución [D])
+
+REGISTRO_PORTAL = {
+    "Fecha": FECHA, "Empleado": CATEGORIA, "Área": CATEGORIA, "Lider": CATEGORIA, "Tipo": CATEGORIA,
+    "Numero_Caso": TEXTO, "Estado": CATEGORIA, "Horas_Extra": "int16", "Mes": CATEGORIA, "Año": "Int16",
+}
+REGISTRO_EMPRESARIAL = {
+    "Fecha": FECHA, "Empleado": CATEGORIA, "Área": CATEGORIA, "Lider": CATEGORIA, "Numero_Caso": TEXTO,
+    "Estado": CATEGORIA, "Casos_Adicionales": "int16", "Horas_Extra": "int16", "Mes": CATEGORIA, "Año": "Int16",
+}
+REGISTRO_SIMPLE = {
+    "Fecha": FECHA, "Empleado": CATEGORIA, "Área": CATEGORIA, "Casos": "int32",
+    "Casos_Adicionales": "int16", "Horas_Extra": "int16", "Mes": CATEGORIA, "Año": "Int16",
+}
+REGISTRO_APP = {
+    "Fecha (YYYY-MM-DD)": FECHA, "Empleado": CATEGORIA, "Área": CATEGORIA, "Tipo_Caso": CATEGORIA,
+    "Variable_Tipo": CATEGORIA, "Cantidad": "int32", "Horas_Extra": "int16", "Mes": CATEGORIA, "Año": "Int16",
+}
+REGISTROS_ADMIN = {
+    "ID": "int32", "Empleado": CATEGORIA, "Lider": CATEGORIA, "Numero_caso": TEXTO, "Fecha": FECHA,
+    "Tipo_caso": CATEGORIA, "Categoria": CATEGORIA,
+}
+
+# Tablas locales leídas con ``storage.load_csv`` (por nombre de archivo)
+ESQUEMAS = {
+    "registro.csv": REGISTRO_APP,
+    "registro_simple.csv": REGISTRO_SIMPLE,
+    "registro_empresarial.csv": REGISTRO_EMPRESARIAL,
+    "registro_portal_local.csv": REGISTRO_PORTAL,
+}
+
+
+def esquema_de(path):
+    return ESQUEMAS.get(os.path.basename(path))
+
+
+def dtypes_csv(esquema):
+    """Tipos que ``read_csv`` puede aplicar mientras parsea (texto y categóricas)."""
+    return {c: t for c, t in (esquema or {}).items() if t in (CATEGORIA, TEXTO)}
+
+
+def _entero(s, tipo):
+    n = pd.to_numeric(s, errors="coerce")
+    info = np.iinfo(tipo.lower())
+    n = n.round().clip(info.min, info.max)
+    # Nullable ("Int16") conserva los vacíos; el resto los deja en 0
+    return n.astype(tipo) if tipo[0].isupper() else n.fillna(0).astype(tipo)
+
+
+def _convertir(s, tipo):
+    if tipo == FECHA:
+        if not pd.api.types.is_datetime64_any_dtype(s):
+            s = parse_fechas(s)
+        return s.dt.normalize().astype("datetime64[s]")
+    if tipo == CATEGORIA:
+        return s.astype(CATEGORIA)
+    if tipo == TEXTO:
+        return s.astype(TEXTO)
+    return _entero(s, tipo)
+
+
+def aplicar_esquema(df, esquema):
+    """``df`` con las columnas de ``esquema`` convertidas (las que ya lo están no se tocan)."""
+    if df is None or not esquema:
+        return df
+    cambios = {}
+    for col, tipo in esquema.items():
+        if col not in df.columns:
+            continue
+        destino = "datetime64[s]" if tipo == FECHA else tipo
+        if str(df[col].dtype) != destino:
+            cambios[col] = _convertir(df[col], tipo)
+    return df.assign(**cambios) if cambios else df
+
+
+def anexar(base, nuevos, esquema):
+    """``concat`` que conserva el esquema: las categorías nuevas se agregan al final.
+
+    Un ``concat`` de categóricas con categorías distintas vuelve a texto; aquí
+    solo se amplían las categorías (sin recodificar el histórico).
+    """
+    base = aplicar_esquema(base, esquema)
+    nuevos = aplicar_esquema(pd.DataFrame(nuevos), esquema)
+    for col, tipo in esquema.items():
+        if tipo != CATEGORIA or col not in base.columns or col not in nuevos.columns:
+            continue
+        faltan = nuevos[col].cat.categories.difference(base[col].cat.categories)
+        cats = base[col].cat.categories.append(faltan)
+        base = base.assign(**{col: base[col].cat.add_categories(faltan)}) if len(faltan) else base
+        nuevos = nuevos.assign(**{col: nuevos[col].cat.set_categories(cats)})
+    return pd.concat([base, nuevos], ignore_index=True)
+
+
+def reporte_memoria(antes, despues):
+    """Bytes por columna antes/después de aplicar el esquema (``memory_usage(deep=True)``)."""
+    a = antes.memory_usage(deep=True, index=False)
+    d = despues.memory_usage(deep=True, index=False)
+    rep = pd.DataFrame({
+        "dtype_antes": antes.dtypes.astype(str),
+        "bytes_antes": a,
+        "dtype_despues": despues.dtypes.reindex(a.index).astype(str),
+        "bytes_despues": d.reindex(a.index),
+    })
+    rep.loc["TOTAL"] = ["", a.sum(), "", d.sum()]
+    rep["ahorro_%"] = ((1 - rep["bytes_despues"] / rep["bytes_antes"]) * 100).round(1)
+    return rep
@@ -0,0 +1,95 @@
+"""Exportaciones perezosas: el archivo se arma al hacer clic, por bloques."""
+import gzip
+import io
+import os
+import tempfile
+
+BLOQUE_FILAS = int(os.getenv("EXPORT_BLOQUE_FILAS", "50000"))
+MAX_MEMORIA = 8 << 20
+
+
+def parquet_disponible():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _bloques(df, filas):
+    for i in range(0, len(df), filas):
+        yield df.iloc[i:i + filas]
+
+
+def _frame(fuente):
+    # Un DataFrame o una función que lo carga (se llama recién al exportar)
+    return fuente() if callable(fuente) else fuente
+
+
+def _csv(df, raw, filas):
+    # utf-8-sig: el BOM va una sola vez al inicio, Excel reconoce las tildes
+    fh = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+    df.iloc[:0].to_csv(fh, index=False)
+    for bloque in _bloques(df, filas):
+        bloque.to_csv(fh, index=False, header=False)
+    fh.flush()
+    fh.detach()
+
+
+def escribir_csv(df, fh, gz=False, filas=BLOQUE_FILAS):
+    """Escribe ``df`` como CSV (opcionalmente gzip) en el binario ``fh``, por bloques."""
+    if not gz:
+        return _csv(df, fh, filas)
+    with gzip.GzipFile(fileobj=fh, mode="wb", compresslevel=6, mtime=0) as gzf:
+        _csv(df, gzf, filas)
+
+
+def escribir_parquet(df, fh, filas=BLOQUE_FILAS):
+    """Escribe ``df`` como Parquet en ``fh``: un row group por bloque."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    esquema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(fh, esquema) as writer:
+        for bloque in _bloques(df, filas):
+            writer.write_table(pa.Table.from_pandas(bloque, schema=esquema, preserve_index=False))
+
+
+def _archivo(escribir):
+    raw = tempfile.SpooledTemporaryFile(max_size=MAX_MEMORIA)
+    escribir(raw)
+    raw.seek(0)
+    return raw
+
+
+FORMATOS = {
+    "CSV (gzip)": (".csv.gz", "application/gzip", lambda df, fh: escribir_csv(df, fh, gz=True)),
+    "CSV": (".csv", "text/csv", escribir_csv),
+    "Parquet": (".parquet", "application/vnd.apache.parquet", escribir_parquet),
+}
+
+
+def formatos():
+    return [f for f in FORMATOS if f != "Parquet" or parquet_disponible()]
+
+
+def exportador(fuente, formato="CSV (gzip)"):
+    """Función sin argumentos para ``download_button(data=...)``: exporta al llamarse."""
+    escribir = FORMATOS[formato][2]
+    return lambda: _archivo(lambda fh: escribir(_frame(fuente), fh))
+
+
+def boton_descarga(etiqueta, fuente, nombre, key):
+    """Selector de formato + ``st.download_button`` que genera el archivo al hacer clic.
+
+    ``fuente`` es un DataFrame o una función que lo carga; ``nombre`` va sin extensión.
+    """
+    import streamlit as st
+
+    c1, c2 = st.columns([1, 3])
+    with c1:
+        formato = st.selectbox("Formato", formatos(), key=f"{key}_formato", label_visibility="collapsed")
+    ext, mime, _ = FORMATOS[formato]
+    with c2:
+        st.download_button(etiqueta, data=exportador(fuente, formato), file_name=nombre + ext,
+                           mime=mime, key=key)
@@ -0,0 +1,61 @@
+"""Derivación vectorizada de ``Mes``/``Año`` a partir de la fecha."""
+import pandas as pd
+
+
+def month_str(d):
+    """``AAAA-MM`` de una fecha suelta (date o texto); "" si no se puede leer."""
+    try:
+        if isinstance(d, str):
+            d = pd.to_datetime(d).date()
+        return f"{d.year:04d}-{d.month:02d}"
+    except Exception:
+        return ""
+
+
+def parse_fechas(values, dayfirst=False):
+    """Parseo vectorizado: ISO 8601 primero (rápido) y formato libre solo para lo que no cuadre.
+
+    ``dayfirst`` lee ``01/10/2026`` como 1 de octubre (archivos de Excel en español).
+    """
+    s = pd.Series(values)
+    if s.dtype == object:
+        # date/datetime sueltos (p. ej. tras ``.dt.date``) se pasan a texto ISO
+        s = s.map(lambda v: v.isoformat() if hasattr(v, "isoformat") else v)
+    out = pd.to_datetime(s, errors="coerce", format="ISO8601")
+    resto = out.isna() & s.notna() & s.astype("string").str.strip().ne("")
+    if resto.any():
+        out[resto] = pd.to_datetime(s[resto], errors="coerce", format="mixed", dayfirst=dayfirst)
+    return out
+
+
+def mes_de(fechas):
+    """``AAAA-MM`` de una serie datetime ("" sin fecha). ``to_period`` es ~50x más rápido que ``strftime``."""
+    return fechas.dt.to_period("M").astype("string").fillna("")
+
+
+def _faltan(df, col):
+    if col not in df.columns:
+        return pd.Series(True, index=df.index)
+    v = df[col]
+    return v.isna() | v.astype("string").str.strip().eq("")
+
+
+def fill_mes_anio(df, fecha_col="Fecha", mes_col="Mes", anio_col="Año"):
+    """Completa ``Mes`` (AAAA-MM) y ``Año`` solo donde faltan. Modifica y devuelve ``df``."""
+    if df.empty or fecha_col not in df.columns:
+        return df
+    falta_mes = _faltan(df, mes_col)
+    falta_anio = _faltan(df, anio_col)
+    necesita = falta_mes | falta_anio
+    if not necesita.any():
+        return df
+    fechas = parse_fechas(df.loc[necesita, fecha_col])
+    if falta_mes.any():
+        if mes_col not in df.columns or not pd.api.types.is_string_dtype(df[mes_col]):
+            df[mes_col] = df[mes_col].astype("string") if mes_col in df.columns else ""
+        df.loc[falta_mes, mes_col] = mes_de(fechas[falta_mes[necesita]])
+    if falta_anio.any():
+        actual = df[anio_col] if anio_col in df.columns else pd.Series(float("nan"), index=df.index)
+        df[anio_col] = pd.to_numeric(actual, errors="coerce").astype("Int64")
+        df.loc[falta_anio, anio_col] = fechas[falta_anio[necesita]].dt.year.astype("Int64")
+    return df
@@ -0,0 +1,226 @@
+"""Caché de contenidos de GitHub compartida por todo el proceso."""
+import base64
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from productividad import gh_client, shared_data  # noqa: F401 (shared_data activa copy-on-write)
+from productividad.por_proceso import unica
+
+MAX_FRAMES = 32
+PREFETCH_WORKERS = int(os.getenv("GH_PREFETCH_WORKERS", "8"))
+SNAPSHOT_MAX_S = float(os.getenv("GH_SNAPSHOT_MAX_SECONDS", "30"))  # un rerun nunca reutiliza más que esto
+
+
+class ContentCache:
+    """Entradas por (url, ref) con su ETag + DataFrames por sha (LRU)."""
+
+    def __init__(self, max_frames=MAX_FRAMES):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._frames = OrderedDict()
+        self.max_frames = max_frames
+
+    def entry(self, key):
+        with self._lock:
+            return self._entries.get(key)
+
+    def store(self, key, etag, sha, payload, status=200):
+        """Guarda la entrada (un 404 también: "no existe" se reutiliza en el rerun)."""
+        with self._lock:
+            self._entries[key] = {"etag": etag, "sha": sha, "payload": payload,
+                                  "status": status, "checked": time.monotonic()}
+            return self._entries[key]["checked"]
+
+    def touch(self, key):
+        """La entrada sigue vigente (304): se marca como validada ahora."""
+        with self._lock:
+            if key in self._entries:
+                self._entries[key]["checked"] = time.monotonic()
+
+    def drop(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def cached_frame(self, sha):
+        """DataFrame ya parseado del blob ``sha`` (copia) o None."""
+        with self._lock:
+            df = self._frames.get(sha) if sha else None
+            if df is not None:
+                self._frames.move_to_end(sha)
+        return None if df is None else df.copy(deep=False)
+
+    def frame(self, sha, parse):
+        """DataFrame del blob ``sha`` (se parsea una sola vez). Devuelve una copia."""
+        if not sha:
+            return parse()
+        with self._lock:
+            df = self._frames.get(sha)
+            if df is not None:
+                self._frames.move_to_end(sha)
+        if df is None:
+            df = parse()
+            with self._lock:
+                self._frames[sha] = df
+                while len(self._frames) > self.max_frames:
+                    self._frames.popitem(last=False)
+        # Vista copy-on-write: las apps modifican columnas del DataFrame que
+        # reciben sin tocar el compartido ni duplicar la memoria por sesión
+        return df.copy(deep=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._frames.clear()
+
+
+CACHE = ContentCache()
+
+# Foto del rerun en curso (por hilo: cada sesión de Streamlit corre en el suyo)
+_local = threading.local()
+# GETs en vuelo por clave: quien pide lo mismo espera ese resultado
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def _key(url, params=None):
+    return (url, tuple(sorted((params or {}).items())))
+
+
+def known_sha(url, params=None):
+    """Último sha visto para ese archivo (lectura o escritura), sin ir a la red."""
+    cached = CACHE.entry(_key(url, params))
+    return cached["sha"] if cached else None
+
+
+def remember(url, params, sha, payload):
+    """Registra lo que acabamos de escribir (el próximo GET no trae ETag y refresca).
+
+    Una escritura del rerun renueva su foto: lo leído antes (p. ej. la lista
+    de segmentos que se acaba de compactar) vuelve a validarse.
+    """
+    checked = CACHE.store(_key(url, params), None, sha, payload)
+    if getattr(_local, "since", None) is not None:
+        _local.since = checked
+
+
+def forget(url, params=None):
+    """Descarta la copia guardada (un 409/422 la dejó vieja, o el archivo se borró)."""
+    CACHE.drop(_key(url, params))
+
+
+def get_pool():
+    """Pool de hilos para las lecturas anticipadas."""
+    return unica("gh_cache", "pool", lambda: ThreadPoolExecutor(max_workers=PREFETCH_WORKERS,
+                                                                thread_name_prefix="gh-prefetch"))
+
+
+def begin_rerun(headers, reads=(), http=gh_client):
+    """Abre la foto del rerun del hilo actual y pide ``reads`` en paralelo.
+
+    ``reads`` son los ``(url, params)`` que la página leyó en su rerun
+    anterior (o los de arranque). Devuelve el registro (dict) donde se
+    anotan las lecturas de este rerun, para pasarlo al siguiente.
+    """
+    _local.since = time.monotonic()
+    _local.reads = {}
+    gh_client.begin_rerun()
+    prefetch(reads, headers, http)
+    return _local.reads
+
+
+def prefetch(reads, headers, http=gh_client):
+    """Lanza en el pool los GET de ``reads`` sin esperarlos.
+
+    ``get_contents`` espera el que esté en vuelo en vez de repetirlo.
+    """
+    futuros = []
+    for url, params in (reads.values() if isinstance(reads, dict) else reads):
+        key = _key(url, params)
+        with _inflight_lock:
+            if key in _inflight:
+                continue
+            fut = get_pool().submit(_fetch, url, headers, params, http)
+            _inflight[key] = fut
+        fut.add_done_callback(lambda f, key=key: _done(key, f))
+        futuros.append(fut)
+    return futuros
+
+
+def _done(key, fut):
+    with _inflight_lock:
+        if _inflight.get(key) is fut:
+            del _inflight[key]
+
+
+def _fresh(cached):
+    # Validada en este rerun (o escrita por él): se usa sin volver a la red
+    since = getattr(_local, "since", None)
+    return (cached is not None and since is not None and cached["checked"] >= since
+            and time.monotonic() - since < SNAPSHOT_MAX_S)
+
+
+def get_contents(url, headers, params=None, http=gh_client):
+    """GET condicional a la Contents API.
+
+    Devuelve ``(status, payload, sha, response)``: ``payload`` son los bytes
+    del archivo (o la lista JSON si es un directorio). Un 304 se reporta como
+    200 con el payload guardado en la caché. Si el archivo ya se validó en
+    este rerun (o hay un GET anticipado en vuelo), o si queda poco cupo de
+    la API y hay copia, no se repite la llamada y ``response`` es None (solo
+    se usa en los errores).
+    """
+    key = _key(url, params)
+    reads = getattr(_local, "reads", None)
+    if reads is not None:
+        reads[key] = (url, params)
+    with _inflight_lock:
+        fut = _inflight.get(key)
+    if fut is not None:
+        try:
+            return fut.result()
+        except Exception:
+            pass  # el GET anticipado falló: se pide aquí (con sus reintentos)
+    cached = CACHE.entry(key)
+    if _fresh(cached):
+        return cached["status"], cached["payload"], cached["sha"], None
+    return _fetch(url, headers, params, http)
+
+
+def _fetch(url, headers, params, http):
+    key = _key(url, params)
+    cached = CACHE.entry(key)
+    if cached is not None and gh_client.near_limit():
+        # Cerca del límite: la copia guardada en vez de esperar (un conflicto la descarta con ``forget``)
+        return cached["status"], cached["payload"], cached["sha"], None
+    hdrs = dict(headers)
+    if cached and cached["etag"]:
+        hdrs["If-None-Match"] = cached["etag"]
+    r = http.get(url, headers=hdrs, params=params)
+    if r.status_code == 304 and cached:
+        CACHE.touch(key)
+        return 200, cached["payload"], cached["sha"], r
+    if r.status_code == 200:
+        js = r.json()
+        if isinstance(js, list):
+            payload, sha = js, None
+        elif js.get("encoding") == "none" or (not js.get("content") and js.get("size")):
+            # Más de 1 MB: la Contents API no trae el contenido inline; se pide en crudo
+            raw = http.get(url, headers={**headers, "Accept": "application/vnd.github.raw"}, params=params)
+            if raw.status_code != 200:
+                return raw.status_code, None, None, raw
+            payload, sha = raw.content, js["sha"]
+        else:
+            payload, sha = base64.b64decode(js["content"]), js["sha"]
+        CACHE.store(key, r.headers.get("ETag"), sha, payload)
+        return 200, payload, sha, r
+    if r.status_code == 404:
+        CACHE.store(key, None, None, None, status=404)
+    return r.status_code, None, None, r
+
+
+def shared_frame(sha, parse):
+    """Atajo a ``CACHE.frame``: DataFrame compartido por sha del blob."""
+    return CACHE.frame(sha, parse)
@@ -0,0 +1,151 @@
+"""Cliente HTTP compartido para toda la API de GitHub."""
+import random
+import threading
+import time
+
+TIMEOUT = (5, 20)            # (conexión, lectura) en segundos
+MAX_RETRIES = 3
+BACKOFF_S = 0.5
+MAX_WAIT_S = 30.0            # nunca bloquear un rerun más que esto
+LOW_WATERMARK = 200          # por debajo de esto se reparte el cupo hasta el reset
+THROTTLE_BUDGET_S = 10.0     # pausa total por rerun (o por llamada, fuera de un rerun) para repartir el cupo
+RETRY_STATUS = (500, 502, 503, 504, 429)
+# Solo se reintenta lo idempotente: un PUT/DELETE que dio timeout o 502 pudo
+# aplicarse igual; lo resuelve ``gh_sync.put_with_retry`` releyendo el sha
+RETRY_METHODS = ("GET", "HEAD")
+
+_session = None
+_session_lock = threading.Lock()
+_rate_lock = threading.Lock()
+_rate = {"remaining": None, "reset": None}
+# Pausa que le queda al rerun del hilo actual (None: cada llamada tiene la suya)
+_budget = threading.local()
+
+
+def get_session():
+    """Sesión única del proceso con pool de conexiones."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _session = s
+        return _session
+
+
+def rate_limit():
+    """Último ``X-RateLimit-Remaining``/``Reset`` observado."""
+    with _rate_lock:
+        return dict(_rate)
+
+
+def _note_rate(r):
+    remaining = r.headers.get("X-RateLimit-Remaining")
+    reset = r.headers.get("X-RateLimit-Reset")
+    if remaining is None:
+        return
+    with _rate_lock:
+        _rate["remaining"] = int(remaining)
+        _rate["reset"] = float(reset) if reset else None
+
+
+def near_limit():
+    """¿Queda poco cupo (``LOW_WATERMARK``) y aún no llega el reset?"""
+    with _rate_lock:
+        remaining, reset = _rate["remaining"], _rate["reset"]
+    return remaining is not None and reset is not None and remaining <= LOW_WATERMARK and reset > time.time()
+
+
+def begin_rerun():
+    """Cupo de pausas del rerun del hilo actual: sus llamadas esperan a lo sumo ``THROTTLE_BUDGET_S`` en total."""
+    _budget.left = THROTTLE_BUDGET_S
+
+
+def _throttle_delay():
+    """Pausa antes de la próxima llamada para estirar el cupo restante hasta el reset."""
+    if not near_limit():
+        return 0.0
+    with _rate_lock:
+        remaining, reset = _rate["remaining"], _rate["reset"]
+    left = max(0.0, reset - time.time())
+    return min(MAX_WAIT_S, left / max(remaining, 1))
+
+
+def _take_budget(delay):
+    """Parte de ``delay`` que aún cabe en el cupo de pausas (y la descuenta)."""
+    delay = min(delay, max(0.0, _budget.left))
+    _budget.left -= delay
+    return delay
+
+
+def _is_secondary_limit(r):
+    if r.status_code not in (403, 429):
+        return False
+    if r.headers.get("Retry-After"):
+        return True
+    return "rate limit" in (r.text or "").lower()
+
+
+def _retry_delay(r, attempt):
+    if r is not None and r.headers.get("Retry-After"):
+        try:
+            return min(MAX_WAIT_S, float(r.headers["Retry-After"]))
+        except ValueError:
+            pass
+    if r is not None and r.headers.get("X-RateLimit-Remaining") == "0" and r.headers.get("X-RateLimit-Reset"):
+        return min(MAX_WAIT_S, max(0.0, float(r.headers["X-RateLimit-Reset"]) - time.time()))
+    return min(MAX_WAIT_S, BACKOFF_S * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+
+def request(method, url, timeout=TIMEOUT, retries=MAX_RETRIES, **kwargs):
+    """Llamada con sesión compartida, timeout y reintentos (solo ``RETRY_METHODS``).
+
+    Cerca del límite espera para repartir el cupo, pero solo dentro del cupo
+    de pausas del rerun (``begin_rerun``) o de la propia llamada. Devuelve
+    la última respuesta.
+    """
+    import requests
+
+    if method.upper() not in RETRY_METHODS:
+        retries = 0
+    session = get_session()
+    propio = getattr(_budget, "left", None) is None
+    if propio:
+        _budget.left = THROTTLE_BUDGET_S
+    try:
+        for attempt in range(retries + 1):
+            delay = _take_budget(_throttle_delay())
+            if delay:
+                time.sleep(delay)
+            try:
+                r = session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == retries:
+                    raise
+                time.sleep(_retry_delay(None, attempt))
+                continue
+            _note_rate(r)
+            if attempt < retries and (r.status_code in RETRY_STATUS or _is_secondary_limit(r)):
+                time.sleep(_retry_delay(r, attempt))
+                continue
+            return r
+    finally:
+        if propio:
+            _budget.left = None
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def put(url, **kwargs):
+    return request("PUT", url, **kwargs)
+
+
+def delete(url, **kwargs):
+    return request("DELETE", url, **kwargs)
@@ -0,0 +1,60 @@
+"""Concurrencia optimista para las escrituras en la Contents API de GitHub."""
+import random
+import time
+
+import pandas as pd
+
+CONFLICT_STATUS = (409, 422)
+MAX_RETRIES = 4
+BACKOFF_S = 0.4
+
+
+def put_with_retry(put, refetch, rebuild, content, sha, retries=MAX_RETRIES, backoff=BACKOFF_S):
+    """Escribe ``content`` con ``put(content, sha) -> status`` resolviendo conflictos.
+
+    En 409/422: ``refetch() -> (contenido_remoto, sha)`` y
+    ``rebuild(contenido_remoto) -> contenido nuevo`` (None = ya no hay nada que
+    escribir). Devuelve el último status HTTP.
+    """
+    status = None
+    for attempt in range(retries + 1):
+        status = put(content, sha)
+        if status in (200, 201):
+            return status
+        if status not in CONFLICT_STATUS or rebuild is None or attempt == retries:
+            return status
+        time.sleep(backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+        remote, sha = refetch()
+        content = rebuild(remote)
+        if content is None:
+            return 200
+    return status
+
+
+def _texto(col):
+    """Texto comparable de una columna: 1, 1.0 y "1" son lo mismo; NaN, None y "" también."""
+    if pd.api.types.is_datetime64_any_dtype(col):
+        return col.dt.strftime("%Y-%m-%d %H:%M:%S").str.removesuffix(" 00:00:00").fillna("")
+    num = pd.to_numeric(col, errors="coerce")
+    entero = num.notna() & (num % 1 == 0)
+    txt = col.astype("string").str.strip().fillna("")
+    return txt.mask(entero, num[entero].astype("int64").astype("string"))
+
+
+def merge_appended(remote, appended, key):
+    """``remote`` + las filas de ``appended`` que la cabeza remota aún no tiene.
+
+    ``key`` tiene que identificar una fila (p. ej. un ID): una fila ya está
+    aplicada si su clave aparece en remoto. Los valores se comparan
+    normalizados (``_texto``), no por su dtype.
+    """
+    appended = pd.DataFrame(appended)
+    if remote is None or remote.empty:
+        return appended.reset_index(drop=True)
+    if appended.empty:
+        return remote
+    key = [c for c in key if c in remote.columns and c in appended.columns]
+    if key:
+        claves = lambda df: pd.MultiIndex.from_arrays([_texto(df[c]) for c in key])
+        appended = appended[~claves(appended).isin(claves(remote))]
+    return pd.concat([remote, appended], ignore_index=True)
@@ -0,0 +1,122 @@
+"""Gráficas como PNG cacheados: cada figura se dibuja una vez por (datos, filtros)."""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from productividad.por_proceso import unica
+
+MAX_GRAFICAS = int(os.getenv("MAX_GRAFICAS", "64"))
+MAX_PUNTOS = int(os.getenv("MAX_PUNTOS_GRAFICA", "500"))
+
+
+def huella(df):
+    """Versión de un frame por su contenido (para datos sin versión barata)."""
+    h = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    return hashlib.sha1(h.tobytes()).hexdigest()
+
+
+def _clave(key):
+    # Filtros como listas (multiselect) -> tuplas, para poder usarlos de clave
+    if isinstance(key, (list, tuple)):
+        return tuple(_clave(k) for k in key)
+    if isinstance(key, dict):
+        return tuple(sorted((k, _clave(v)) for k, v in key.items()))
+    return key
+
+
+def reducir(data, max_puntos=MAX_PUNTOS):
+    """``data`` (índice = eje x ordenado) con a lo más ``max_puntos`` filas.
+
+    Cada tramo de ``paso`` filas consecutivas queda en su promedio, con la
+    x de su primera fila: la escala del eje y no cambia.
+    """
+    n = len(data)
+    if n <= max_puntos:
+        return data
+    paso = -(-n // max_puntos)
+    out = data.groupby(np.arange(n) // paso).mean()
+    out.index = data.index[::paso]
+    return out
+
+
+def lineas(ax, data, titulo, xlabel, ylabel):
+    """Una línea por columna de ``data`` (o la ``Series``) contra su índice."""
+    data = reducir(data)
+    if isinstance(data, pd.Series):
+        ax.plot(data.index, data.to_numpy())
+    else:
+        for col in data.columns:
+            ax.plot(data.index, data[col].to_numpy(), label=col)
+        ax.legend()
+    ax.set_title(titulo)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.tick_params(axis="x", labelrotation=45)
+    for lbl in ax.get_xticklabels():
+        lbl.set_horizontalalignment("right")
+
+
+def render_png(draw, figsize=(6.4, 4.8), dpi=100):
+    """Dibuja con ``draw(ax)`` y devuelve el PNG; la figura se libera siempre."""
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize, dpi=dpi)
+    try:
+        draw(fig.subplots())
+        fig.tight_layout()
+        buf = BytesIO()
+        fig.savefig(buf, format="png")
+        return buf.getvalue()
+    finally:
+        fig.clear()
+
+
+class ChartCache:
+    """LRU de PNG por clave; ``png`` solo dibuja (y prepara los datos) si falta."""
+
+    def __init__(self, max_items=MAX_GRAFICAS):
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._pngs = OrderedDict()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        key = _clave(key)
+        with self._lock:
+            png = self._pngs.get(key)
+            if png is not None:
+                self._pngs.move_to_end(key)
+            return png
+
+    def put(self, key, png):
+        key = _clave(key)
+        with self._lock:
+            self._pngs[key] = png
+            self._pngs.move_to_end(key)
+            while len(self._pngs) > self.max_items:
+                self._pngs.popitem(last=False)
+
+    def png(self, key, draw, **fig_kw):
+        """PNG de ``key``; en un fallo se dibuja con ``draw(ax)`` y se guarda."""
+        png = self.get(key)
+        if png is not None:
+            self.hits += 1
+            return png
+        self.misses += 1
+        png = render_png(draw, **fig_kw)
+        self.put(key, png)
+        return png
+
+    def stats(self):
+        with self._lock:
+            return {"graficas": len(self._pngs), "bytes": sum(map(len, self._pngs.values())),
+                    "hits": self.hits, "misses": self.misses}
+
+
+def get_charts(max_items=MAX_GRAFICAS):
+    return unica("graficos", None, lambda: ChartCache(max_items))
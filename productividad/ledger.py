@@ -0,0 +1,288 @@
+"""Libro de registros append-only (local o GitHub)."""
+import glob
+import os
+import posixpath
+from io import StringIO
+
+import pandas as pd
+
+from productividad.gh_cache import CACHE, shared_frame
+from productividad.write_behind import new_batch_id
+
+# Columna de la base: de qué segmento (o diario compactado) salió cada fila integrada
+SEG_COL = "_segmento"
+
+
+def _segment_name(batch_id=None):
+    """Nombre del segmento: el id del lote (mismo lote, mismo archivo) o uno nuevo."""
+    return f"{batch_id or new_batch_id()}.csv"
+
+
+def _integrados(base):
+    """Nombres de los segmentos ya integrados en ``base``."""
+    if base is None or SEG_COL not in base.columns:
+        return set()
+    return set(base[SEG_COL].dropna().astype(str))
+
+
+def _frame(rows, columns):
+    """Filas nuevas -> DataFrame con las columnas del libro primero."""
+    new = pd.DataFrame(rows)
+    extras = [c for c in new.columns if c not in columns]
+    return new.reindex(columns=list(columns) + extras)
+
+
+def _concat(parts, columns):
+    parts = [p for p in parts if p is not None and not p.empty]
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    df = pd.concat(parts, ignore_index=True)
+    for c in columns:
+        if c not in df.columns:
+            df[c] = None
+    return df
+
+
+def filter_frame(df, filters=None):
+    """Aplica ``{columna: valor o lista}`` en pandas (vacío o None = sin filtro)."""
+    for col, val in (filters or {}).items():
+        if val is None or col not in df.columns:
+            continue
+        vals = list(val) if isinstance(val, (list, tuple, set)) else [val]
+        if vals:
+            df = df[df[col].isin(vals)]
+    return df
+
+
+def file_version(*paths):
+    """Firma barata (tamaño + mtime) de unos archivos: cambia con cada escritura."""
+    partes = []
+    for p in paths:
+        try:
+            st = os.stat(p)
+            partes.append(f"{st.st_size}:{st.st_mtime_ns}")
+        except FileNotFoundError:
+            partes.append("-")
+    return "|".join(partes)
+
+
+def distinct_values(df, column):
+    if column not in df.columns:
+        return []
+    vals = df[column].dropna()
+    return sorted(v for v in vals.unique().tolist() if str(v).strip() != "")
+
+
+# ===========================
+# Modo local
+# ===========================
+class LocalLedger:
+    """CSV base + diario local ``<base>.ledger.csv`` con las filas nuevas."""
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = list(columns)
+        self.root, _ = os.path.splitext(path)
+        self.ledger_path = f"{self.root}.ledger.csv"
+
+    def _read(self, path):
+        if os.path.exists(path):
+            try:
+                return pd.read_csv(path, encoding="utf-8-sig")
+            except FileNotFoundError:
+                # Lo compactaron entre medio: ``load`` vuelve a leer
+                return None
+        return None
+
+    def _compactando(self):
+        """Diarios congelados por una compactación (si el proceso murió a mitad, quedan aquí).
+
+        Cada uno lleva un id en el nombre; la base anota en ``SEG_COL`` los ya
+        integrados, así que un diario integrado y aún sin borrar no se suma dos veces.
+        """
+        return sorted(glob.glob(f"{glob.escape(self.root)}.ledger.compacting*.csv"))
+
+    def _leer_todo(self):
+        base = self._read(self.path)
+        hechos = _integrados(base)
+        parts = [base] + [self._read(p) for p in self._compactando() if os.path.basename(p) not in hechos]
+        parts.append(self._read(self.ledger_path))
+        return _concat(parts, self.columns).drop(columns=[SEG_COL], errors="ignore")
+
+    def load(self, filters=None):
+        """Base + segmentos pendientes, en orden de escritura."""
+        # Si una compactación movió archivos mientras se leía, se vuelve a leer
+        for _ in range(5):
+            antes = self.version()
+            df = self._leer_todo()
+            if self.version() == antes:
+                break
+        return filter_frame(df, filters)
+
+    def distinct(self, column, filters=None):
+        return distinct_values(self.load(filters), column)
+
+    def version(self):
+        return file_version(self.path, *self._compactando(), self.ledger_path)
+
+    def append(self, rows, batch_id=None):
+        """Agrega SOLO las filas nuevas al diario. Costo O(filas nuevas)."""
+        new = _frame(rows, self.columns)
+        if new.empty:
+            return True
+        header = not os.path.exists(self.ledger_path)
+        new.to_csv(self.ledger_path, mode="a", header=header, index=False, encoding="utf-8-sig")
+        return True
+
+    def tiene_lote(self, batch_id):
+        # El diario local no guarda el id del lote
+        return False
+
+    def replace(self, df):
+        """Reescritura completa de la base (solo para compactar o reparar)."""
+        tmp = f"{self.path}.tmp"
+        df.to_csv(tmp, index=False, encoding="utf-8-sig")
+        os.replace(tmp, self.path)
+        return True
+
+    def compact(self):
+        """Integra el diario en la base. Devuelve cuántos diarios integró."""
+        pendientes = self._compactando()
+        if not pendientes:
+            if not os.path.exists(self.ledger_path):
+                return 0
+            # Los envíos que lleguen durante la compactación van a un diario nuevo
+            congelado = f"{self.root}.ledger.compacting.{new_batch_id()}.csv"
+            os.replace(self.ledger_path, congelado)
+            pendientes = [congelado]
+        base = self._read(self.path)
+        hechos = _integrados(base)
+        parts = [base]
+        for p in pendientes:
+            seg = os.path.basename(p)
+            df = self._read(p) if seg not in hechos else None
+            if df is not None:
+                parts.append(df.assign(**{SEG_COL: seg}))
+        if len(parts) > 1:
+            self.replace(_concat(parts, self.columns))
+        # Recién ahora se borran: si el proceso muere antes, la base ya los marca como integrados
+        for p in pendientes:
+            os.remove(p)
+        return len(pendientes)
+
+
+# ===========================
+# Modo GitHub
+# ===========================
+class GitHubLedger:
+    """Archivo base en el repo + un archivo por envío en ``<base>.ledger/``.
+
+    Los helpers ``get_file``/``put_file``/``list_dir``/``delete_file`` son los
+    de la app (misma firma que ``gh_get_file``/``gh_put_file``, con
+    ``on_conflict`` para reintentar sobre la cabeza nueva).
+    """
+
+    def __init__(self, path, columns, get_file, put_file, list_dir, delete_file, branch):
+        self.path = path
+        self.columns = list(columns)
+        root, _ = posixpath.splitext(path)
+        self.ledger_dir = f"{root}.ledger"
+        self.get_file = get_file
+        self.put_file = put_file
+        self.list_dir = list_dir
+        self.delete_file = delete_file
+        self.branch = branch
+
+    def _segments(self):
+        items = self.list_dir(self.ledger_dir, self.branch) or []
+        segs = [i for i in items if i.get("type", "file") == "file" and i["name"].endswith(".csv")]
+        return sorted(segs, key=lambda i: i["name"])
+
+    def _read(self, path):
+        content, sha = self.get_file(path, self.branch)
+        if not content:
+            return None, sha
+        return shared_frame(sha, lambda: pd.read_csv(StringIO(content))), sha
+
+    def _read_segment(self, seg):
+        # Los segmentos son inmutables: si su sha ya está parseado no hace falta pedirlo
+        df = CACHE.cached_frame(seg.get("sha"))
+        return df if df is not None else self._read(seg["path"])[0]
+
+    def load(self, filters=None):
+        """Base + segmentos pendientes, en orden de escritura.
+
+        Un segmento que la base ya integró (compactado y aún sin borrar, o
+        reenviado) no se vuelve a sumar.
+        """
+        base = self._read(self.path)[0]
+        hechos = _integrados(base)
+        parts = [base] + [self._read_segment(seg) for seg in self._segments() if seg["name"] not in hechos]
+        df = _concat(parts, self.columns).drop(columns=[SEG_COL], errors="ignore")
+        return filter_frame(df, filters)
+
+    def distinct(self, column, filters=None):
+        return distinct_values(self.load(filters), column)
+
+    def append(self, rows, batch_id=None):
+        """Crea un segmento nuevo con las filas (sin leer ni reescribir la base).
+
+        Con ``batch_id`` el segmento se llama como el lote: si ya existe, es
+        una entrega repetida del mismo lote y no se escribe de nuevo.
+        """
+        new = _frame(rows, self.columns)
+        if new.empty:
+            return True
+        seg_path = f"{self.ledger_dir}/{_segment_name(batch_id)}"
+        return self.put_file(seg_path, new.to_csv(index=False), f"append {len(new)} registro(s)", self.branch,
+                             on_conflict=(lambda remoto: None) if batch_id else None)
+
+    def tiene_lote(self, batch_id):
+        """¿Ya está escrito el segmento del lote (pendiente o integrado en la base)?"""
+        nombre = _segment_name(batch_id)
+        if any(seg["name"] == nombre for seg in self._segments()):
+            return True
+        return nombre in _integrados(self._read(self.path)[0])
+
+    def replace(self, df):
+        """Reescritura completa de la base (solo para compactar o reparar)."""
+        content = df.to_csv(index=False)
+        # Reparación explícita: si la cabeza cambió, se reescribe igual
+        return self.put_file(self.path, content, "update registros", self.branch, on_conflict=lambda remoto: content)
+
+    def compact(self):
+        """Integra los segmentos existentes en la base y los borra.
+
+        Cada fila integrada guarda su segmento en ``SEG_COL``: un segmento que
+        la base ya tiene (por otra compactación o por un reintento) se borra
+        sin volver a sumarlo, aunque sus filas coincidan con otras. Solo se
+        borran los segmentos leídos aquí.
+        """
+        segs = self._segments()
+        if not segs:
+            return 0
+        base, sha = self._read(self.path)
+        hechos = _integrados(base)
+        parts = []
+        for seg in segs:
+            df = None if seg["name"] in hechos else self._read_segment(seg)
+            if df is not None:
+                parts.append(df.assign(**{SEG_COL: seg["name"]}))
+        nuevos = _concat(parts, self.columns)
+
+        def rebuild(remoto):
+            # Otra compactación pudo integrar ya parte de estos segmentos
+            base_remota = pd.read_csv(StringIO(remoto)) if remoto else None
+            faltan = nuevos[~nuevos[SEG_COL].isin(_integrados(base_remota))]
+            if faltan.empty:
+                return None
+            return _concat([base_remota, faltan], self.columns).to_csv(index=False)
+
+        if parts:
+            df = _concat([base, nuevos], self.columns)
+            msg = f"compact registros ({len(segs)} segmento(s))"
+            if not self.put_file(self.path, df.to_csv(index=False), msg, self.branch, sha, on_conflict=rebuild):
+                return 0
+        for seg in segs:
+            self.delete_file(seg["path"], seg["sha"], f"compact: borra {seg['name']}", self.branch)
+        return len(segs)
@@ -0,0 +1,71 @@
+"""Cumplimiento de metas (diaria y mensual) para todos los empleados y meses a la vez."""
+import numpy as np
+import pandas as pd
+
+from productividad.fechas import mes_de, parse_fechas
+
+RESUMEN_COLS = [
+    "Empleado", "Mes", "Casos_mes", "Dias", "Dias_cumplidos",
+    "Racha_actual", "Racha_max", "Racha_completa", "Cumple_mes",
+]
+
+
+def conteo_diario(df, meta_dia, fecha_col="Fecha", emp_col="Empleado"):
+    """Casos por (Empleado, Mes, Fecha) con los días sin casos en 0 y ``Cumple`` por día."""
+    cols = ["Empleado", "Mes", "Fecha", "Casos", "Cumple"]
+    if df.empty:
+        return pd.DataFrame(columns=cols)
+    fechas = parse_fechas(df[fecha_col]).dt.normalize()
+    base = pd.DataFrame({"Empleado": df[emp_col].to_numpy(), "Fecha": fechas.to_numpy()}).dropna()
+    if base.empty:
+        return pd.DataFrame(columns=cols)
+    base["Mes"] = mes_de(base["Fecha"])
+    casos = base.groupby(["Empleado", "Mes", "Fecha"]).size().rename("Casos").reset_index()
+
+    # Calendario común: día 0 = primera fecha registrada; cada grupo ocupa [inicio, fin]
+    origen = casos["Fecha"].min()
+    casos["Dia"] = (casos["Fecha"] - origen).dt.days
+    rangos = casos.groupby(["Empleado", "Mes"], sort=True)["Dia"].agg(["min", "max"]).reset_index()
+    largo = (rangos["max"] - rangos["min"] + 1).to_numpy()
+    inicio_fila = np.repeat(np.cumsum(largo) - largo, largo)
+    dia = np.repeat(rangos["min"].to_numpy(), largo) + (np.arange(largo.sum()) - inicio_fila)
+    calendario = pd.DataFrame({
+        "Empleado": np.repeat(rangos["Empleado"].to_numpy(), largo),
+        "Mes": np.repeat(rangos["Mes"].to_numpy(), largo),
+        "Dia": dia,
+    })
+    out = calendario.merge(casos[["Empleado", "Mes", "Dia", "Casos"]], on=["Empleado", "Mes", "Dia"], how="left")
+    out["Casos"] = out["Casos"].fillna(0).astype(int)
+    out["Fecha"] = origen + pd.to_timedelta(out["Dia"], unit="D")
+    out["Cumple"] = out["Casos"] >= meta_dia
+    return out[cols]
+
+
+def cumplimiento(df, meta_dia, meta_mes, fecha_col="Fecha", emp_col="Empleado"):
+    """Resumen por (Empleado, Mes): casos, días cumplidos, racha actual/máxima y metas.
+
+    - ``Racha_completa``: se cumplió la meta diaria todos los días del rango
+      (lo que devolvía ``calcular_racha_meta``).
+    - ``Cumple_mes``: ``Casos_mes >= meta_mes``.
+    """
+    dias = conteo_diario(df, meta_dia, fecha_col, emp_col)
+    if dias.empty:
+        return pd.DataFrame(columns=RESUMEN_COLS)
+    grupo = dias["Empleado"].astype(str) + "\x00" + dias["Mes"].astype(str)
+    cumple = dias["Cumple"]
+    # Run-length: un tramo nuevo empieza cuando cambia el grupo o el indicador
+    tramo = (grupo.ne(grupo.shift()) | cumple.ne(cumple.shift())).cumsum()
+    tramos = pd.DataFrame({"Empleado": dias["Empleado"], "Mes": dias["Mes"], "Tramo": tramo, "Cumple": cumple})
+    tramos = tramos.groupby("Tramo", sort=True).agg(
+        Empleado=("Empleado", "first"), Mes=("Mes", "first"), Cumple=("Cumple", "first"), Largo=("Cumple", "size")
+    )
+    tramos["Racha"] = tramos["Largo"].where(tramos["Cumple"], 0)
+    rachas = tramos.groupby(["Empleado", "Mes"], sort=True).agg(
+        Racha_max=("Racha", "max"), Racha_actual=("Racha", "last")
+    )
+    res = dias.groupby(["Empleado", "Mes"], sort=True).agg(
+        Casos_mes=("Casos", "sum"), Dias=("Casos", "size"), Dias_cumplidos=("Cumple", "sum")
+    ).join(rachas).reset_index()
+    res["Racha_completa"] = res["Dias_cumplidos"] == res["Dias"]
+    res["Cumple_mes"] = res["Casos_mes"] >= meta_mes
+    return res[RESUMEN_COLS]
@@ -0,0 +1,34 @@
+"""Instancias únicas por proceso: los reruns y las sesiones de Streamlit reutilizan la misma."""
+import threading
+
+_INSTANCIAS = {}
+# Reentrante: crear una instancia puede pedir otra
+_LOCK = threading.RLock()
+
+
+def unica(tipo, clave, crear, actualizar=None):
+    """Instancia de ``tipo`` para ``clave``; ``crear()`` solo se llama la primera vez.
+
+    ``actualizar(obj)`` recibe la instancia ya existente en cada llamada
+    siguiente; si devuelve otra, esa la reemplaza.
+    """
+    with _LOCK:
+        registro = _INSTANCIAS.setdefault(tipo, {})
+        obj = registro.get(clave)
+        if obj is None:
+            obj = registro[clave] = crear()
+        elif actualizar is not None:
+            obj = registro[clave] = actualizar(obj) or obj
+        return obj
+
+
+def buscar(tipo, clave):
+    """La instancia de ``tipo`` para ``clave`` si ya existe (no la crea)."""
+    with _LOCK:
+        return _INSTANCIAS.get(tipo, {}).get(clave)
+
+
+def todas(tipo):
+    """Instancias de ``tipo`` creadas hasta ahora."""
+    with _LOCK:
+        return list(_INSTANCIAS.get(tipo, {}).values())
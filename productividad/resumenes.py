@@ -0,0 +1,74 @@
+"""Resúmenes mensuales de cada app (los usan los tableros y el cierre de mes)."""
+from productividad.aggregates import get_aggregate
+
+KEYS = ["Empleado", "Mes"]
+
+# Dinero por {columna: (concepto de tarifa, columna de cantidad)}
+VALORIZADO = {
+    "Ingreso_Variable": ("Caso_Adicional", "Casos_Adicionales"),
+    "Ingreso_Extras": ("Hora_Extra", "Horas_Extra"),
+}
+VALORIZADO_PORTAL = {
+    "Ingreso_Variable": ("Caso_Adicional", "Es_Variable"),
+    "Ingreso_Extras": ("Hora_Extra", "Horas_Extra"),
+}
+
+PORTAL_COLS = ["Fecha", "Empleado", "Área", "Lider", "Tipo", "Numero_Caso", "Estado", "Horas_Extra", "Mes", "Año"]
+
+
+def marcar_casos(df):
+    # Total de casos = conteo de filas con Numero_Caso no vacío
+    df["Tiene_Caso"] = df["Numero_Caso"].fillna("").astype(str).str.strip().ne("")
+    return df
+
+
+def marcar_variables(df):
+    df["Es_Variable"] = (df["Tipo"] == "Variable") & df["Numero_Caso"].fillna("").astype(str).str.strip().ne("")
+    return df
+
+
+def total_mensual(agg):
+    """``Total_Mensual`` = variables + horas extra."""
+    agg["Total_Mensual"] = agg["Ingreso_Variable"] + agg["Ingreso_Extras"]
+    return agg
+
+
+def resumen_simple(load_source, version, pricing):
+    return get_aggregate(
+        "registro_simple.resumen",
+        keys=KEYS,
+        measures={"Casos": "Casos", "Casos_Adicionales": "Casos_Adicionales", "Horas_Extra": "Horas_Extra"},
+        load_source=load_source,
+        version=version,
+        pricing=pricing,
+        priced=VALORIZADO,
+    )
+
+
+def resumen_empresarial(load_source, version, pricing):
+    # Líder queda como dimensión para filtrar
+    return get_aggregate(
+        "registro_empresarial.resumen",
+        keys=KEYS,
+        dims=["Lider"],
+        measures={"Total_Casos": "Tiene_Caso", "Casos_Adicionales": "Casos_Adicionales", "Horas_Extra": "Horas_Extra"},
+        load_source=load_source,
+        version=version,
+        prepare=marcar_casos,
+        pricing=pricing,
+        priced=VALORIZADO,
+    )
+
+
+def resumen_portal(load_source, version, pricing=None):
+    return get_aggregate(
+        "registro_portal.resumen",
+        keys=KEYS,
+        dims=["Lider"],
+        measures={"Casos_Variable": "Es_Variable", "Horas_Extra": "Horas_Extra"},
+        load_source=load_source,
+        version=version,
+        prepare=marcar_variables,
+        pricing=pricing,
+        priced=VALORIZADO_PORTAL,
+    )
@@ -0,0 +1,179 @@
+"""Registros particionados por mes (un archivo por ``Mes``) con manifiesto."""
+import hashlib
+import json
+
+import pandas as pd
+
+from productividad.fechas import mes_de, parse_fechas
+from productividad.ledger import _concat, distinct_values
+
+SIN_MES = "sin-mes"
+
+
+def _vacio():
+    return {"version": 1, "shards": {}, "legacy_migrated": False}
+
+
+def _parse(text):
+    if not text:
+        return _vacio()
+    data = json.loads(text)
+    base = _vacio()
+    base.update(data)
+    return base
+
+
+def _dump(data):
+    return json.dumps(data, ensure_ascii=False, indent=1, sort_keys=True)
+
+
+class Manifest:
+    """``manifest.json`` leído/escrito con los helpers de la app.
+
+    ``get_text(path) -> str | None`` y
+    ``put_text(path, text, message, on_conflict) -> bool``.
+    """
+
+    def __init__(self, path, get_text, put_text):
+        self.path = path
+        self.get_text = get_text
+        self.put_text = put_text
+
+    def read(self):
+        return _parse(self.get_text(self.path))
+
+    def update(self, fn, message="update manifest"):
+        """Aplica ``fn(manifiesto) -> manifiesto``; en conflicto se re-aplica sobre la cabeza nueva."""
+        actual = self.read()
+        nuevo = fn(json.loads(_dump(actual)))
+        if nuevo == actual:
+            return True
+        return self.put_text(self.path, _dump(nuevo), message, lambda remoto: _dump(fn(_parse(remoto))))
+
+
+def month_key(df, month_col="Mes"):
+    """Mes de cada fila (``Mes`` si existe; si no, derivado de ``Fecha``)."""
+    if month_col in df.columns:
+        mes = df[month_col].astype("string")
+    else:
+        mes = mes_de(parse_fechas(df.get("Fecha")))
+    return mes.fillna(SIN_MES).replace("", SIN_MES)
+
+
+class ShardedLedger:
+    """Misma interfaz que los ledgers, repartida en un ledger por mes.
+
+    ``make_ledger(shard_path)`` crea el ledger de cada archivo mensual;
+    ``legacy`` es el ledger del archivo único previo (o None).
+    """
+
+    def __init__(self, root, columns, make_ledger, manifest, legacy=None, month_col="Mes"):
+        self.root = root.rstrip("/")
+        self.columns = list(columns)
+        self.make_ledger = make_ledger
+        self.manifest = manifest
+        self.legacy = legacy
+        self.month_col = month_col
+        self._ledgers = {}
+
+    def shard_path(self, mes):
+        return f"{self.root}/{mes}.csv"
+
+    def _ledger(self, mes):
+        if mes not in self._ledgers:
+            self._ledgers[mes] = self.make_ledger(self.shard_path(mes))
+        return self._ledgers[mes]
+
+    def _legacy_active(self, man):
+        return self.legacy is not None and not man.get("legacy_migrated")
+
+    def _legacy_pendiente(self, man, filters=None):
+        """Filas del archivo previo cuyos meses aún no tienen su segmento de migración."""
+        previo = self.legacy.load(filters)
+        lote = man.get("legacy_batch")
+        if not lote or previo.empty:
+            return previo
+        meses = month_key(previo, self.month_col)
+        migrados = {m for m in set(meses) if m in man["shards"] and self._ledger(m).tiene_lote(lote)}
+        return previo[~meses.isin(migrados)]
+
+    def months(self):
+        """Meses disponibles según el manifiesto (sin leer ningún archivo de datos)."""
+        return sorted(self.manifest.read()["shards"])
+
+    def load(self, filters=None):
+        """Solo los meses pedidos en ``filters[Mes]`` (todos si no hay filtro de mes)."""
+        filters = dict(filters or {})
+        man = self.manifest.read()
+        pedidos = filters.get(self.month_col)
+        if pedidos is not None and not isinstance(pedidos, (list, tuple, set)):
+            pedidos = [pedidos]
+        meses = [m for m in sorted(man["shards"]) if not pedidos or m in pedidos]
+        parts = [self._ledger(m).load(filters) for m in meses]
+        if self._legacy_active(man):
+            # A mitad de la migración, cada mes sale de su segmento o del archivo previo (nunca de ambos)
+            parts.append(self._legacy_pendiente(man, filters))
+        return _concat(parts, self.columns)
+
+    def distinct(self, column, filters=None):
+        man = self.manifest.read()
+        if column == self.month_col and not any(v for v in (filters or {}).values()):
+            meses = set(man["shards"]) - {SIN_MES}
+            if self._legacy_active(man):
+                meses |= set(self.legacy.distinct(column))
+            return sorted(meses)
+        return distinct_values(self.load(filters), column)
+
+    def _register(self, meses, extra=None):
+        def fn(man):
+            for m in meses:
+                man["shards"].setdefault(m, {"path": self.shard_path(m)})
+            for k, v in (extra or {}).items():
+                man[k] = v(man.get(k)) if callable(v) else v
+            return man
+        return self.manifest.update(fn, f"manifest: {', '.join(sorted(meses))}")
+
+    def append(self, rows, batch_id=None):
+        """Cada fila va al archivo de su mes; un mes nuevo se registra en el manifiesto."""
+        new = pd.DataFrame(rows)
+        if new.empty:
+            return True
+        meses = month_key(new, self.month_col)
+        if not self._register(set(meses)):
+            return False
+        ok = True
+        for mes, grupo in new.groupby(meses, sort=True):
+            ok = self._ledger(mes).append(grupo.to_dict("records"), batch_id) and ok
+        return ok
+
+    def replace(self, df):
+        """Reescribe cada mes presente en ``df`` (reparación)."""
+        meses = month_key(df, self.month_col)
+        if not self._register(set(meses)):
+            return False
+        ok = True
+        for mes, grupo in df.groupby(meses, sort=True):
+            ok = self._ledger(mes).replace(grupo) and ok
+        return ok
+
+    def compact(self):
+        """Reparte el archivo único previo (una vez) y compacta cada mes."""
+        n = 0
+        man = self.manifest.read()
+        if self._legacy_active(man):
+            # Las filas previas entran como segmentos de su mes; la compactación de abajo las integra.
+            # El lote se deriva del contenido y queda en el manifiesto antes de escribir: si el
+            # proceso muere a mitad, el reintento reescribe los mismos segmentos (sin duplicar).
+            previo = self.legacy.load()
+            if not previo.empty:
+                firma = hashlib.sha1(previo.to_csv(index=False).encode("utf-8")).hexdigest()[:16]
+                lote = man.get("legacy_batch") or f"legacy-{firma}"
+                if not self._register(set(month_key(previo, self.month_col)), {"legacy_batch": lote}):
+                    return 0
+                if not self.append(previo.to_dict("records"), lote):
+                    return 0
+            self._register([], {"legacy_migrated": True})
+            n += 1
+        for mes in self.months():
+            n += self._ledger(mes).compact()
+        return n
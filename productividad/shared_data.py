@@ -0,0 +1,96 @@
+"""Datos compartidos por todas las sesiones de Streamlit del proceso."""
+import threading
+import time
+
+import pandas as pd
+
+from productividad.por_proceso import buscar, unica
+
+if int(pd.__version__.split(".")[0]) < 3:
+    # pandas 2.x: copy-on-write es opcional (en 3.x es el único modo)
+    pd.set_option("mode.copy_on_write", True)
+
+
+class SharedFrame:
+    """Un DataFrame válido mientras ``version()`` no cambie.
+
+    ``max_age`` limita cada cuánto se consulta ``version()`` (útil si
+    consultarla cuesta una llamada de red); las escrituras propias llaman a
+    ``invalidate()`` y se ven en el siguiente rerun.
+    """
+
+    def __init__(self, name, max_age=0.0):
+        self.name = name
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._df = None
+        self._version = None
+        self._checked = 0.0
+
+    def get(self, version, load):
+        """Vista del DataFrame compartido; ``load()`` solo corre si cambió la versión.
+
+        El lock hace que, si 100 sesiones piden a la vez un dato vencido, se
+        cargue una sola vez.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._df is None or now - self._checked >= self.max_age:
+                v = version()
+                self._checked = now
+                if self._df is None or v != self._version:
+                    self._df, self._version = load(), v
+            return self._df.copy(deep=False)
+
+    @property
+    def version(self):
+        return self._version
+
+    def update(self, fn, version):
+        """Aplica una escritura propia sobre la copia compartida sin recargarla.
+
+        ``fn(df) -> df`` recibe una vista; la entrada queda marcada con ``version()``.
+        """
+        with self._lock:
+            if self._df is None:
+                return
+            self._df = fn(self._df.copy(deep=False))
+            self._version = version()
+            self._checked = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._df = None
+            self._version = None
+
+
+class IdSequence:
+    """IDs crecientes repartidos a todas las sesiones del proceso (ninguno se entrega dos veces)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last = 0
+
+    def reserve(self, n, floor=0):
+        """``n`` IDs consecutivos mayores que ``floor`` (el máximo ya guardado) y que los ya entregados."""
+        with self._lock:
+            start = max(self._last, int(floor)) + 1
+            self._last = start + n - 1
+            return range(start, start + n)
+
+
+def get_shared(name, max_age=0.0):
+    entry = unica("shared_data", name, lambda: SharedFrame(name, max_age))
+    entry.max_age = max_age
+    return entry
+
+
+def get_sequence(name):
+    return unica("secuencias", name, IdSequence)
+
+
+def invalidate(name):
+    """Descarta la copia compartida de ``name`` (tras guardar)."""
+    entry = buscar("shared_data", name)
+    if entry is not None:
+        entry.invalidate()
@@ -0,0 +1,196 @@
+"""Datos sintéticos a escala de producción, en el esquema de cada app.
+
+Uso: ``python -m productividad.sintetico --app portal --filas 100000 --dir datos``
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Valores de las apps (app_portal_unico/app_enterprise, app_admin, app.py)
+LIDERES = ["Alejandra Puentes", "Carlos Sierra", "Edisson Ramirez", "Gabrielle Monroy"]
+AREAS = ["PQRS", "Reclamos", "Back office", "Defensoría"]
+ESTADOS = {"Finalizado": 0.85, "Defensoria": 0.10, "Tutela": 0.05}
+TIPOS_PORTAL = {"Productividad": 0.75, "Variable": 0.25}
+TIPOS_CASO = {"Productividad": 0.80, "Adicional": 0.15, "Meta sábado": 0.05}
+CATEGORIAS = {"Finalizado": 0.85, "Tutela": 0.05, "Defensoría": 0.10}
+TIPOS_APP = {"Productividad": 0.70, "Variable": 0.20, "HorasExtra": 0.08, "Bonificación": 0.02}
+VARIABLES_APP = ["Caso A", "Caso B"]
+
+# Archivo que lee cada app (los de app_admin, con la ruta que tienen en GitHub)
+ARCHIVOS = {
+    "portal": "registro_portal_local.csv",
+    "empleado": "registro_empresarial2.csv",
+    "empresarial": "registro_empresarial.csv",
+    "simple": "registro_simple.csv",
+    "app": "registro.csv",
+    "admin": "data/registro_empresarial2.csv",
+}
+TARIFAS = {
+    "portal": "tarifas_portal.csv",
+    "empresarial": "tarifas_empresarial.csv",
+    "simple": "tarifas_simple.csv",
+    "app": "tarifas.csv",
+    "admin": "data/config_productividad.csv",
+}
+
+
+def _elegir(rng, mezcla, n):
+    return rng.choice(list(mezcla), n, p=list(mezcla.values()))
+
+
+def _dias_habiles(meses, hasta):
+    fin = pd.Period(hasta or pd.Timestamp.today(), "M")
+    return pd.bdate_range((fin - meses + 1).start_time, fin.end_time.normalize())
+
+
+def base(filas, empleados=300, meses=12, hasta=None, seed=0):
+    """Columnas comunes: Fecha, Empleado, Área, Lider, Mes, Año (en orden de fecha).
+
+    La carga por empleado no es pareja (unos pocos registran mucho más); cada
+    empleado tiene un líder y un área fijos.
+    """
+    rng = np.random.default_rng(seed)
+    nombres = np.array([f"Empleado {i:04d}" for i in range(empleados)], dtype=object)
+    peso = rng.pareto(3.0, empleados) + 1
+    emp = rng.choice(empleados, filas, p=peso / peso.sum())
+    # Se formatea cada día hábil una vez y se reparte por posición (strftime por fila es lo caro)
+    dias = _dias_habiles(meses, hasta)
+    dia = np.sort(rng.integers(0, len(dias), filas))
+    return pd.DataFrame({
+        "Fecha": dias.strftime("%Y-%m-%d").to_numpy(object)[dia],
+        "Empleado": nombres[emp],
+        "Área": np.array(AREAS, dtype=object)[emp % len(AREAS)],
+        "Lider": np.array(LIDERES, dtype=object)[emp % len(LIDERES)],
+        "Mes": dias.strftime("%Y-%m").to_numpy(object)[dia],
+        "Año": dias.year.to_numpy()[dia],
+    }), rng
+
+
+def numeros_caso(rng, empleados, duplicados=0.02):
+    """Números de caso; una fracción ``duplicados`` repite uno ya usado por el mismo empleado."""
+    casos = pd.Series(rng.integers(10_000_000, 99_999_999, len(empleados)).astype(str), dtype=object)
+    repetir = rng.random(len(empleados)) < duplicados
+    if repetir.any():
+        # El caso anterior del mismo empleado (si tiene): así se repite dentro de su historia
+        previo = casos.groupby(pd.Series(empleados)).shift(1)
+        usar = repetir & previo.notna().to_numpy()
+        casos[usar] = previo[usar]
+    return casos.to_numpy()
+
+
+def _horas(rng, n, prob=0.05, maximo=4):
+    return np.where(rng.random(n) < prob, rng.integers(1, maximo + 1, n), 0)
+
+
+def portal(filas, duplicados=0.02, **kw):
+    """``app_portal_unico`` / ``app_employee``: una fila por caso."""
+    df, rng = base(filas, **kw)
+    df["Tipo"] = _elegir(rng, TIPOS_PORTAL, filas)
+    df["Numero_Caso"] = numeros_caso(rng, df["Empleado"].to_numpy(), duplicados)
+    df["Estado"] = _elegir(rng, ESTADOS, filas)
+    df["Horas_Extra"] = _horas(rng, filas)
+    return df[["Fecha", "Empleado", "Área", "Lider", "Tipo", "Numero_Caso", "Estado", "Horas_Extra", "Mes", "Año"]]
+
+
+def empresarial(filas, duplicados=0.02, **kw):
+    """``app_enterprise``: una fila por caso, con casos adicionales."""
+    df, rng = base(filas, **kw)
+    df["Numero_Caso"] = numeros_caso(rng, df["Empleado"].to_numpy(), duplicados)
+    df["Estado"] = _elegir(rng, ESTADOS, filas)
+    df["Casos_Adicionales"] = np.where(rng.random(filas) < 0.1, rng.integers(1, 4, filas), 0)
+    df["Horas_Extra"] = _horas(rng, filas)
+    return df[["Fecha", "Empleado", "Área", "Lider", "Numero_Caso", "Estado", "Casos_Adicionales",
+               "Horas_Extra", "Mes", "Año"]]
+
+
+def simple(filas, duplicados=0.0, **kw):
+    """``app_simple``: una fila por día y empleado con los conteos."""
+    df, rng = base(filas, **kw)
+    df["Casos"] = rng.poisson(12, filas)
+    df["Casos_Adicionales"] = rng.poisson(0.5, filas)
+    df["Horas_Extra"] = _horas(rng, filas, prob=0.2, maximo=3)
+    return df[["Fecha", "Empleado", "Área", "Casos", "Casos_Adicionales", "Horas_Extra", "Mes", "Año"]]
+
+
+def app(filas, duplicados=0.0, **kw):
+    """``app.py``: tipo de caso, concepto variable y cantidad."""
+    df, rng = base(filas, **kw)
+    tipo = _elegir(rng, TIPOS_APP, filas)
+    variable = np.where(tipo == "Variable", rng.choice(VARIABLES_APP, filas), "")
+    return pd.DataFrame({
+        "Fecha (YYYY-MM-DD)": df["Fecha"], "Empleado": df["Empleado"], "Área": df["Área"],
+        "Tipo_Caso": tipo, "Variable_Tipo": variable, "Cantidad": rng.integers(1, 6, filas),
+        "Horas_Extra": np.where(tipo == "HorasExtra", rng.integers(1, 4, filas), 0),
+        "Mes": df["Mes"], "Año": df["Año"],
+    })
+
+
+def admin(filas, duplicados=0.02, **kw):
+    """``app_admin``: un caso por fila con ID, tipo/categoría y marca de duplicado."""
+    df, rng = base(filas, **kw)
+    casos = numeros_caso(rng, df["Empleado"].to_numpy(), duplicados)
+    out = pd.DataFrame({
+        "ID": np.arange(1, filas + 1), "Empleado": df["Empleado"], "Lider": df["Lider"],
+        "Numero_caso": casos, "Fecha": df["Fecha"],
+        "Tipo_caso": _elegir(rng, TIPOS_CASO, filas), "Categoria": _elegir(rng, CATEGORIAS, filas),
+    })
+    out["Duplicado"] = out.duplicated(subset=["Empleado", "Numero_caso"], keep=False)
+    return out
+
+
+GENERADORES = {"portal": portal, "empleado": portal, "empresarial": empresarial, "simple": simple,
+               "app": app, "admin": admin}
+
+
+def registros(esquema, filas, **kw):
+    """Registros sintéticos de ``esquema`` (ver ``GENERADORES``), como quedan en el CSV."""
+    return GENERADORES[esquema](filas, **kw)
+
+
+def tarifas(esquema, hasta=None, meses=12):
+    """Tabla de tarifas de la app con dos vigencias (la segunda a mitad del periodo, +10 %)."""
+    fin = pd.Period(hasta or pd.Timestamp.today(), "M")
+    cambio = str((fin - meses // 2).start_time.date())
+    if esquema == "admin":
+        return pd.DataFrame({"valor_prod": [3500.0, 3850.0], "valor_adic": [4000.0, 4400.0],
+                             "valor_sabado": [5000.0, 5500.0], "vigente_desde": ["", cambio]})
+    if esquema == "app":
+        base_ = pd.DataFrame({"Tipo_Caso": ["Variable", "Variable", "HorasExtra"],
+                              "Concepto": ["Caso A", "Caso B", "Hora Extra"], "Tarifa": [10000.0, 15000.0, 8000.0]})
+    else:
+        base_ = pd.DataFrame({"Concepto": ["Caso_Adicional", "Hora_Extra"], "Tarifa": [10000.0, 8000.0]})
+    nueva = base_.assign(Tarifa=base_["Tarifa"] * 1.1)
+    return pd.concat([base_.assign(Vigente_desde=""), nueva.assign(Vigente_desde=cambio)], ignore_index=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Registros sintéticos en el esquema de cada app.")
+    ap.add_argument("--app", action="append", choices=sorted(GENERADORES), help="esquema (repetible; por defecto todos)")
+    ap.add_argument("--filas", type=int, default=100_000)
+    ap.add_argument("--empleados", type=int, default=300)
+    ap.add_argument("--meses", type=int, default=12)
+    ap.add_argument("--hasta", help="último mes, AAAA-MM (por defecto el actual)")
+    ap.add_argument("--duplicados", type=float, default=0.02, help="fracción de casos repetidos")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--dir", default="datos_sinteticos", help="carpeta de salida")
+    args = ap.parse_args(argv)
+
+    os.makedirs(args.dir, exist_ok=True)
+    kw = {"empleados": args.empleados, "meses": args.meses, "hasta": args.hasta, "seed": args.seed}
+    for esquema in args.app or sorted(GENERADORES):
+        df = registros(esquema, args.filas, duplicados=args.duplicados, **kw)
+        path = os.path.join(args.dir, ARCHIVOS[esquema])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        df.to_csv(path, index=False, encoding="utf-8-sig")
+        print(f"{esquema}: {len(df):,} fila(s) -> {path}")
+        if esquema in TARIFAS:
+            tarifas(esquema, args.hasta, args.meses).to_csv(os.path.join(args.dir, TARIFAS[esquema]),
+                                                            index=False, encoding="utf-8-sig")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""Motor SQLite (stdlib ``sqlite3``, modo WAL) para registros, mensajes y tarifas."""
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+
+import pandas as pd
+
+from productividad.ledger import SEG_COL
+
+# Índices que se crean si la tabla tiene esas columnas
+INDEX_CANDIDATES = [
+    ("Empleado", "Mes"),
+    ("Mes",),
+    ("Lider",),
+    ("Concepto",),
+]
+
+
+def _q(name):
+    """Cita un identificador SQL (columnas con tildes, espacios, paréntesis...)."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def table_name(path):
+    """``data/registro_simple.csv`` -> ``registro_simple``."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return re.sub(r"\W+", "_", stem).strip("_") or "tabla"
+
+
+def _as_list(v):
+    if v is None:
+        return []
+    if isinstance(v, (list, tuple, set, pd.Series, pd.Index)):
+        return list(v)
+    return [v]
+
+
+def _records(df):
+    """DataFrame -> filas con tipos nativos de Python (NaN y "" -> NULL, como en CSV)."""
+    return df.astype(object).where(df.notna() & df.ne(""), None).values.tolist()
+
+
+class SQLiteStore:
+    """Base SQLite compartida; una conexión corta por operación (seguro entre hilos)."""
+
+    def __init__(self, path="productividad.db"):
+        self.path = path
+        with self._conn() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+
+    @contextmanager
+    def _conn(self):
+        con = sqlite3.connect(self.path, timeout=30)
+        try:
+            con.execute("PRAGMA synchronous=NORMAL")
+            yield con
+            con.commit()
+        finally:
+            con.close()
+
+    # ---- Esquema ----
+    def _columns(self, con, table):
+        return [r[1] for r in con.execute(f"PRAGMA table_info({_q(table)})")]
+
+    def table_exists(self, table):
+        with self._conn() as con:
+            return bool(self._columns(con, table))
+
+    def _ensure(self, con, table, columns):
+        cols = self._columns(con, table)
+        if not cols:
+            defs = ", ".join(_q(c) for c in columns)
+            con.execute(f"CREATE TABLE {_q(table)} ({defs})")
+            cols = list(columns)
+        else:
+            for c in columns:
+                if c not in cols:
+                    con.execute(f"ALTER TABLE {_q(table)} ADD COLUMN {_q(c)}")
+                    cols.append(c)
+        for idx in INDEX_CANDIDATES:
+            if all(c in cols for c in idx):
+                name = f"idx_{table}_" + "_".join(table_name(c) for c in idx)
+                con.execute(
+                    f"CREATE INDEX IF NOT EXISTS {_q(name)} ON {_q(table)} ({', '.join(_q(c) for c in idx)})"
+                )
+        return cols
+
+    def ensure_table(self, table, columns):
+        with self._conn() as con:
+            return self._ensure(con, table, list(columns))
+
+    # ---- Lectura ----
+    def _where(self, filters):
+        clauses, params = [], []
+        for col, val in (filters or {}).items():
+            vals = _as_list(val)
+            if not vals:
+                continue
+            clauses.append(f"{_q(col)} IN ({', '.join('?' * len(vals))})")
+            params.extend(vals)
+        sql = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        return sql, params
+
+    def read_table(self, table, filters=None):
+        """Filas que cumplen ``filters`` ({columna: valor o lista}); solo esas se materializan."""
+        with self._conn() as con:
+            cols = self._columns(con, table)
+            if not cols:
+                return pd.DataFrame()
+            where, params = self._where({k: v for k, v in (filters or {}).items() if k in cols})
+            return pd.read_sql_query(f"SELECT * FROM {_q(table)}{where} ORDER BY rowid", con, params=params)
+
+    def distinct(self, table, column, filters=None):
+        """Valores distintos (no nulos) de una columna, ordenados."""
+        with self._conn() as con:
+            cols = self._columns(con, table)
+            if column not in cols:
+                return []
+            where, params = self._where({k: v for k, v in (filters or {}).items() if k in cols})
+            where = (where + " AND " if where else " WHERE ") + f"{_q(column)} IS NOT NULL AND {_q(column)} != ''"
+            rows = con.execute(
+                f"SELECT DISTINCT {_q(column)} FROM {_q(table)}{where} ORDER BY {_q(column)}", params
+            ).fetchall()
+            return [r[0] for r in rows]
+
+    def table_version(self, table):
+        """Firma barata de la tabla (filas + último rowid); cambia con cada escritura."""
+        with self._conn() as con:
+            if not self._columns(con, table):
+                return "-"
+            n, last = con.execute(f"SELECT count(*), max(rowid) FROM {_q(table)}").fetchone()
+            return f"{n}:{last}"
+
+    # ---- Escritura ----
+    def _insert(self, con, table, df):
+        if df.empty:
+            return
+        cols = ", ".join(_q(c) for c in df.columns)
+        marks = ", ".join("?" * len(df.columns))
+        con.executemany(f"INSERT INTO {_q(table)} ({cols}) VALUES ({marks})", _records(df))
+
+    def append_table(self, table, df):
+        """Inserta solo las filas nuevas. Costo O(filas nuevas)."""
+        with self._conn() as con:
+            self._ensure(con, table, list(df.columns))
+            self._insert(con, table, df)
+
+    def write_table(self, table, df):
+        """Reemplaza el contenido completo de la tabla (en una transacción)."""
+        with self._conn() as con:
+            self._ensure(con, table, list(df.columns))
+            con.execute(f"DELETE FROM {_q(table)}")
+            self._insert(con, table, df)
+
+    def import_csv(self, table, path):
+        """Carga inicial desde un CSV existente (solo si la tabla aún no existe)."""
+        if self.table_exists(table) or not os.path.exists(path):
+            return False
+        try:
+            df = pd.read_csv(path, encoding="utf-8-sig")
+        except Exception:
+            df = pd.read_csv(path)
+        # La marca de compactación del CSV local no es un dato
+        self.write_table(table, df.drop(columns=[SEG_COL], errors="ignore"))
+        return True
+
+
+class SQLiteLedger:
+    """Tabla SQLite con la misma interfaz que ``LocalLedger``/``GitHubLedger``."""
+
+    def __init__(self, store, table, columns, seed_csv=None):
+        self.store = store
+        self.table = table
+        self.columns = list(columns)
+        if seed_csv:
+            store.import_csv(table, seed_csv)
+        store.ensure_table(table, self.columns)
+
+    def load(self, filters=None):
+        df = self.store.read_table(self.table, filters)
+        return df if not df.empty else pd.DataFrame(columns=self.columns)
+
+    def distinct(self, column, filters=None):
+        return self.store.distinct(self.table, column, filters)
+
+    def version(self):
+        return self.store.table_version(self.table)
+
+    def append(self, rows, batch_id=None):
+        new = pd.DataFrame(rows)
+        if not new.empty:
+            self.store.append_table(self.table, new)
+        return True
+
+    def replace(self, df):
+        self.store.write_table(self.table, df)
+        return True
+
+    def compact(self):
+        # Las inserciones ya son en sitio: no hay segmentos que integrar
+        return 0
@@ -0,0 +1,100 @@
+"""Tablas de las apps locales: CSV (por defecto) o SQLite."""
+import os
+
+import pandas as pd
+
+from productividad.esquemas import aplicar_esquema, dtypes_csv, esquema_de
+from productividad.ledger import file_version, filter_frame
+from productividad.shared_data import get_shared, invalidate
+from productividad.sqlite_store import SQLiteStore, table_name
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "csv").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "productividad.db")
+
+_DB = None
+
+
+def get_db():
+    """Base SQLite compartida por el proceso (None en modo CSV)."""
+    global _DB
+    if STORAGE_BACKEND != "sqlite":
+        return None
+    if _DB is None:
+        _DB = SQLiteStore(SQLITE_PATH)
+    return _DB
+
+
+def _read_csv(path, dtype=None):
+    try:
+        return pd.read_csv(path, encoding="utf-8-sig", dtype=dtype)
+    except Exception:
+        return pd.read_csv(path, dtype=dtype)
+
+
+def _parse(path, df):
+    return aplicar_esquema(df, esquema_de(path))
+
+
+def load_csv(path, filters=None):
+    """Lee la tabla de ``path``; ``filters`` = {columna: valor o lista}."""
+    db = get_db()
+    if db is not None:
+        table = table_name(path)
+        db.import_csv(table, path)
+        if any(v for v in (filters or {}).values()):
+            # Consulta indexada: solo se traen las filas pedidas
+            return _parse(path, db.read_table(table, filters))
+        return get_shared(path).get(lambda: db.table_version(table), lambda: _parse(path, db.read_table(table)))
+    if os.path.exists(path):
+        # Texto y categóricas se tipan mientras se parsea; el resto justo después
+        read = lambda: _parse(path, _read_csv(path, dtypes_csv(esquema_de(path))))
+        df = get_shared(path).get(lambda: file_version(path), read)
+        return filter_frame(df, filters)
+    return pd.DataFrame()
+
+
+def data_version(path):
+    """Firma barata de la tabla de ``path``: cambia con cada escritura."""
+    db = get_db()
+    if db is not None:
+        return db.table_version(table_name(path))
+    return file_version(path)
+
+
+def save_csv(df, path):
+    """Reescribe la tabla completa."""
+    invalidate(path)
+    db = get_db()
+    if db is not None:
+        db.write_table(table_name(path), df)
+        return
+    df.to_csv(path, index=False, encoding="utf-8-sig")
+
+
+def append_csv(df_new, path):
+    """Agrega solo ``df_new`` sin reescribir el histórico (si el esquema lo permite)."""
+    if df_new.empty:
+        return
+    invalidate(path)
+    db = get_db()
+    if db is not None:
+        table = table_name(path)
+        db.import_csv(table, path)
+        db.append_table(table, df_new)
+        return
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        save_csv(df_new, path)
+        return
+    cols = _read_csv_header(path)
+    if any(c not in cols for c in df_new.columns):
+        # Columnas nuevas: hay que reescribir el archivo con el encabezado ampliado
+        save_csv(pd.concat([_read_csv(path), df_new], ignore_index=True), path)
+        return
+    df_new.reindex(columns=cols).to_csv(path, mode="a", header=False, index=False, encoding="utf-8-sig")
+
+
+def _read_csv_header(path):
+    try:
+        return pd.read_csv(path, nrows=0, encoding="utf-8-sig").columns.tolist()
+    except Exception:
+        return pd.read_csv(path, nrows=0).columns.tolist()
@@ -0,0 +1,140 @@
+"""Tablas paginadas del lado del servidor: al navegador solo va la página visible."""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from productividad.graficos import huella
+from productividad.por_proceso import unica
+
+MAX_ORDENES = int(os.getenv("MAX_ORDENES_TABLA", "32"))
+TAMANOS = (25, 50, 100, 200)
+
+
+def _clave_orden(s):
+    """Valores comparables de ``s``; las categóricas ordenan por texto, no por código."""
+    if not isinstance(s.dtype, pd.CategoricalDtype):
+        return s
+    rango = np.argsort(np.argsort(s.cat.categories.astype(str))).astype(float)
+    codes = s.cat.codes.to_numpy()
+    return pd.Series(np.where(codes >= 0, rango[codes.clip(0)], np.nan), index=s.index)
+
+
+def ordenar(df, por, ascendente=True):
+    """Posiciones de ``df`` ordenado por ``por`` (estable, vacíos al final)."""
+    if not por:
+        return np.arange(len(df))
+    claves = pd.DataFrame({i: _clave_orden(df[c]) for i, c in enumerate(por)}).reset_index(drop=True)
+    return claves.sort_values(list(range(len(por))), ascending=ascendente, kind="stable",
+                              na_position="last").index.to_numpy()
+
+
+def coincidencias(df, texto):
+    """Máscara de las filas donde alguna columna contiene ``texto`` (sin mayúsculas)."""
+    mask = np.zeros(len(df), dtype=bool)
+    for col in df.columns:
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            # Se busca en las categorías (pocas) y se lleva a las filas por código
+            hit = s.cat.categories.astype(str).str.contains(texto, case=False, regex=False)
+            codes = s.cat.codes.to_numpy()
+            mask |= (codes >= 0) & np.asarray(hit)[codes.clip(0)]
+        else:
+            mask |= s.astype("string").str.contains(texto, case=False, regex=False).fillna(False).to_numpy(bool)
+    return mask
+
+
+class TableIndex:
+    """LRU de posiciones ordenadas/filtradas por (tabla, versión, orden, filtro)."""
+
+    def __init__(self, max_items=MAX_ORDENES):
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._pos = OrderedDict()
+
+    def _cache(self, key, calc):
+        with self._lock:
+            if key in self._pos:
+                self._pos.move_to_end(key)
+                return self._pos[key]
+        pos = calc()
+        with self._lock:
+            self._pos[key] = pos
+            while len(self._pos) > self.max_items:
+                self._pos.popitem(last=False)
+        return pos
+
+    def posiciones(self, nombre, version, df, por=(), ascendente=True, texto=""):
+        """Posiciones de las filas visibles de ``df``, en orden."""
+        por = tuple(por)
+        orden = self._cache((nombre, version, por, ascendente, ""), lambda: ordenar(df, por, ascendente))
+        texto = (texto or "").strip()
+        if not texto:
+            return orden
+        # El filtro reusa el orden ya calculado
+        return self._cache((nombre, version, por, ascendente, texto),
+                           lambda: orden[coincidencias(df, texto)[orden]])
+
+    def clear(self):
+        with self._lock:
+            self._pos.clear()
+
+
+def get_table_index(max_items=MAX_ORDENES):
+    return unica("tablas", None, lambda: TableIndex(max_items))
+
+
+def pagina(df, nombre, version=None, por=(), ascendente=True, texto="", numero=1, tamano=TAMANOS[1]):
+    """``(ventana, filas, paginas)``: la página ``numero`` (desde 1) de ``df`` ordenado y filtrado.
+
+    Sin ``version`` se usa la huella del contenido de ``df``.
+    """
+    if version is None:
+        version = huella(df)
+    pos = get_table_index().posiciones(nombre, version, df, por, ascendente, texto)
+    paginas = max(1, -(-len(pos) // tamano))
+    numero = min(max(1, int(numero)), paginas)
+    ini = (numero - 1) * tamano
+    return df.iloc[pos[ini:ini + tamano]], len(pos), paginas
+
+
+def mostrar_tabla(df, key, version=None, por=(), ascendente=True, tamano=TAMANOS[1]):
+    """Tabla paginada de Streamlit: solo la página visible llega al navegador.
+
+    ``por``/``ascendente`` es el orden inicial; ``key`` separa el estado de
+    cada tabla en la sesión.
+    """
+    import streamlit as st
+
+    por = list(por)
+    opciones = [tuple(por)] + [(c,) for c in df.columns if [c] != por]
+    c1, c2, c3, c4 = st.columns([3, 2, 1, 1])
+    with c1:
+        texto = st.text_input("Buscar", key=f"{key}_buscar", placeholder="Texto en cualquier columna")
+    with c2:
+        orden = st.selectbox("Ordenar por", opciones, key=f"{key}_orden",
+                             format_func=lambda o: ", ".join(o) if o else "(original)")
+    with c3:
+        desc = st.checkbox("Descendente", value=not ascendente, key=f"{key}_desc")
+    with c4:
+        tamano = st.selectbox("Filas", TAMANOS, index=TAMANOS.index(tamano) if tamano in TAMANOS else 1,
+                              key=f"{key}_tamano")
+
+    numero = st.session_state.get(f"{key}_pagina", 1)
+    ventana, filas, paginas = pagina(df, key, version, orden, not desc, texto, numero, tamano)
+    if numero > paginas:
+        # El filtro dejó menos páginas: se ajusta antes de crear el control
+        numero = st.session_state[f"{key}_pagina"] = paginas
+    st.dataframe(ventana, use_container_width=True)
+    c1, c2 = st.columns([1, 3])
+    with c1:
+        st.number_input("Página", min_value=1, max_value=paginas, step=1, key=f"{key}_pagina")
+    with c2:
+        ini = (numero - 1) * tamano
+        if filas:
+            st.caption(f"Filas {ini + 1:,}–{min(ini + tamano, filas):,} de {filas:,} · {paginas:,} página(s)")
+        else:
+            st.caption("Sin filas que coincidan")
+    return ventana
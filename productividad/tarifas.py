@@ -0,0 +1,286 @@
+"""Motor de tarifas compartido por las apps."""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from productividad.fechas import month_str, parse_fechas
+
+VIGENCIA_COL = "Vigente_desde"
+# Filas sin fecha de vigencia (tablas viejas): valen desde siempre
+_ORIGEN = pd.Timestamp("1900-01-01")
+# Clave del as-of: código del concepto * _SPAN + días desde _ORIGEN
+_SPAN = 1 << 20
+_OTROS = "__otros__"
+
+
+class TariffTable:
+    """Tarifas compiladas: concepto -> precio (``default`` si el concepto no está)."""
+
+    def __init__(self, conceptos, precios, default=0.0):
+        self.conceptos = pd.Index(conceptos)
+        self.default = float(default)
+        # Última posición = default: el código -1 (concepto desconocido) cae ahí
+        self._precios = np.append(np.asarray(precios, dtype="float64"), self.default)
+
+    @classmethod
+    def from_frame(cls, df, concept_col="Concepto", rate_col="Tarifa", default=0.0):
+        """Desde una tabla de tarifas; si un concepto se repite gana la primera fila."""
+        if df is None or df.empty or concept_col not in df.columns or rate_col not in df.columns:
+            return cls([], [], default)
+        tabla = df[[concept_col, rate_col]].dropna(subset=[concept_col])
+        tabla = tabla.drop_duplicates(subset=[concept_col], keep="first")
+        precios = pd.to_numeric(tabla[rate_col], errors="coerce").fillna(0.0)
+        return cls(tabla[concept_col].astype(str).tolist(), precios.to_numpy(), default)
+
+    @classmethod
+    def from_config(cls, config, campos, default_campo=None):
+        """Desde ``cargar_config``: ``campos`` = {concepto: clave de config}."""
+        default = float(config.get(default_campo, 0.0)) if default_campo else 0.0
+        return cls(list(campos), [float(config.get(c, 0.0)) for c in campos.values()], default)
+
+    def rate(self, concepto):
+        """Tarifa de un concepto suelto."""
+        pos = self.conceptos.get_indexer([str(concepto)])[0]
+        return float(self._precios[pos])
+
+    def rates(self, valores):
+        """Tarifa por fila: códigos categóricos + un solo ``take``.
+
+        ``factorize`` codifica la columna una vez; solo los valores distintos
+        (pocos) se buscan en la tabla.
+        """
+        codes, uniques = pd.factorize(pd.Series(valores))
+        # Código -1 (nulo) y conceptos desconocidos -> posición -1 = default
+        pos = np.append(self.conceptos.get_indexer(pd.Index(uniques).astype(str)), -1)
+        return self._precios.take(pos.take(codes))
+
+    def price(self, df, concept_col, qty_col=None):
+        """Dinero por fila: tarifa del concepto (x ``qty_col`` si se indica)."""
+        valor = self.rates(df[concept_col])
+        if qty_col is not None:
+            valor = valor * pd.to_numeric(df[qty_col], errors="coerce").fillna(0).to_numpy()
+        return pd.Series(valor, index=df.index)
+
+    def price_columns(self, df, columnas):
+        """Dinero por columna de cantidad: ``{columna_salida: (concepto, columna_cantidad)}``."""
+        out = df.copy()
+        precios = self.rates([concepto for concepto, _ in columnas.values()])
+        for precio, (dst, (_, qty)) in zip(precios, columnas.items()):
+            out[dst] = pd.to_numeric(out[qty], errors="coerce").fillna(0) * precio
+        return out
+
+    def totals(self, df, concept_col, by, qty_col=None, name="Valor"):
+        """Dinero agregado por las columnas ``by``."""
+        valor = self.price(df, concept_col, qty_col)
+        return df[by].assign(**{name: valor}).groupby(by, as_index=False, observed=True)[name].sum()
+
+
+# ==========================
+# Tarifas con vigencia
+# ==========================
+def _dias(fechas):
+    """Días desde ``_ORIGEN``; sin fecha -> vigencia más reciente.
+
+    Se parsean solo las fechas distintas (pocas frente a las filas).
+    """
+    codes, uniques = pd.factorize(pd.Series(fechas))
+    dias = (parse_fechas(pd.Series(uniques)) - _ORIGEN) // pd.Timedelta(days=1)
+    dias = dias.fillna(_SPAN - 1).clip(0, _SPAN - 1).to_numpy("int64")
+    return np.append(dias, _SPAN - 1).take(codes)
+
+
+def _desde(df, since_col):
+    if since_col not in df.columns:
+        return pd.Series(_ORIGEN, index=df.index)
+    return parse_fechas(df[since_col]).dt.normalize().fillna(_ORIGEN)
+
+
+class TariffHistory:
+    """Versiones de tarifas: concepto -> [(vigente_desde, precio), ...].
+
+    - ``rates(conceptos, fechas)``: tarifa vigente en la fecha de cada fila.
+    - ``otros``: concepto que se cobra para los conceptos desconocidos
+      (si no se indica, ``default``).
+    """
+
+    def __init__(self, conceptos, precios, desde, default=0.0, otros=None):
+        versiones = pd.DataFrame({
+            "Concepto": pd.Series(conceptos, dtype=object).astype(str).to_numpy(),
+            "Tarifa": pd.to_numeric(pd.Series(precios), errors="coerce").fillna(0.0).to_numpy("float64"),
+            VIGENCIA_COL: pd.to_datetime(pd.Series(desde)).to_numpy(),
+        })
+        # Dos versiones el mismo día: gana la primera fila (como en ``TariffTable``)
+        versiones = versiones.drop_duplicates(subset=["Concepto", VIGENCIA_COL], keep="first")
+        self.default = float(default)
+        self.conceptos = pd.Index(sorted(versiones["Concepto"].unique()))
+        self._otros = self.conceptos.get_loc(otros) if otros in self.conceptos else -1
+        codigos = self.conceptos.get_indexer(versiones["Concepto"])
+        claves = codigos.astype("int64") * _SPAN + _dias(versiones[VIGENCIA_COL])
+        orden = np.argsort(claves, kind="stable")
+        self.versiones = versiones.iloc[orden].reset_index(drop=True)
+        self._claves = claves[orden]
+        self._codigos = codigos[orden]
+        self._precios = self.versiones["Tarifa"].to_numpy("float64")
+
+    @classmethod
+    def from_frame(cls, df, concept_col="Concepto", rate_col="Tarifa", since_col=VIGENCIA_COL, default=0.0):
+        """Desde ``tarifas*.csv``; las filas sin ``since_col`` valen desde siempre."""
+        if df is None or df.empty or concept_col not in df.columns or rate_col not in df.columns:
+            return cls([], [], [], default)
+        tabla = df.dropna(subset=[concept_col])
+        return cls(tabla[concept_col], tabla[rate_col], _desde(tabla, since_col), default)
+
+    @classmethod
+    def from_config(cls, config, campos, default_campo=None, since_col="vigente_desde"):
+        """Desde las filas de ``config_productividad.csv`` (una por versión).
+
+        ``campos`` = {concepto: columna de config}; ``default_campo`` es lo
+        que se paga por cualquier otro concepto.
+        """
+        cfg = pd.DataFrame([config]) if isinstance(config, dict) else config
+        if cfg is None or cfg.empty:
+            return cls([], [], [])
+        desde = _desde(cfg, since_col)
+        todos = dict(campos, **({_OTROS: default_campo} if default_campo else {}))
+        partes = [(c, cfg[col], desde) for c, col in todos.items() if col in cfg.columns]
+        if not partes:
+            return cls([], [], [])
+        return cls(
+            np.concatenate([np.full(len(cfg), c, dtype=object) for c, _, _ in partes]),
+            np.concatenate([pd.to_numeric(v, errors="coerce").to_numpy("float64") for _, v, _ in partes]),
+            np.concatenate([d.to_numpy() for _, _, d in partes]),
+            otros=_OTROS if default_campo else None,
+        )
+
+    # ---- As-of ----
+    def _codigos_de(self, valores):
+        codes, uniques = pd.factorize(pd.Series(valores))
+        pos = self.conceptos.get_indexer(pd.Index(uniques).astype(str))
+        if self._otros >= 0:
+            pos = np.where(pos < 0, self._otros, pos)
+        # Código -1 de factorize (nulo) -> "otros" o default
+        return np.append(pos, self._otros).take(codes)
+
+    def rates(self, conceptos, fechas):
+        """Tarifa por fila: la última versión del concepto con ``vigente_desde <= fecha``.
+
+        Todas las versiones van en un solo arreglo ordenado por (concepto,
+        fecha); un ``searchsorted`` hace el join as-of de todas las filas a la vez.
+        """
+        codigos = self._codigos_de(conceptos)
+        if not len(self._claves):
+            return np.full(len(codigos), self.default)
+        claves = codigos.astype("int64") * _SPAN + _dias(fechas)
+        pos = np.searchsorted(self._claves, claves, side="right") - 1
+        ok = (codigos >= 0) & (pos >= 0)
+        pos = pos.clip(0)
+        ok &= self._codigos.take(pos) == codigos
+        return np.where(ok, self._precios.take(pos), self.default)
+
+    def as_of(self, fecha=None):
+        """``TariffTable`` vigente en ``fecha`` (hoy si no se indica)."""
+        fecha = fecha or date.today()
+        fechas = [fecha] * len(self.conceptos)
+        precios = self.rates(self.conceptos, fechas)
+        default = precios[self._otros] if self._otros >= 0 else self.default
+        return TariffTable(self.conceptos, precios, default)
+
+    def rate(self, concepto, fecha=None):
+        return self.as_of(fecha).rate(concepto)
+
+    def price(self, df, concept_col, date_col, qty_col=None):
+        """Dinero por fila con la tarifa vigente en ``date_col``."""
+        valor = self.rates(df[concept_col], df[date_col])
+        if qty_col is not None:
+            valor = valor * pd.to_numeric(df[qty_col], errors="coerce").fillna(0).to_numpy()
+        return pd.Series(valor, index=df.index)
+
+    def price_columns(self, df, columnas, date_col):
+        """``{columna_salida: (concepto, columna_cantidad)}`` con la tarifa de cada fecha."""
+        out = df.copy()
+        fechas = df[date_col]
+        for dst, (concepto, qty) in columnas.items():
+            tarifa = self.rates(np.full(len(df), concepto, dtype=object), fechas)
+            out[dst] = pd.to_numeric(out[qty], errors="coerce").fillna(0).to_numpy() * tarifa
+        return out
+
+    def totals(self, df, concept_col, date_col, by, qty_col=None, name="Valor"):
+        valor = self.price(df, concept_col, date_col, qty_col)
+        return df[by].assign(**{name: valor}).groupby(by, as_index=False, observed=True)[name].sum()
+
+    # ---- Meses cerrados ----
+    @property
+    def ultimo_cambio(self):
+        """Fecha de la versión más reciente (``None`` si nunca cambió)."""
+        fechas = self.versiones[VIGENCIA_COL]
+        fechas = fechas[fechas > _ORIGEN]
+        return fechas.max() if len(fechas) else None
+
+    def cerrado_hasta(self):
+        """Mes (AAAA-MM) del último cambio: los meses anteriores ya no cambian de precio."""
+        return month_str(self.ultimo_cambio) if self.ultimo_cambio is not None else ""
+
+    def firma(self):
+        """Versiones como lista JSON (para guardar junto a lo calculado con ellas)."""
+        v = self.versiones
+        filas = zip(v["Concepto"], v["Tarifa"].astype(float), v[VIGENCIA_COL].dt.strftime("%Y-%m-%d"))
+        return [["", self.default, _ORIGEN.strftime("%Y-%m-%d")]] + [list(f) for f in filas]
+
+    def cambio_desde(self, firma):
+        """Primera fecha cuyo precio difiere respecto de ``firma`` (``None`` si es igual).
+
+        Lo calculado antes de esa fecha sigue valiendo: solo lo posterior se recalcula.
+        """
+        dif = {tuple(f) for f in self.firma()} ^ {tuple(f) for f in (firma or [])}
+        if not dif:
+            return None
+        return min(pd.Timestamp(d) for _, _, d in dif)
+
+
+def vigentes(historial, keys=("Concepto",), since_col=VIGENCIA_COL, fecha=None):
+    """Filas de ``historial`` vigentes en ``fecha`` (hoy): la última versión de cada tarifa.
+
+    Sin ``keys`` (una sola fila por versión, como la config) devuelve solo la última.
+    """
+    if historial is None or historial.empty:
+        return historial
+    fecha = pd.Timestamp(fecha or date.today())
+    desde = _desde(historial, since_col)
+    actual = historial[desde <= fecha].assign(_desde=desde).sort_values("_desde", kind="stable")
+    actual = actual.drop_duplicates(subset=list(keys), keep="last") if keys else actual.tail(1)
+    return actual.drop(columns="_desde").reset_index(drop=True)
+
+
+def nueva_version(historial, editadas, keys=("Concepto",), rate_col="Tarifa", since_col=VIGENCIA_COL, fecha=None):
+    """``historial`` + una versión vigente desde ``fecha`` (hoy) por cada tarifa que cambió.
+
+    Lo que se edita no pisa las versiones anteriores; una tarifa borrada en el
+    editor pasa a 0 desde ``fecha``. Editar dos veces el mismo día reemplaza la
+    versión de ese día.
+    """
+    keys = list(keys)
+    fecha = pd.Timestamp(fecha or date.today()).normalize()
+    hist = historial.copy() if historial is not None else pd.DataFrame(columns=keys + [rate_col])
+    if since_col not in hist.columns:
+        hist[since_col] = ""
+    antes = vigentes(hist, keys, since_col, fecha)
+    ed = editadas.dropna(subset=keys)
+    cmp = ed[keys + [rate_col]].astype({k: str for k in keys}).merge(
+        antes[keys + [rate_col]].astype({k: str for k in keys}),
+        on=keys, how="outer", suffixes=("", "_antes"), indicator=True,
+    )
+    nueva = pd.to_numeric(cmp[rate_col], errors="coerce").fillna(0.0)
+    previa = pd.to_numeric(cmp[f"{rate_col}_antes"], errors="coerce")
+    cambio = (cmp["_merge"] == "left_only") | ((cmp["_merge"] == "both") & nueva.ne(previa))
+    borrada = (cmp["_merge"] == "right_only") & previa.ne(0)
+    if not (cambio | borrada).any():
+        return hist
+    filas = cmp.loc[cambio | borrada, keys].copy()
+    filas[rate_col] = nueva.where(~borrada, 0.0)[cambio | borrada]
+    filas[since_col] = fecha.strftime("%Y-%m-%d")
+    mismo_dia = _desde(hist, since_col).eq(fecha)
+    if mismo_dia.any():
+        claves = hist[keys].astype(str).apply(tuple, axis=1)
+        hist = hist[~(mismo_dia & claves.isin(list(filas[keys].itertuples(index=False, name=None))))]
+    return pd.concat([hist, filas], ignore_index=True)
@@ -0,0 +1,243 @@
+"""Cola write-behind para la persistencia en GitHub."""
+import atexit
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from productividad.por_proceso import todas, unica
+
+log = logging.getLogger(__name__)
+
+JOURNAL_DIR = ".write_behind"
+BATCH_KEY = "__batch__"  # línea del lote congelado con su id
+# Espera tras una subida fallida: se duplica con cada fallo seguido, hasta el máximo
+BACKOFF_INICIAL_S = 2.0
+BACKOFF_MAX_S = 300.0
+
+
+def new_batch_id():
+    """Id único y ordenable cronológicamente de un lote (o segmento)."""
+    ts = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    return f"{ts}-{uuid.uuid4().hex[:8]}"
+
+
+class WriteBehindQueue:
+    """Diario durable + vaciado agrupado con ``flush_fn(rows, batch_id) -> bool``.
+
+    Cada lote congelado lleva un id fijo escrito en su archivo: si el proceso
+    muere después de subirlo y antes de borrarlo, al volver se entrega otra
+    vez con el MISMO id y ``flush_fn`` lo reconoce como ya aplicado.
+    """
+
+    def __init__(self, name, flush_fn, max_rows=50, max_seconds=20.0, journal_dir=JOURNAL_DIR):
+        os.makedirs(journal_dir, exist_ok=True)
+        self.name = name
+        self.flush_fn = flush_fn
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+        self.journal_path = os.path.join(journal_dir, f"{name}.jsonl")
+        # Lote "congelado" mientras se sube; si la subida falla se reintenta tal cual
+        self.flushing_path = os.path.join(journal_dir, f"{name}.flushing.jsonl")
+        self._lock = threading.Lock()          # escrituras al diario
+        self._flush_lock = threading.Lock()    # un solo vaciado a la vez
+        self._wake = threading.Event()
+        for path in (self.journal_path, self.flushing_path):
+            self._repair(path)
+        self._pending = self._count(self.journal_path)
+        self._first_ts = os.path.getmtime(self.journal_path) if self._pending else None
+        self.last_error = None
+        self.fallos = 0             # subidas fallidas seguidas
+        self.proximo_intento = 0.0  # el hilo no reintenta antes de este instante (time.time())
+        self._thread = threading.Thread(target=self._run, name=f"write-behind-{name}", daemon=True)
+        self._thread.start()
+
+    # ---- Diario ----
+    @staticmethod
+    def _count(path):
+        if not os.path.exists(path):
+            return 0
+        with open(path, "rb") as fh:
+            return sum(1 for line in fh if line.strip())
+
+    @staticmethod
+    def _repair(path):
+        """Corta una última línea a medio escribir (el proceso murió durante ``append``)."""
+        if not os.path.exists(path):
+            return
+        with open(path, "rb+") as fh:
+            data = fh.read()
+            if not data or data.endswith(b"\n"):
+                return
+            fin = data.rfind(b"\n") + 1
+            log.warning("%s: se descarta una última línea incompleta (%d bytes)", path, len(data) - fin)
+            fh.truncate(fin)
+            fh.flush()
+            os.fsync(fh.fileno())
+
+    @staticmethod
+    def _load(path):
+        """``(filas, id de lote)`` de un archivo del diario.
+
+        Una última línea inválida (escritura cortada) se ignora; una inválida
+        en el medio es corrupción real y se propaga.
+        """
+        if not os.path.exists(path):
+            return [], None
+        # errors="replace": un carácter multibyte cortado no impide leer el resto
+        with open(path, encoding="utf-8", errors="replace") as fh:
+            lines = [line for line in fh if line.strip()]
+        rows, batch_id = [], None
+        for i, line in enumerate(lines):
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                if i < len(lines) - 1:
+                    raise
+                log.warning("%s: se ignora la última línea incompleta", path)
+                continue
+            if isinstance(rec, dict) and list(rec) == [BATCH_KEY]:
+                batch_id = rec[BATCH_KEY]
+            else:
+                rows.append(rec)
+        return rows, batch_id
+
+    @classmethod
+    def _read(cls, path):
+        return cls._load(path)[0]
+
+    def _mark_batch(self):
+        """Id del lote congelado; si aún no tiene, se le escribe uno antes de la primera subida."""
+        rows, batch_id = self._load(self.flushing_path)
+        if batch_id is None:
+            batch_id = new_batch_id()
+            with open(self.flushing_path, "a", encoding="utf-8") as fh:
+                fh.write(json.dumps({BATCH_KEY: batch_id}) + "\n")
+                fh.flush()
+                os.fsync(fh.fileno())
+        return rows, batch_id
+
+    def append(self, rows):
+        """Escribe las filas en el diario y hace fsync. Devuelve True cuando son durables."""
+        rows = list(rows)
+        if not rows:
+            return True
+        data = "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in rows)
+        with self._lock:
+            with open(self.journal_path, "a", encoding="utf-8") as fh:
+                fh.write(data)
+                fh.flush()
+                os.fsync(fh.fileno())
+            if not self._pending:
+                self._first_ts = time.time()
+            self._pending += len(rows)
+            if self._pending >= self.max_rows:
+                self._wake.set()
+        return True
+
+    def pending(self):
+        """Filas aún no subidas (para que el usuario vea lo que acaba de guardar)."""
+        with self._lock:
+            return self._read(self.flushing_path) + self._read(self.journal_path)
+
+    def estado(self):
+        """Filas pendientes, fallos seguidos, último error y segundos hasta el próximo reintento."""
+        return {
+            "pendientes": len(self.pending()),
+            "fallos": self.fallos,
+            "ultimo_error": None if self.last_error is None else str(self.last_error),
+            "reintento_en_s": max(0.0, self.proximo_intento - time.time()) if self.fallos else 0.0,
+        }
+
+    def aviso(self):
+        """Texto para la interfaz cuando la subida está fallando (None si todo va bien)."""
+        if not self.fallos:
+            return None
+        e = self.estado()
+        return (f"{e['pendientes']:,} fila(s) guardadas localmente sin subir: {e['fallos']} intento(s) fallidos "
+                f"({e['ultimo_error']}). Próximo intento en {e['reintento_en_s']:.0f} s.")
+
+    # ---- Vaciado ----
+    def _fallo(self, exc):
+        """Backoff exponencial con jitter: las réplicas que fallan juntas no reintentan a la vez."""
+        self.fallos += 1
+        espera = min(BACKOFF_MAX_S, BACKOFF_INICIAL_S * 2 ** (self.fallos - 1))
+        espera *= random.uniform(0.5, 1.0)
+        self.last_error = exc
+        self.proximo_intento = time.time() + espera
+        log.warning("%s: subida fallida (%d seguidas): %s; próximo intento en %.1f s",
+                    self.name, self.fallos, exc, espera)
+
+    def flush(self):
+        """Sube lo pendiente como un solo commit. Devuelve cuántas filas subió.
+
+        Una llamada directa no espera el backoff (solo lo respeta el hilo).
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not os.path.exists(self.flushing_path):
+                    if not self._pending:
+                        return 0
+                    os.replace(self.journal_path, self.flushing_path)
+                    self._pending = 0
+                    self._first_ts = None
+            rows, batch_id = self._mark_batch()
+            try:
+                ok = self.flush_fn(rows, batch_id) if rows else True
+            except Exception as exc:  # la red falla: se reintenta tras el backoff
+                self._fallo(exc)
+                return 0
+            if not ok:
+                self._fallo(RuntimeError("la subida no se confirmó"))
+                return 0
+            self.last_error, self.fallos, self.proximo_intento = None, 0, 0.0
+            with self._lock:
+                os.remove(self.flushing_path)
+            return len(rows)
+
+    def _due(self):
+        if time.time() < self.proximo_intento:
+            return False
+        with self._lock:
+            if os.path.exists(self.flushing_path):
+                return True
+            if not self._pending:
+                return False
+            return self._pending >= self.max_rows or time.time() - self._first_ts >= self.max_seconds
+
+    def _run(self):
+        while True:
+            self._wake.wait(timeout=min(1.0, self.max_seconds))
+            self._wake.clear()
+            if self._due():
+                self.flush()
+
+
+def get_queue(name, flush_fn, max_rows=50, max_seconds=20.0, journal_dir=JOURNAL_DIR):
+    """``flush_fn`` se actualiza en cada llamada para usar los helpers del último rerun."""
+    def actualizar(q):
+        q.flush_fn, q.max_rows, q.max_seconds = flush_fn, max_rows, max_seconds
+
+    return unica("write_behind", name, lambda: WriteBehindQueue(name, flush_fn, max_rows, max_seconds, journal_dir),
+                 actualizar)
+
+
+def pending_all():
+    """Filas pendientes (aún no subidas) de todas las colas del proceso."""
+    return sum(len(q.pending()) for q in todas("write_behind"))
+
+
+@atexit.register
+def flush_all():
+    """Sube lo pendiente de todas las colas (al salir del proceso). Devuelve cuántas filas subió."""
+    n = 0
+    for q in todas("write_behind"):
+        try:
+            n += q.flush()
+        except Exception:
+            pass
+    return n
@@ -0,0 +1,76 @@
+"""GitHub falso (``benchmarks/gh_local.py``) con los mismos helpers que usan las apps."""
+import base64
+import json
+
+import pytest
+
+from benchmarks.gh_local import LocalGitHub
+from productividad import gh_client
+from productividad.gh_cache import forget, get_contents, known_sha, remember
+from productividad.gh_sync import put_with_retry
+from productividad.ledger import GitHubLedger
+
+BRANCH = "main"
+
+
+class GitHubFalso:
+    """``get_file``/``put_file``/``list_dir``/``delete_file`` como los de app_portal_unico."""
+
+    def __init__(self, servidor):
+        self.servidor = servidor
+        self.repo = servidor.repo
+        self.api = f"{servidor.url}/repos/o/r/contents"
+        self.headers = {"Accept": "application/vnd.github+json"}
+
+    def get_file(self, path, ref=BRANCH):
+        status, payload, sha, _ = get_contents(f"{self.api}/{path}", self.headers, {"ref": ref})
+        return (payload.decode("utf-8"), sha) if status == 200 else (None, None)
+
+    def put_file(self, path, content_str, message, branch=BRANCH, sha=None, on_conflict=None):
+        url = f"{self.api}/{path}"
+        if sha is None:
+            sha = known_sha(url, {"ref": branch})
+
+        def put(content, sha):
+            payload = {"message": message, "content": base64.b64encode(content.encode("utf-8")).decode(),
+                       "branch": branch}
+            if sha:
+                payload["sha"] = sha
+            r = gh_client.put(url, headers=self.headers, data=json.dumps(payload))
+            if r.status_code in (200, 201):
+                remember(url, {"ref": branch}, r.json()["content"]["sha"], content.encode("utf-8"))
+            else:
+                forget(url, {"ref": branch})
+            return r.status_code
+
+        status = put_with_retry(put, lambda: self.get_file(path, branch), on_conflict, content_str, sha,
+                                backoff=0.0)
+        return status in (200, 201)
+
+    def list_dir(self, path, ref=BRANCH):
+        status, payload, _, _ = get_contents(f"{self.api}/{path}", self.headers, {"ref": ref})
+        return payload if status == 200 and isinstance(payload, list) else []
+
+    def delete_file(self, path, sha, message, branch=BRANCH):
+        payload = {"message": message, "sha": sha, "branch": branch}
+        r = gh_client.delete(f"{self.api}/{path}", headers=self.headers, data=json.dumps(payload))
+        forget(f"{self.api}/{path}", {"ref": branch})
+        return r.status_code == 200
+
+    def text(self, path):
+        return self.get_file(path)[0]
+
+    def put_text(self, path, text, message, on_conflict):
+        return self.put_file(path, text, message, on_conflict=on_conflict)
+
+    def ledger(self, path, columns):
+        return GitHubLedger(path, columns, self.get_file, self.put_file, self.list_dir, self.delete_file, BRANCH)
+
+
+@pytest.fixture
+def github():
+    servidor = LocalGitHub().start()
+    try:
+        yield GitHubFalso(servidor)
+    finally:
+        servidor.stop()
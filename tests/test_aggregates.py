@@ -0,0 +1,151 @@
+"""``MonthlyAggregate`` contra el ``groupby`` completo que hacían los tableros."""
+import pandas as pd
+import pytest
+
+from productividad.aggregates import MonthlyAggregate, get_aggregate
+from productividad.tarifas import TariffHistory
+
+KEYS = ["Empleado", "Mes"]
+MEASURES = {"Casos": "Casos", "Casos_Adicionales": "Casos_Adicionales", "Horas_Extra": "Horas_Extra"}
+PRICED = {"Ingreso_Variable": ("Caso_Adicional", "Casos_Adicionales"), "Ingreso_Extras": ("Hora_Extra", "Horas_Extra")}
+
+
+def registros(filas):
+    df = pd.DataFrame(filas, columns=["Fecha", "Empleado", "Casos", "Casos_Adicionales", "Horas_Extra"])
+    df["Mes"] = pd.to_datetime(df["Fecha"]).dt.strftime("%Y-%m")
+    return df
+
+
+LOTE_1 = registros([
+    ("2025-01-10", "Ana", 5, 1, 2.0), ("2025-01-20", "Beto", 3, 0, 1.5), ("2025-02-03", "Ana", 4, 2, 0.0),
+    ("2025-02-28", "Ana", 6, 1, 3.0), ("2025-03-01", "Beto", 2, 2, 1.0),
+])
+LOTE_2 = registros([("2025-03-15", "Ana", 1, 3, 2.5), ("2025-01-31", "Beto", 7, 1, 0.5)])
+
+
+def tarifas(*versiones):
+    filas = [(c, t, d) for d, precios in versiones for c, t in precios.items()]
+    return pd.DataFrame(filas, columns=["Concepto", "Tarifa", "Vigente_desde"])
+
+
+BASE = tarifas(("", {"Caso_Adicional": 4000.0, "Hora_Extra": 10000.0}))
+CAMBIO = pd.concat([BASE, tarifas(("2025-03-01", {"Caso_Adicional": 4500.0}))], ignore_index=True)
+
+
+def esperado(df, tabla):
+    # Cálculo anterior: groupby sobre todas las filas y tarifa vigente buscada fila a fila
+    def tarifa(concepto, fecha):
+        vers = tabla[tabla["Concepto"] == concepto].assign(
+            Desde=lambda t: pd.to_datetime(t["Vigente_desde"]).fillna(pd.Timestamp("1900-01-01"))
+        )
+        vers = vers[vers["Desde"] <= pd.Timestamp(fecha)].sort_values("Desde")
+        return float(vers["Tarifa"].iloc[-1]) if len(vers) else 0.0
+
+    df = df.copy()
+    df["Ingreso_Variable"] = [q * tarifa("Caso_Adicional", f) for q, f in zip(df["Casos_Adicionales"], df["Fecha"])]
+    df["Ingreso_Extras"] = [q * tarifa("Hora_Extra", f) for q, f in zip(df["Horas_Extra"], df["Fecha"])]
+    cols = list(MEASURES) + list(PRICED)
+    return df.groupby(KEYS, as_index=False)[cols].sum()
+
+
+def ordenado(df):
+    df = df.sort_values(KEYS).reset_index(drop=True)
+    df[KEYS] = df[KEYS].astype(str)
+    return df.astype({c: float for c in df.columns if c not in KEYS})
+
+
+class Fuente:
+    """Tabla en memoria con una versión que cambia en cada escritura."""
+
+    def __init__(self):
+        self.df = pd.DataFrame()
+        self.escrituras = 0
+        self.lecturas = 0
+
+    def write(self, rows):
+        self.df = pd.concat([self.df, rows], ignore_index=True)
+        self.escrituras += 1
+
+    def load(self):
+        self.lecturas += 1
+        return self.df.copy()
+
+    def version(self):
+        return str(self.escrituras)
+
+
+@pytest.fixture
+def fuente():
+    return Fuente()
+
+
+def agregado(tmp_path, fuente, tabla):
+    return MonthlyAggregate(
+        str(tmp_path / "resumen"), KEYS, MEASURES, fuente.load, fuente.version,
+        pricing=TariffHistory.from_frame(tabla), priced=PRICED,
+    )
+
+
+def test_fold_igual_a_groupby(tmp_path, fuente):
+    agg = agregado(tmp_path, fuente, BASE)
+    pd.testing.assert_frame_equal(ordenado(agg.fold(LOTE_1)), ordenado(esperado(LOTE_1, BASE)))
+
+
+def test_append_suma_solo_lo_nuevo(tmp_path, fuente):
+    agg = agregado(tmp_path, fuente, BASE)
+    agg.append(LOTE_1, fuente.write)
+    agg.get()
+    agg.append(LOTE_2, fuente.write)
+    lecturas = fuente.lecturas
+    total = agg.get()
+    assert fuente.lecturas == lecturas
+    todo = pd.concat([LOTE_1, LOTE_2], ignore_index=True)
+    pd.testing.assert_frame_equal(ordenado(total), ordenado(esperado(todo, BASE)))
+
+
+def test_cambio_de_tarifas_recalcula_desde_el_cambio(tmp_path, fuente):
+    fuente.write(pd.concat([LOTE_1, LOTE_2], ignore_index=True))
+    agg = agregado(tmp_path, fuente, BASE)
+    antes = agg.get()
+    llamadas = []
+    rebuild = agg.rebuild
+
+    def espiar(desde=None):
+        llamadas.append(desde)
+        return rebuild(desde=desde)
+
+    agg.rebuild = espiar
+    agg.pricing = TariffHistory.from_frame(CAMBIO)
+    despues = agg.get()
+    assert llamadas == [pd.Timestamp("2025-03-01")]
+    pd.testing.assert_frame_equal(ordenado(despues), ordenado(esperado(fuente.df, CAMBIO)))
+    # Los meses anteriores al cambio quedan exactamente como estaban
+    cerrados = lambda df: ordenado(df[df["Mes"] < "2025-03"])
+    pd.testing.assert_frame_equal(cerrados(despues), cerrados(antes))
+    assert (ordenado(despues)["Ingreso_Variable"] != ordenado(antes)["Ingreso_Variable"]).any()
+
+
+def test_view_filtra_y_resume(tmp_path, fuente):
+    fuente.write(LOTE_1)
+    agg = agregado(tmp_path, fuente, BASE)
+    vista = agg.view({"Empleado": ["Ana"]})
+    ref = esperado(LOTE_1[LOTE_1["Empleado"] == "Ana"], BASE)
+    pd.testing.assert_frame_equal(ordenado(vista), ordenado(ref))
+
+
+def test_sesion_sin_tarifas_no_borra_los_precios(tmp_path, fuente):
+    # Dos sesiones comparten el agregado del proceso; una llega sin tarifas (rerun viejo)
+    path = str(tmp_path / "compartido")
+    fuente.write(LOTE_1)
+
+    def sesion(pricing):
+        return get_aggregate(path, KEYS, MEASURES, fuente.load, fuente.version, pricing=pricing, priced=PRICED)
+
+    agg = sesion(TariffHistory.from_frame(BASE))
+    assert sesion(None) is agg
+    fuente.write(LOTE_2)
+    total = agg.get()
+    todo = pd.concat([LOTE_1, LOTE_2], ignore_index=True)
+    pd.testing.assert_frame_equal(ordenado(total), ordenado(esperado(todo, BASE)))
+    guardado = pd.read_csv(f"{path}.csv")
+    assert guardado["Ingreso_Variable"].sum() == esperado(todo, BASE)["Ingreso_Variable"].sum() > 0
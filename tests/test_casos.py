@@ -0,0 +1,108 @@
+"""Parseo de casos contra los bucles anteriores y lectura de archivos CSV/XLSX."""
+import io
+
+import pandas as pd
+import pytest
+
+from productividad.casos import SEPARADORES_ESPACIO, leer_casos, parse_casos, xlsx_disponible
+
+TEXTO = "101, 102;103\r\n 104 \n\n105,,106\t107\n 1 08 ;101"
+
+
+def parsear_casos(texto):
+    # Versión anterior de app_admin
+    raw_items = []
+    for linea in texto.splitlines():
+        partes = [p.strip() for p in linea.replace(";", ",").split(",")]
+        raw_items.extend(p for p in partes if p)
+    return [x for x in raw_items if x != ""]
+
+
+def parse_case_numbers(text):
+    # Versión anterior de app_enterprise
+    if not text:
+        return []
+    for sep in [",", ";", "\n", "\r", "\t"]:
+        text = text.replace(sep, " ")
+    parts = [p.strip() for p in text.split(" ") if p.strip()]
+    seen = set()
+    uniq = []
+    for p in parts:
+        if p not in seen:
+            uniq.append(p)
+            seen.add(p)
+    return uniq
+
+
+def test_parse_casos_igual_al_bucle_de_admin():
+    # Admin no cortaba en tabuladores: el texto de prueba los evita
+    texto = TEXTO.replace("\t", ",")
+    assert parse_casos(texto).tolist() == parsear_casos(texto)
+
+
+def test_parse_casos_igual_al_bucle_empresarial():
+    assert parse_casos(TEXTO, SEPARADORES_ESPACIO, unicos=True).tolist() == parse_case_numbers(TEXTO)
+
+
+def test_parse_casos_vacio():
+    assert parse_casos("").empty
+    assert parse_casos(" \n ;, ").empty
+
+
+def archivo(texto, encoding="utf-8", nombre="casos.csv"):
+    buf = io.BytesIO(texto.encode(encoding))
+    buf.name = nombre
+    return buf
+
+
+@pytest.mark.parametrize("sep", [",", ";"])
+def test_csv_con_encabezado(sep):
+    texto = sep.join(["Número de caso", "Fecha", "Tipo_caso"]) + "\n"
+    texto += sep.join(["123", "05/03/2025", "Adicional"]) + "\n" + sep.join(["124.0", "", " Productividad "]) + "\n"
+    df = leer_casos(archivo(texto))
+    assert df["Numero_caso"].tolist() == ["123", "124"]
+    assert df["Fecha"].iloc[0] == pd.Timestamp("2025-03-05")
+    assert pd.isna(df["Fecha"].iloc[1])
+    assert df["Tipo_caso"].tolist() == ["Adicional", "Productividad"]
+
+
+def test_csv_sin_encabezado():
+    df = leer_casos(archivo("900\n901\n\n902\n"))
+    assert df["Numero_caso"].tolist() == ["900", "901", "902"]
+    assert list(df.columns) == ["Numero_caso"]
+
+
+def test_csv_cp1252_de_excel():
+    texto = "Categoría;Caso\nRevisión;A-1\nTrámite;A-2\n"
+    df = leer_casos(archivo(texto, "cp1252"))
+    assert df["Numero_caso"].tolist() == ["A-1", "A-2"]
+    assert df["Categoria"].tolist() == ["Revisión", "Trámite"]
+
+
+def test_csv_utf8_con_bom():
+    df = leer_casos(archivo("Numero_caso\n77\n", "utf-8-sig"))
+    assert df["Numero_caso"].tolist() == ["77"]
+
+
+def test_csv_vacio():
+    df = leer_casos(archivo(""))
+    assert df.empty and list(df.columns) == ["Numero_caso"]
+
+
+def test_csv_igual_a_read_csv():
+    texto = "caso,fecha\n10,2025-01-02\n11,2025-01-03\n"
+    ref = pd.read_csv(io.StringIO(texto), dtype=str)
+    df = leer_casos(archivo(texto))
+    assert df["Numero_caso"].tolist() == ref["caso"].tolist()
+    assert df["Fecha"].tolist() == pd.to_datetime(ref["fecha"]).tolist()
+
+
+@pytest.mark.skipif(not xlsx_disponible(), reason="openpyxl no está instalado")
+def test_xlsx():
+    buf = io.BytesIO()
+    pd.DataFrame({"Numero Caso": [123.0, 124.0], "Tipo": ["Adicional", "Productividad"]}).to_excel(buf, index=False)
+    buf.seek(0)
+    buf.name = "casos.xlsx"
+    df = leer_casos(buf)
+    assert df["Numero_caso"].tolist() == ["123", "124"]
+    assert df["Tipo_caso"].tolist() == ["Adicional", "Productividad"]
@@ -0,0 +1,89 @@
+"""Índice de duplicados: O(k) por guardado y reutilizable tras reiniciar."""
+import os
+
+import pandas as pd
+import pytest
+
+from productividad import dup_index
+from productividad.dup_index import DuplicateIndex
+
+
+def registros(filas):
+    return pd.DataFrame(filas, columns=["ID", "Empleado", "Numero_caso"])
+
+
+BASE = registros([(1, "Ana", "C1"), (2, "Ana", "C2"), (3, "Beto", "C1"), (4, "Ana", "C1")])
+NUEVOS = registros([(5, "Beto", "C9"), (6, "Ana", "C2")])
+
+
+def repetidos(df, empleado, casos):
+    # Cálculo anterior: duplicated sobre todo el histórico
+    d = df[(df["Empleado"] == empleado) & df["Numero_caso"].isin(casos)]
+    return {c: sorted(g["ID"].tolist()) for c, g in d.groupby("Numero_caso")}
+
+
+@pytest.fixture
+def indice(tmp_path):
+    return DuplicateIndex("admin", index_dir=str(tmp_path)).ensure("v1", lambda: BASE)
+
+
+def test_lookup_igual_al_historico(indice):
+    casos = ["C1", "C2", "C3"]
+    assert indice.lookup("Ana", casos) == repetidos(BASE, "Ana", casos)
+    assert indice.contains("Beto", "C1") and not indice.contains("Beto", "C2")
+
+
+def test_add_y_contains(indice):
+    assert indice.add(NUEVOS, "v1", "v2")
+    assert indice.contains("Beto", "C9")
+    todo = pd.concat([BASE, NUEVOS], ignore_index=True)
+    assert indice.lookup("Ana", ["C2"]) == repetidos(todo, "Ana", ["C2"])
+    # Versión vieja: no se suma (se reconstruirá)
+    assert not indice.add(NUEVOS, "v1", "v3")
+
+
+def test_add_no_reescribe_la_foto(indice):
+    foto = os.stat(indice.path)
+    indice.add(NUEVOS, "v1", "v2")
+    assert os.stat(indice.path).st_mtime_ns == foto.st_mtime_ns
+    with open(indice.delta_path, encoding="utf-8") as fh:
+        assert len(fh.readlines()) == 1
+
+
+def test_reinicio_reutiliza_el_disco(indice, tmp_path, monkeypatch):
+    indice.add(NUEVOS, "v1", "v2")
+    todo = pd.concat([BASE, NUEVOS], ignore_index=True)
+    # Proceso nuevo, otra firma de versión (otros shas/mtimes) y las mismas filas en otro orden
+    nuevo = DuplicateIndex("admin", index_dir=str(tmp_path))
+    monkeypatch.setattr(nuevo, "_pares", lambda df: pytest.fail("no debía reconstruir"))
+    nuevo.ensure(("otra", "firma"), lambda: todo.iloc[::-1])
+    assert nuevo.lookup("Ana", ["C1", "C2"]) == repetidos(todo, "Ana", ["C1", "C2"])
+
+
+def test_reinicio_con_otros_datos_reconstruye(indice, tmp_path):
+    otros = pd.concat([BASE, registros([(7, "Caro", "C1")])], ignore_index=True)
+    nuevo = DuplicateIndex("admin", index_dir=str(tmp_path)).ensure("v9", lambda: otros)
+    assert nuevo.contains("Caro", "C1")
+
+
+def test_compacta_el_diario(indice, tmp_path, monkeypatch):
+    monkeypatch.setattr(dup_index, "COMPACTAR_CADA", 3)
+    filas = []
+    for i in range(5):
+        lote = registros([(10 + i, "Dani", f"D{i}")])
+        filas.append(lote)
+        assert indice.add(lote, f"v{i + 1}" if i else "v1", f"v{i + 2}")
+    with open(indice.delta_path, encoding="utf-8") as fh:
+        assert len(fh.readlines()) < 3
+    todo = pd.concat([BASE] + filas, ignore_index=True)
+    nuevo = DuplicateIndex("admin", index_dir=str(tmp_path)).ensure("x", lambda: todo)
+    assert nuevo.lookup("Dani", [f"D{i}" for i in range(5)]) == repetidos(todo, "Dani", [f"D{i}" for i in range(5)])
+
+
+def test_linea_cortada_del_diario(indice, tmp_path):
+    indice.add(NUEVOS, "v1", "v2")
+    with open(indice.delta_path, "a", encoding="utf-8") as fh:
+        fh.write('{"desde": [6, ')
+    todo = pd.concat([BASE, NUEVOS], ignore_index=True)
+    nuevo = DuplicateIndex("admin", index_dir=str(tmp_path)).ensure("x", lambda: todo)
+    assert nuevo.lookup("Ana", ["C2"]) == repetidos(todo, "Ana", ["C2"])
@@ -0,0 +1,78 @@
+"""Reparto del cupo de la API: pausas acotadas por rerun y copia guardada cerca del límite."""
+import time
+
+import pytest
+
+from productividad import gh_cache, gh_client
+
+
+class Respuesta:
+    status_code = 200
+    headers = {}
+    text = ""
+
+
+@pytest.fixture
+def casi_sin_cupo(monkeypatch):
+    """Quedan 2 llamadas y falta una hora para el reset: cada pausa sería de ``MAX_WAIT_S``."""
+    monkeypatch.setitem(gh_client._rate, "remaining", 2)
+    monkeypatch.setitem(gh_client._rate, "reset", time.time() + 3600)
+    monkeypatch.setattr(gh_client._budget, "left", None, raising=False)
+    pausas = []
+    monkeypatch.setattr(gh_client.time, "sleep", pausas.append)
+    monkeypatch.setattr(gh_client.get_session(), "request", lambda *a, **kw: Respuesta())
+    return pausas
+
+
+def test_pausa_total_acotada_por_rerun(casi_sin_cupo):
+    assert gh_client.near_limit()
+    gh_client.begin_rerun()
+    for _ in range(5):
+        gh_client.get("https://api.github.invalid/x")
+    assert sum(casi_sin_cupo) == pytest.approx(gh_client.THROTTLE_BUDGET_S)
+    # El rerun siguiente tiene su propio cupo
+    gh_client.begin_rerun()
+    gh_client.get("https://api.github.invalid/x")
+    assert sum(casi_sin_cupo) == pytest.approx(2 * gh_client.THROTTLE_BUDGET_S)
+
+
+def test_pausa_acotada_por_llamada_fuera_de_un_rerun(casi_sin_cupo):
+    for _ in range(3):
+        gh_client.get("https://api.github.invalid/x")
+    assert casi_sin_cupo == [gh_client.THROTTLE_BUDGET_S] * 3
+    assert getattr(gh_client._budget, "left") is None
+
+
+def test_sin_pausa_lejos_del_limite(casi_sin_cupo, monkeypatch):
+    monkeypatch.setitem(gh_client._rate, "remaining", gh_client.LOW_WATERMARK + 1)
+    gh_client.get("https://api.github.invalid/x")
+    monkeypatch.setitem(gh_client._rate, "remaining", 2)
+    monkeypatch.setitem(gh_client._rate, "reset", time.time() - 1)   # el reset ya pasó
+    gh_client.get("https://api.github.invalid/x")
+    assert casi_sin_cupo == []
+
+
+def test_copia_guardada_cerca_del_limite(github, monkeypatch):
+    github.put_file("tarifas.csv", "a\n1\n", "base")
+    github.repo.files["tarifas.csv"] = b"a\n2\n"          # otra sesión la cambió
+    monkeypatch.setitem(gh_client._rate, "remaining", 2)
+    monkeypatch.setitem(gh_client._rate, "reset", time.time() + 3600)
+    monkeypatch.setattr(gh_client.time, "sleep", lambda s: None)
+    gets = github.repo.llamadas["GET"]
+    # Cerca del límite no se va a la red: se sirve lo último que escribió o leyó este proceso
+    assert github.text("tarifas.csv") == "a\n1\n"
+    assert github.repo.llamadas["GET"] == gets
+
+    # Un conflicto descarta la copia: el reintento relee la cabeza real y fusiona sobre ella
+    assert github.put_file("tarifas.csv", "a\n1\n3\n", "agrega 3", on_conflict=lambda remoto: remoto + "3\n")
+    assert github.repo.files["tarifas.csv"] == b"a\n2\n3\n"
+
+
+def test_borrar_descarta_la_copia(github):
+    github.put_file("x.csv", "a\n1\n", "crea")
+    _, sha = github.get_file("x.csv")
+    assert github.delete_file("x.csv", sha, "borra")
+    assert gh_cache.known_sha(f"{github.api}/x.csv", {"ref": "main"}) is None
+    # Volver a crearlo no manda el sha del archivo borrado
+    assert github.put_file("x.csv", "a\n2\n", "crea de nuevo")
+    assert github.repo.llamadas["422"] == 0
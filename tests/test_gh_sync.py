@@ -0,0 +1,110 @@
+"""Escrituras optimistas: ``put_with_retry`` y ``merge_appended`` ante conflictos."""
+from io import StringIO
+
+import pandas as pd
+
+from productividad.gh_sync import merge_appended, put_with_retry
+
+KEY = ["ID", "Empleado", "Numero_caso"]
+
+
+def casos(ids, empleado="Ana"):
+    return pd.DataFrame({"ID": ids, "Empleado": empleado, "Numero_caso": [f"C-{i}" for i in ids]})
+
+
+class Remoto:
+    """Archivo con sha que cambia en cada escritura; ``put`` exige el sha vigente."""
+
+    def __init__(self, content=""):
+        self.content, self.sha, self.puts = content, "s0", 0
+
+    def put(self, content, sha):
+        self.puts += 1
+        if sha != self.sha:
+            return 409
+        self.content, self.sha = content, f"s{self.puts}"
+        return 200
+
+    def refetch(self):
+        return self.content, self.sha
+
+
+def test_put_sin_conflicto():
+    r = Remoto("a")
+    assert put_with_retry(r.put, r.refetch, None, "b", "s0", backoff=0) == 200
+    assert (r.content, r.puts) == ("b", 1)
+
+
+def test_put_reconstruye_sobre_la_cabeza_nueva():
+    r = Remoto("a")
+    r.put("a+otro", "s0")                   # otra sesión escribe primero
+    vistos = []
+
+    def rebuild(remoto):
+        vistos.append(remoto)
+        return remoto + "+mio"
+
+    assert put_with_retry(r.put, r.refetch, rebuild, "a+mio", "s0", backoff=0) == 200
+    assert vistos == ["a+otro"]
+    assert r.content == "a+otro+mio"
+
+
+def test_put_ya_aplicado():
+    r = Remoto("a")
+    r.put("a+mio", "s0")
+    assert put_with_retry(r.put, r.refetch, lambda remoto: None, "a+mio", "s0", backoff=0) == 200
+    assert r.puts == 2                      # no se reescribe
+
+
+def test_put_sin_rebuild_o_error_no_reintenta():
+    r = Remoto("a")
+    r.put("b", "s0")
+    assert put_with_retry(r.put, r.refetch, None, "c", "s0", backoff=0) == 409
+    assert put_with_retry(lambda c, s: 500, r.refetch, lambda remoto: "x", "c", "s0", backoff=0) == 500
+    assert r.content == "b"
+
+
+def test_put_agota_reintentos():
+    r = Remoto("a")
+    # Cada reintento choca con otra escritura nueva
+    def rebuild(remoto):
+        r.put(remoto + "+otro", r.sha)
+        return remoto + "+mio"
+
+    r.put("b", "s0")
+    assert put_with_retry(r.put, r.refetch, rebuild, "c", "s0", retries=2, backoff=0) == 409
+
+
+def test_merge_appended_normaliza_la_clave():
+    # Lo remoto viene del CSV (ID entero); lo del diario, de JSON (ID como texto o float)
+    remoto = pd.read_csv(StringIO(casos([1, 2]).to_csv(index=False)))
+    nuevos = [{"ID": "2", "Empleado": "Ana", "Numero_caso": "C-2"},
+              {"ID": 3.0, "Empleado": "Ana", "Numero_caso": "C-3"}]
+    out = merge_appended(remoto, nuevos, KEY)
+    assert out["Numero_caso"].tolist() == ["C-1", "C-2", "C-3"]
+    assert merge_appended(None, nuevos, KEY)["Numero_caso"].tolist() == ["C-2", "C-3"]
+    assert merge_appended(remoto, [], KEY) is remoto
+
+
+def test_merge_appended_en_conflicto_real(github):
+    # Dos sesiones agregan casos al mismo archivo partiendo del mismo sha
+    github.put_file("registros/2025-10.csv", casos([1]).to_csv(index=False), "base")
+    _, sha = github.get_file("registros/2025-10.csv")
+    github.put_file("registros/2025-10.csv", pd.concat([casos([1]), casos([2], "Beto")]).to_csv(index=False),
+                    "otra sesión", sha=sha)
+
+    mios = casos([3])
+    def fusionar(remoto):
+        return merge_appended(pd.read_csv(StringIO(remoto)), mios, KEY).to_csv(index=False)
+
+    ok = github.put_file("registros/2025-10.csv", pd.concat([casos([1]), mios]).to_csv(index=False), "mi sesión",
+                         sha=sha, on_conflict=fusionar)
+    assert ok
+    assert github.repo.llamadas["409"] == 1
+    final = pd.read_csv(StringIO(github.text("registros/2025-10.csv")))
+    assert final["Numero_caso"].tolist() == ["C-1", "C-2", "C-3"]
+
+    # Reenviar el mismo lote (p. ej. tras un reinicio) no duplica
+    assert github.put_file("registros/2025-10.csv", "", "reenvío", sha=sha, on_conflict=fusionar)
+    final = pd.read_csv(StringIO(github.text("registros/2025-10.csv")))
+    assert final["Numero_caso"].tolist() == ["C-1", "C-2", "C-3"]
@@ -0,0 +1,83 @@
+"""``cumplimiento`` contra el recorrido día a día de ``calcular_racha_meta``."""
+import pandas as pd
+import pytest
+
+from productividad.metas import cumplimiento
+
+META_DIA = 2
+META_MES = 5
+
+
+def calcular_racha_meta(df, meta):
+    # Versión anterior de app_admin: recorre el rango día a día
+    fechas = pd.to_datetime(df["Fecha"]).dt.date
+    dias = pd.date_range(fechas.min(), fechas.max(), freq="D").date
+    conteo = df.groupby(fechas)["ID"].count()
+    for d in dias:
+        if conteo.get(d, 0) < meta:
+            return False
+    return True
+
+
+def rachas(df, meta):
+    """(racha actual, racha máxima) recorriendo los días uno por uno."""
+    fechas = pd.to_datetime(df["Fecha"]).dt.date
+    conteo = df.groupby(fechas)["ID"].count()
+    actual = maxima = 0
+    for d in pd.date_range(fechas.min(), fechas.max(), freq="D").date:
+        actual = actual + 1 if conteo.get(d, 0) >= meta else 0
+        maxima = max(maxima, actual)
+    return actual, maxima
+
+
+def registros():
+    filas = [
+        # Ana: cumple 3 días, falla uno sin casos, cumple 2 más
+        ("Ana", "2025-03-03", 2), ("Ana", "2025-03-04", 3), ("Ana", "2025-03-05", 2),
+        ("Ana", "2025-03-07", 2), ("Ana", "2025-03-08", 4),
+        # Ana en abril: todos los días cumplidos
+        ("Ana", "2025-04-01", 2), ("Ana", "2025-04-02", 2),
+        # Beto: un solo día bajo la meta al final
+        ("Beto", "2025-03-10", 5), ("Beto", "2025-03-11", 1),
+        # Caro: un único día
+        ("Caro", "2025-03-31", 3),
+    ]
+    df = pd.DataFrame(
+        [(emp, fecha) for emp, fecha, n in filas for _ in range(n)], columns=["Empleado", "Fecha"]
+    )
+    df["ID"] = range(1, len(df) + 1)
+    return df
+
+
+def test_cumplimiento_igual_al_recorrido():
+    df = registros()
+    res = cumplimiento(df, META_DIA, META_MES).set_index(["Empleado", "Mes"])
+    mes = pd.to_datetime(df["Fecha"]).dt.strftime("%Y-%m")
+    assert len(res) == df.groupby(["Empleado", mes]).ngroups
+    for (emp, m), grupo in df.groupby(["Empleado", mes]):
+        fila = res.loc[(emp, m)]
+        assert bool(fila["Racha_completa"]) == calcular_racha_meta(grupo, META_DIA)
+        assert (fila["Racha_actual"], fila["Racha_max"]) == rachas(grupo, META_DIA)
+        assert fila["Casos_mes"] == len(grupo)
+        assert bool(fila["Cumple_mes"]) == (len(grupo) >= META_MES)
+
+
+@pytest.mark.parametrize(
+    "emp, mes, esperado",
+    [
+        ("Ana", "2025-03", (6, 5, 2, 3, False)),
+        ("Ana", "2025-04", (2, 2, 2, 2, True)),
+        ("Beto", "2025-03", (2, 1, 0, 1, False)),
+        ("Caro", "2025-03", (1, 1, 1, 1, True)),
+    ],
+)
+def test_rachas(emp, mes, esperado):
+    res = cumplimiento(registros(), META_DIA, META_MES).set_index(["Empleado", "Mes"])
+    fila = res.loc[(emp, mes)]
+    cols = ["Dias", "Dias_cumplidos", "Racha_actual", "Racha_max", "Racha_completa"]
+    assert tuple(fila[cols]) == esperado
+
+
+def test_sin_registros():
+    res = cumplimiento(pd.DataFrame(columns=["ID", "Empleado", "Fecha"]), META_DIA, META_MES)
+    assert res.empty
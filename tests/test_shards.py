@@ -0,0 +1,99 @@
+"""Registros por mes en GitHub y migración del archivo único previo."""
+import pandas as pd
+import pytest
+
+from productividad.ledger import GitHubLedger
+from productividad.shards import Manifest, ShardedLedger
+
+COLS = ["ID", "Empleado", "Mes"]
+
+
+def filas(ids, mes, empleado="Ana"):
+    return [{"ID": i, "Empleado": empleado, "Mes": mes} for i in ids]
+
+
+def sharded(github, legacy=True):
+    return ShardedLedger(
+        "registros", COLS, lambda path: github.ledger(path, COLS),
+        Manifest("registros/manifest.json", github.text, github.put_text),
+        legacy=github.ledger("registro.csv", COLS) if legacy else None,
+    )
+
+
+def ids(lib, filters=None):
+    return sorted(lib.load(filters)["ID"].tolist())
+
+
+@pytest.fixture
+def previo(github):
+    # Archivo único anterior, con dos filas idénticas que deben sobrevivir
+    df = pd.DataFrame(filas([1, 2], "2025-09") + filas([3, 3], "2025-10"))
+    github.repo.files["registro.csv"] = df.to_csv(index=False).encode()
+    return df
+
+
+def test_append_por_mes(github):
+    lib = sharded(github, legacy=False)
+    lib.append(filas([1], "2025-09") + filas([2, 3], "2025-10"))
+    assert lib.months() == ["2025-09", "2025-10"]
+    assert ids(lib) == [1, 2, 3]
+    assert ids(lib, {"Mes": "2025-10"}) == [2, 3]
+    lib.compact()
+    assert ids(lib) == [1, 2, 3]
+    assert sorted(p for p in github.repo.files if p.endswith(".csv")) == ["registros/2025-09.csv", "registros/2025-10.csv"]
+
+
+def test_migracion(github, previo):
+    lib = sharded(github)
+    assert ids(lib) == [1, 2, 3, 3]
+    lib.append(filas([4], "2025-10"))
+    assert lib.compact() > 0
+    assert lib.manifest.read()["legacy_migrated"]
+    assert ids(lib) == [1, 2, 3, 3, 4]
+    lib.compact()
+    assert ids(lib) == [1, 2, 3, 3, 4]
+
+
+def test_muere_a_mitad_de_la_migracion(github, previo, monkeypatch):
+    lib = sharded(github)
+    append = GitHubLedger.append
+    escritos = []
+
+    def append_y_morir(self, rows, batch_id=None):
+        if escritos:
+            raise SystemExit("proceso muerto")
+        escritos.append(batch_id)
+        return append(self, rows, batch_id)
+
+    monkeypatch.setattr(GitHubLedger, "append", append_y_morir)
+    with pytest.raises(SystemExit):
+        lib.compact()
+    monkeypatch.undo()
+    # Un mes ya tiene su segmento, el otro no: ninguno se cuenta dos veces
+    assert not lib.manifest.read()["legacy_migrated"]
+    assert ids(lib) == [1, 2, 3, 3]
+    lib.compact()
+    assert ids(lib) == [1, 2, 3, 3]
+    assert lib.manifest.read()["legacy_migrated"]
+
+
+def test_muere_antes_de_marcar_migrado(github, previo, monkeypatch):
+    lib = sharded(github)
+    register = ShardedLedger._register
+
+    def register_y_morir(self, meses, extra=None):
+        if extra and extra.get("legacy_migrated"):
+            raise SystemExit("proceso muerto")
+        return register(self, meses, extra)
+
+    monkeypatch.setattr(ShardedLedger, "_register", register_y_morir)
+    with pytest.raises(SystemExit):
+        lib.compact()
+    monkeypatch.undo()
+    assert ids(lib) == [1, 2, 3, 3]
+    # El reintento reescribe los mismos segmentos: no quedan filas repetidas
+    segmentos = {p for p in github.repo.files if ".ledger/" in p}
+    lib.compact()
+    assert ids(lib) == [1, 2, 3, 3]
+    assert len(segmentos) == 2
+    assert not any(".ledger/" in p for p in github.repo.files)
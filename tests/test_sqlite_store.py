@@ -0,0 +1,74 @@
+"""Motor SQLite: importación del CSV local, inserciones y filtros en SQL."""
+import pandas as pd
+import pytest
+
+from productividad.ledger import SEG_COL, LocalLedger
+from productividad.sqlite_store import SQLiteLedger, SQLiteStore
+
+COLS = ["ID", "Empleado", "Área", "Mes"]
+
+
+def filas(ids, empleado="Ana", mes="2025-10", area="Soporte"):
+    return [{"ID": i, "Empleado": empleado, "Área": area, "Mes": mes} for i in ids]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteStore(str(tmp_path / "productividad.db"))
+
+
+def test_import_csv_compactado(tmp_path, store):
+    # Base de un LocalLedger ya compactado: trae la marca SEG_COL
+    csv = str(tmp_path / "registros.csv")
+    local = LocalLedger(csv, COLS)
+    local.append(filas([1, 2]))
+    local.compact()
+    assert SEG_COL in pd.read_csv(csv).columns
+
+    lib = SQLiteLedger(store, "registros", COLS, seed_csv=csv)
+    df = lib.load()
+    assert list(df.columns) == COLS
+    assert df["ID"].tolist() == [1, 2]
+    # Solo la primera vez: la tabla ya existe
+    local.append(filas([3]))
+    local.compact()
+    assert not store.import_csv("registros", csv)
+    assert lib.load()["ID"].tolist() == [1, 2]
+
+
+def test_append_y_filtros(store):
+    lib = SQLiteLedger(store, "registros", COLS)
+    assert lib.load().empty and list(lib.load().columns) == COLS
+    v0 = lib.version()
+    lib.append(filas([1, 2], mes="2025-09") + filas([3], empleado="Beto"))
+    lib.append(filas([4], empleado="Carla", area=""))
+    assert lib.version() != v0
+
+    assert lib.load()["ID"].tolist() == [1, 2, 3, 4]
+    assert lib.load({"Mes": "2025-10"})["ID"].tolist() == [3, 4]
+    assert lib.load({"Empleado": ["Ana", "Carla"], "Mes": "2025-10"})["ID"].tolist() == [4]
+    # Lista vacía o columna inexistente: sin filtro
+    assert len(lib.load({"Empleado": [], "Otra": "x"})) == 4
+
+    # "" se guarda como NULL y no cuenta como valor distinto
+    assert lib.distinct("Área") == ["Soporte"]
+    assert lib.distinct("Empleado") == ["Ana", "Beto", "Carla"]
+    assert lib.distinct("Empleado", {"Mes": "2025-10"}) == ["Beto", "Carla"]
+    assert lib.distinct("Otra") == []
+
+
+def test_append_con_columna_nueva(store):
+    lib = SQLiteLedger(store, "registros", COLS)
+    lib.append(filas([1]))
+    lib.append([{**filas([2])[0], "Horas_Extra": 3}])
+    df = lib.load()
+    assert df["Horas_Extra"].isna().tolist() == [True, False]
+    assert store.distinct("registros", "Horas_Extra") == [3]
+
+
+def test_replace(store):
+    lib = SQLiteLedger(store, "registros", COLS)
+    lib.append(filas([1, 2, 3]))
+    lib.replace(pd.DataFrame(filas([9])))
+    assert lib.load()["ID"].tolist() == [9]
+    assert lib.compact() == 0
@@ -0,0 +1,97 @@
+"""``TariffHistory`` contra el join as-of de ``pd.merge_asof`` y el ``valor_fila`` anterior."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from productividad.tarifas import TariffHistory
+
+CONFIG = {"valor_prod": 3500.0, "valor_adic": 4000.0, "valor_sabado": 5000.0}
+CAMPOS = {"Productividad": "valor_prod", "Adicional": "valor_adic"}
+
+
+def historial():
+    return pd.DataFrame({
+        "Concepto": ["Caso A", "Caso A", "Caso A", "Caso B", "Caso B", "Caso C"],
+        "Tarifa": [1000.0, 1100.0, 1200.0, 2000.0, 2500.0, 3000.0],
+        "Vigente_desde": ["", "2025-04-01", "2025-07-15", "", "2025-04-01", "2025-05-01"],
+    })
+
+
+def filas():
+    return pd.DataFrame({
+        "Variable_Tipo": ["Caso A", "Caso A", "Caso A", "Caso A", "Caso B", "Caso B", "Caso C", "Caso C", "Otro"],
+        "Fecha": ["2025-01-10", "2025-04-01", "2025-07-14", "2025-07-15", "2025-03-31", "2025-12-01",
+                  "2025-04-30", "2025-05-01", "2025-06-01"],
+        "Cantidad": [1, 2, 3, 1, 2, 1, 4, 1, 5],
+    })
+
+
+def por_merge_asof(df, hist):
+    # Camino anterior (benchmarks/bench_tarifas.py)
+    der = hist.assign(Desde=pd.to_datetime(hist["Vigente_desde"]).fillna(pd.Timestamp("1900-01-01")))
+    izq = df.assign(_pos=np.arange(len(df)), _f=pd.to_datetime(df["Fecha"])).sort_values("_f")
+    m = pd.merge_asof(izq, der.sort_values("Desde"), left_on="_f", right_on="Desde",
+                      left_by="Variable_Tipo", right_by="Concepto")
+    m = m.sort_values("_pos")
+    return m["Tarifa"].fillna(0.0).to_numpy() * m["Cantidad"].to_numpy()
+
+
+def valor_fila(fila):
+    # Versión anterior de app_admin (una sola tarifa vigente)
+    if fila["Tipo_caso"] == "Productividad":
+        return CONFIG["valor_prod"]
+    elif fila["Tipo_caso"] == "Adicional":
+        return CONFIG["valor_adic"]
+    else:
+        return CONFIG["valor_sabado"]
+
+
+def test_price_igual_a_merge_asof():
+    df, hist = filas(), historial()
+    precio = TariffHistory.from_frame(hist).price(df, "Variable_Tipo", "Fecha", "Cantidad")
+    np.testing.assert_allclose(precio.to_numpy(), por_merge_asof(df, hist))
+
+
+@pytest.mark.parametrize(
+    "fecha, esperado",
+    [
+        ("2025-03-31", {"Caso A": 1000.0, "Caso B": 2000.0, "Caso C": 0.0}),
+        ("2025-04-01", {"Caso A": 1100.0, "Caso B": 2500.0, "Caso C": 0.0}),
+        ("2025-07-15", {"Caso A": 1200.0, "Caso B": 2500.0, "Caso C": 3000.0}),
+    ],
+)
+def test_as_of(fecha, esperado):
+    tabla = TariffHistory.from_frame(historial()).as_of(pd.Timestamp(fecha))
+    assert {c: tabla.rate(c) for c in esperado} == esperado
+
+
+def test_from_config_igual_a_valor_fila():
+    df = pd.DataFrame({"Tipo_caso": ["Productividad", "Adicional", "Meta sábado", None, "Productividad"]})
+    df["Fecha"] = "2025-06-01"
+    tarifas = TariffHistory.from_config(CONFIG, CAMPOS, default_campo="valor_sabado")
+    esperado = df.apply(valor_fila, axis=1).to_numpy()
+    np.testing.assert_allclose(tarifas.rates(df["Tipo_caso"], df["Fecha"]), esperado)
+
+
+def test_from_config_con_versiones():
+    config = pd.DataFrame([
+        {**CONFIG, "vigente_desde": ""},
+        {**CONFIG, "valor_prod": 3800.0, "vigente_desde": "2025-06-01"},
+    ])
+    tarifas = TariffHistory.from_config(config, CAMPOS, default_campo="valor_sabado")
+    assert tarifas.rate("Productividad", pd.Timestamp("2025-05-31")) == 3500.0
+    assert tarifas.rate("Productividad", pd.Timestamp("2025-06-01")) == 3800.0
+    assert tarifas.rate("Meta sábado", pd.Timestamp("2025-06-01")) == 5000.0
+    antes = TariffHistory.from_config(CONFIG, CAMPOS, default_campo="valor_sabado")
+    assert tarifas.cambio_desde(antes.firma()) == pd.Timestamp("2025-06-01")
+
+
+def test_totals_solo_grupos_observados():
+    # Empleado/Mes categóricos (esquemas.py) con categorías sin filas: no deben aparecer en ceros
+    df = filas().assign(
+        Empleado=pd.Categorical(["ana"] * 5 + ["beto"] * 4, categories=["ana", "beto", "carla"]),
+        Mes=pd.Categorical(["2025-01"] * 9, categories=["2024-12", "2025-01"]),
+    )
+    tot = TariffHistory.from_frame(historial()).totals(df, "Variable_Tipo", "Fecha", ["Empleado", "Mes"], "Cantidad")
+    assert list(tot["Empleado"].astype(str)) == ["ana", "beto"]
+    assert list(tot["Mes"].astype(str)) == ["2025-01", "2025-01"]
@@ -0,0 +1,159 @@
+"""``WriteBehindQueue``: backoff tras fallos, reinicios y líneas cortadas del diario."""
+import pytest
+
+from productividad import write_behind
+from productividad.write_behind import WriteBehindQueue
+
+
+class Subida:
+    """``flush_fn`` que falla mientras ``caida`` es True y guarda lo subido."""
+
+    def __init__(self):
+        self.caida = False
+        self.lotes = []
+
+    def __call__(self, rows, batch_id):
+        if self.caida:
+            raise ConnectionError("sin red")
+        self.lotes.append((batch_id, rows))
+        return True
+
+
+@pytest.fixture
+def cola(tmp_path):
+    subida = Subida()
+    # Sin vaciado automático durante la prueba: solo flush() explícito
+    q = WriteBehindQueue("prueba", subida, max_rows=10_000, max_seconds=3600, journal_dir=str(tmp_path))
+    return q, subida
+
+
+def test_backoff_crece_y_se_reinicia(cola, monkeypatch):
+    q, subida = cola
+    monkeypatch.setattr(write_behind.random, "uniform", lambda a, b: 1.0)
+    ahora = [1000.0]
+    monkeypatch.setattr(write_behind.time, "time", lambda: ahora[0])
+    q.append([{"x": 1}])
+    subida.caida = True
+
+    esperas = []
+    for _ in range(10):
+        assert q.flush() == 0
+        esperas.append(q.proximo_intento - ahora[0])
+    assert esperas[:4] == [2.0, 4.0, 8.0, 16.0]
+    assert esperas[-1] == write_behind.BACKOFF_MAX_S
+    assert q.fallos == 10
+
+    # El hilo no reintenta antes de tiempo; al vencer el plazo, sí
+    assert not q._due()
+    ahora[0] = q.proximo_intento
+    assert q._due()
+
+    subida.caida = False
+    assert q.flush() == 1
+    assert (q.fallos, q.proximo_intento, q.last_error) == (0, 0.0, None)
+    assert q.aviso() is None
+
+
+def test_jitter_dentro_del_rango(cola):
+    q, subida = cola
+    q.append([{"x": 1}])
+    subida.caida = True
+    for _ in range(3):
+        antes = write_behind.time.time()
+        q.flush()
+        base = write_behind.BACKOFF_INICIAL_S * 2 ** (q.fallos - 1)
+        assert base * 0.5 <= q.proximo_intento - antes <= base + 1
+
+
+def test_estado_y_aviso(cola):
+    q, subida = cola
+    q.append([{"x": 1}, {"x": 2}])
+    assert q.estado() == {"pendientes": 2, "fallos": 0, "ultimo_error": None, "reintento_en_s": 0.0}
+    subida.caida = True
+    q.flush()
+    e = q.estado()
+    assert (e["pendientes"], e["fallos"], e["ultimo_error"]) == (2, 1, "sin red")
+    assert 0 < e["reintento_en_s"] <= write_behind.BACKOFF_INICIAL_S
+    assert "2 fila(s)" in q.aviso() and "sin red" in q.aviso()
+
+
+# ==========================
+# Diario: reinicios y líneas cortadas
+# ==========================
+def reabrir(tmp_path, flush_fn):
+    """La misma cola tras reiniciar el proceso (mismo diario en disco)."""
+    return WriteBehindQueue("prueba", flush_fn, max_rows=10_000, max_seconds=3600, journal_dir=str(tmp_path))
+
+
+def morir_tras(flush_fn):
+    """``flush_fn`` que sube y luego mata el proceso antes de borrar el lote congelado."""
+    def fn(rows, batch_id):
+        flush_fn(rows, batch_id)
+        raise SystemExit("proceso muerto")
+    return fn
+
+
+def test_reinicio_sin_subir(tmp_path, cola):
+    q, _ = cola
+    q.append([{"x": 1}, {"x": 2}])
+    subida = Subida()
+    nueva = reabrir(tmp_path, subida)
+    assert nueva.pending() == [{"x": 1}, {"x": 2}]
+    assert nueva.flush() == 2
+    assert [rows for _, rows in subida.lotes] == [[{"x": 1}, {"x": 2}]]
+    assert nueva.pending() == []
+
+
+def test_linea_cortada_al_final(tmp_path, cola):
+    q, subida = cola
+    q.append([{"x": 1}])
+    with open(q.journal_path, "ab") as fh:
+        fh.write(b'{"x": 2, "nom')          # el proceso murió a mitad de la escritura
+    nueva = reabrir(tmp_path, subida)
+    assert nueva.pending() == [{"x": 1}]
+    nueva.append([{"x": 3}])
+    assert nueva.pending() == [{"x": 1}, {"x": 3}]
+    assert nueva.flush() == 2
+
+
+def test_linea_corrupta_en_el_medio(tmp_path, cola):
+    q, _ = cola
+    q.append([{"x": 1}])
+    with open(q.journal_path, "ab") as fh:
+        fh.write(b"no es json\n")
+    q.append([{"x": 2}])
+    with pytest.raises(ValueError):
+        q.pending()
+
+
+def test_reenvio_tras_morir_despues_de_subir(tmp_path, cola):
+    q, subida = cola
+    q.append([{"x": 1}])
+    q.flush_fn = morir_tras(subida)
+    with pytest.raises(SystemExit):
+        q.flush()
+    q.proximo_intento = float("inf")       # el hilo del proceso "muerto" ya no vacía
+    nueva = reabrir(tmp_path, subida)
+    assert nueva.pending() == [{"x": 1}]
+    assert nueva.flush() == 1
+    (lote_1, rows_1), (lote_2, rows_2) = subida.lotes
+    assert lote_1 == lote_2 and rows_1 == rows_2
+
+
+def test_reenvio_al_ledger_de_github(tmp_path, github):
+    libro = github.ledger("registros.csv", ["x"])
+    q = reabrir(tmp_path, morir_tras(libro.append))
+    q.append([{"x": 1}])
+    # Muere dos veces seguidas después de subir: cada reinicio entrega el mismo lote
+    for _ in range(2):
+        with pytest.raises(SystemExit):
+            q.flush()
+        q.proximo_intento = float("inf")       # el hilo del proceso "muerto" ya no vacía
+        q = reabrir(tmp_path, morir_tras(libro.append))
+    q.flush_fn = libro.append
+    assert q.flush() == 1
+    assert q.pending() == []
+    assert len([p for p in github.repo.files if p.startswith("registros.ledger/")]) == 1
+    assert libro.load()["x"].tolist() == [1]
+    libro.compact()
+    assert libro.load()["x"].tolist() == [1]